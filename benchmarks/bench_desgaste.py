@@ -0,0 +1,75 @@
+"""
+Benchmark de grafico_comparar_desgaste con cada renderizador de puntos
+('swarm' de seaborn, 'jitter' con NumPy y 'plotly'), sobre carreras de la cache
+de FastF1. Mide el tiempo por figura hasta tenerla lista para enviar al
+navegador (PNG para matplotlib, JSON para Plotly).
+
+Uso (desde la raiz del repositorio):
+    python -m benchmarks.bench_desgaste [--year 2024] [--gps Bahrain Jeddah ...] [--repeticiones 3]
+"""
+import argparse
+import io
+import time
+import warnings
+import fastf1
+import pandas as pd
+import matplotlib.pyplot as plt
+from modules.plotting import grafico_comparar_desgaste, RENDERIZADORES_DESGASTE
+from modules.session_manager import asegurar_datos
+from modules.utils import configurar_cache
+
+
+def _finalizar(fig):
+    # Trabajo que hace la app con cada figura antes de mostrarla
+    if isinstance(fig, plt.Figure):
+        fig.savefig(io.BytesIO(), format='png', dpi=200, bbox_inches='tight')
+        plt.close(fig)
+    else:
+        fig.to_json()
+
+
+def _medir(session, renderizador, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        figuras = grafico_comparar_desgaste(session, session.event.year, renderizador)
+        for fig in figuras:
+            _finalizar(fig)
+        tiempos.append((time.perf_counter() - inicio) / len(figuras))
+    return min(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--gps', nargs='+', default=['Bahrain'])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    configurar_cache('cache')
+    # Los avisos de solapamiento de swarmplot no interesan aqui
+    warnings.filterwarnings('ignore', category=UserWarning)
+    filas = []
+    for gp in args.gps:
+        try:
+            session = fastf1.get_session(args.year, gp, 'R')
+            asegurar_datos(session, 'laps')
+        except Exception as e:
+            print(f"{args.year} {gp}: omitida ({e})")
+            continue
+        puntos = len(session.laps.pick_quicklaps())
+        for renderizador in RENDERIZADORES_DESGASTE:
+            filas.append({'gp': session.event['EventName'], 'vueltas': puntos, 'renderizador': renderizador,
+                          'ms_por_figura': _medir(session, renderizador, args.repeticiones) * 1000})
+
+    if not filas:
+        print("No se ha podido medir ninguna sesion.")
+        return
+    tabla = pd.DataFrame(filas)
+    referencia = tabla[tabla['renderizador'] == 'swarm'].set_index('gp')['ms_por_figura']
+    tabla['speedup'] = tabla['gp'].map(referencia) / tabla['ms_por_figura']
+    print(tabla.round(2).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
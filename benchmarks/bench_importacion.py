@@ -0,0 +1,143 @@
+"""
+Benchmark del arranque en frio de la app: importa en un proceso nuevo los mismos
+modulos que main_app.py (sus import de nivel superior, leidos con ast) con
+`python -X importtime` y suma el tiempo acumulado de cada import.
+
+Falla (codigo de salida 1) si:
+- se importa al arrancar alguno de los modulos pesados que solo necesitan
+  algunos graficos (MODULOS_DIFERIDOS), o
+- con --base, el arranque es mas de --tolerancia mas lento que el del arbol de
+  esa revision de git, medidos alternandose en la misma ejecucion.
+
+El tiempo absoluto varia mucho entre ejecuciones de una misma maquina, asi que
+la referencia guardada solo se muestra como orientacion y no hace fallar.
+
+Uso (desde la raiz del repositorio):
+    python -m benchmarks.bench_importacion [--repeticiones 5] [--base main] [--tolerancia 0.25]
+    python -m benchmarks.bench_importacion --guardar-referencia   # tras un cambio aceptado o en otra maquina
+"""
+import os
+import re
+import sys
+import ast
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+APP = 'main_app.py'
+REFERENCIA = os.path.join('benchmarks', 'referencia_importacion.json')
+# Dependencias que solo se importan al abrir el grafico o el componente que las usa
+MODULOS_DIFERIDOS = ('matplotlib.pyplot', 'seaborn', 'scipy.signal', 'plotly.express', 'folium', 'streamlit_folium',
+                     'streamlit_globe', 'timple', 'colour', 'modules.championship', 'modules.graficos_carrera',
+                     'modules.graficos_telemetria', 'modules.graficos_distribuciones', 'modules.graficos_circuito',
+                     'modules.graficos_temporada')
+
+_LINEA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$')
+
+
+def imports_app(ruta=APP):
+    # Sentencias import de nivel superior del script (las de dentro de bloques se difieren)
+    with open(ruta, encoding='utf-8') as f:
+        arbol = ast.parse(f.read())
+    return '\n'.join(ast.unparse(nodo) for nodo in arbol.body if isinstance(nodo, (ast.Import, ast.ImportFrom)))
+
+
+def extraer_revision(revision, destino):
+    # Arbol de `revision` (sin tocar el directorio de trabajo) con git archive
+    archivo = subprocess.run(['git', 'archive', '--format=tar', revision], capture_output=True, check=True)
+    subprocess.run(['tar', '-x', '-C', destino], input=archivo.stdout, check=True)
+
+
+def medir(codigo, cwd=None):
+    """
+    Importa `codigo` en un interprete nuevo con -X importtime, desde `cwd` (por
+    defecto el directorio actual) para usar los modulos de ese arbol.
+
+    Returns:
+    - total: segundos acumulados de los imports de primer nivel.
+    - modulos: dict modulo -> segundos acumulados (todos los niveles).
+    """
+    salida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], capture_output=True, text=True,
+                            cwd=cwd or os.getcwd())
+    if salida.returncode != 0:
+        raise RuntimeError(salida.stderr[-2000:])
+    total = 0.0
+    modulos = {}
+    for linea in salida.stderr.splitlines():
+        coincidencia = _LINEA.match(linea)
+        if not coincidencia:
+            continue
+        _, acumulado, sangria, modulo = coincidencia.groups()
+        modulos[modulo] = int(acumulado) / 1e6
+        if len(sangria) == 1:
+            total += int(acumulado) / 1e6
+    return total, modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--base', help="Revision de git con la que comparar en la misma ejecucion")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="Aumento relativo permitido sobre el arbol de --base")
+    parser.add_argument('--referencia', default=REFERENCIA)
+    parser.add_argument('--guardar-referencia', action='store_true')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    codigo = imports_app()
+    base = None
+    if args.base:
+        base = tempfile.mkdtemp(prefix='bench_importacion_')
+        extraer_revision(args.base, base)
+        codigo_base = imports_app(os.path.join(base, APP))
+    try:
+        # El primer proceso calienta la cache de bytecode y del sistema de ficheros
+        medir(codigo)
+        mediciones, mediciones_base = [], []
+        for _ in range(args.repeticiones):
+            mediciones.append(medir(codigo))
+            if base:
+                # Alternando con el arbol actual, los dos se miden en las mismas condiciones
+                mediciones_base.append(medir(codigo_base, cwd=base))
+    finally:
+        if base:
+            shutil.rmtree(base, ignore_errors=True)
+    total, modulos = min(mediciones, key=lambda m: m[0])
+
+    print(f"Arranque en frio (imports de {APP}): {total:.3f} s (mejor de {args.repeticiones})")
+    primer_nivel = [linea.split()[1] for linea in codigo.splitlines()]
+    for modulo in sorted(set(primer_nivel), key=lambda m: -modulos.get(m, 0))[:args.top]:
+        print(f"  {modulo:<32} {modulos.get(modulo, 0):.3f} s")
+
+    fallos = []
+    cargados = sorted(modulo for modulo in MODULOS_DIFERIDOS if modulo in modulos)
+    if cargados:
+        fallos.append(f"modulos que deberian importarse al usarse: {', '.join(cargados)}")
+
+    if mediciones_base:
+        total_base = min(total for total, _ in mediciones_base)
+        limite = total_base * (1 + args.tolerancia)
+        print(f"Base ({args.base}): {total_base:.3f} s, limite {limite:.3f} s")
+        if total > limite:
+            fallos.append(f"el arranque ({total:.3f} s) supera al de {args.base} en mas de un {args.tolerancia:.0%}")
+
+    if args.guardar_referencia:
+        with open(args.referencia, 'w', encoding='utf-8') as f:
+            json.dump({'segundos': round(total, 4), 'python': sys.version.split()[0]}, f, indent=2)
+            f.write('\n')
+        print(f"Referencia guardada en {args.referencia}")
+    elif os.path.exists(args.referencia):
+        with open(args.referencia, encoding='utf-8') as f:
+            referencia = json.load(f)['segundos']
+        print(f"Referencia guardada (orientativa): {referencia:.3f} s")
+
+    for fallo in fallos:
+        print(f"REGRESION: {fallo}")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
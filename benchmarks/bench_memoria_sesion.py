@@ -0,0 +1,158 @@
+"""
+Benchmark de memoria de una sesion de carrera con telemetria completa: lo que
+queda en memoria (tracemalloc, tras gc.collect) con la telemetria de FastF1 y
+con la representacion compacta de modules.compact_session, que es la que deja
+session_manager.asegurar_datos al cargar la telemetria.
+
+Usa la carrera de Bahrein 2024 de la cache incluida en el repositorio, sin
+conexion y en un directorio temporal (como benchmarks.bench_offline). La cache
+no incluye telemetria, asi que se genera con el formato de FastF1 (canales
+enteros guardados en float64, nGear y DRS en int64, Source y Status como object,
+y Date, SessionTime y Time por muestra) para toda la sesion y todos los pilotos.
+
+Falla (codigo de salida 1) si la sesion compacta no ocupa al menos --objetivo
+veces menos que la original o si la telemetria reconstruida desde la compacta
+(session.car_data[...], lap.get_car_data()) no es identica a la original.
+
+Uso (desde la raiz del repositorio):
+    python -m benchmarks.bench_memoria_sesion [--objetivo 3]
+"""
+import os
+import gc
+import sys
+import shutil
+import argparse
+import tempfile
+import warnings
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_offline import YEAR, GP, PASO_CAR_S, PASO_POS_S, preparar_base
+
+# Duracion aproximada de una vuelta de la telemetria generada (s)
+VUELTA_S = 95.0
+
+
+def _mb(n):
+    return n / 2 ** 20
+
+
+def _memoria():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def telemetria_fastf1(session):
+    """
+    car_data y pos_data de todos los pilotos desde el inicio de la sesion hasta
+    la ultima vuelta, con las columnas, tipos y resolucion (ms) de FastF1.
+    Es determinista: dos llamadas devuelven los mismos datos.
+    """
+    from fastf1.core import Telemetry
+
+    fin = session.laps['Time'].max().total_seconds()
+    car, pos = {}, {}
+    for i, numero in enumerate(session.drivers):
+        for paso, destino in ((PASO_CAR_S, car), (PASO_POS_S, pos)):
+            ms = np.arange(i, fin * 1000, paso * 1000).round().astype('int64')
+            tiempo = pd.to_timedelta(ms, unit='ms')
+            angulo = 2 * np.pi * ms / 1000 / VUELTA_S
+            if destino is car:
+                velocidad = np.round(200 + 100 * np.sin(5 * angulo + i))
+                datos = {'Date': session.t0_date + tiempo, 'SessionTime': tiempo, 'Time': tiempo,
+                         'RPM': np.round(10500 + 15 * velocidad), 'Speed': velocidad,
+                         'nGear': np.clip(velocidad // 40, 1, 8).astype('int64'),
+                         'Throttle': np.round(np.clip(velocidad / 3, 0, 100)), 'Brake': velocidad < 150,
+                         'DRS': np.where(velocidad > 290, 12, 1).astype('int64'), 'Source': 'car'}
+            else:
+                datos = {'Date': session.t0_date + tiempo, 'Status': 'OnTrack',
+                         'X': np.round(4000 * np.cos(angulo)), 'Y': np.round(2500 * np.sin(angulo)),
+                         'Z': np.round(-150 + 20 * np.sin(3 * angulo)), 'Source': 'pos',
+                         'Time': tiempo, 'SessionTime': tiempo}
+            destino[numero] = Telemetry(datos, session=session, driver=numero)
+    return car, pos
+
+
+def medir(objetivo):
+    from modules.session_manager import crear_sesion, asegurar_datos
+    from modules.compact_session import compactar_telemetria, vueltas_compactas
+
+    tracemalloc.start()
+    inicial = _memoria()
+    session = crear_sesion(YEAR, GP, 'R')
+    asegurar_datos(session, 'laps', 'messages')
+    # FastF1 fija t0_date al cargar la telemetria
+    session._t0_date = pd.Timestamp(session.date).tz_localize(None) - session.session_start_time
+    sin_telemetria = _memoria()
+
+    session._car_data, session._pos_data = telemetria_fastf1(session)
+    muestras = sum(len(tel) for datos in (session._car_data, session._pos_data) for tel in datos.values())
+    original = _memoria()
+
+    compactar_telemetria(session)
+    vueltas_compactas(session)
+    compacta = _memoria()
+    tracemalloc.stop()
+
+    base = sin_telemetria - inicial
+    filas = {
+        'sesion sin telemetria': (base, base),
+        'telemetria': (original - sin_telemetria, compacta - sin_telemetria),
+        'total': (original - inicial, compacta - inicial),
+    }
+    print(f"{GP} {YEAR} carrera: {len(session.drivers)} pilotos, {muestras} muestras de car y pos data")
+    print(f"{'':<24}{'FastF1 (MB)':>12}{'compacta (MB)':>15}{'reduccion':>11}")
+    for nombre, (antes, despues) in filas.items():
+        print(f"{nombre:<24}{_mb(antes):>12.1f}{_mb(despues):>15.1f}{antes / max(despues, 1):>10.2f}x")
+
+    fallos = []
+    reduccion = (original - inicial) / (compacta - inicial)
+    if reduccion < objetivo:
+        fallos.append(f"la sesion compacta solo ocupa {reduccion:.2f}x menos (objetivo {objetivo:.1f}x)")
+
+    # La API de FastF1 sobre la telemetria compacta devuelve exactamente los mismos datos
+    car, pos = telemetria_fastf1(session)
+    for numero in session.drivers[:3]:
+        for tipo, esperado, obtenido in (('car', car[numero], session.car_data[numero]),
+                                         ('pos', pos[numero], session.pos_data[numero])):
+            try:
+                pd.testing.assert_frame_equal(pd.DataFrame(obtenido), pd.DataFrame(esperado), check_exact=True)
+            except AssertionError as e:
+                fallos.append(f"{tipo} data del piloto {numero} no coincide al reconstruirla: {e}")
+    lap = session.laps.pick_fastest()
+    if not lap.get_car_data().equals(car[lap['DriverNumber']].slice_by_lap(lap).reset_index(drop=True)):
+        fallos.append("lap.get_car_data() no coincide con la telemetria original")
+    return fallos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--objetivo', type=float, default=3.0,
+                        help="Reduccion minima de memoria de la sesion (veces)")
+    args = parser.parse_args()
+
+    import fastf1
+    from modules.utils import configurar_cache
+
+    origen = os.getcwd()
+    trabajo = tempfile.mkdtemp(prefix='bench_memoria_')
+    try:
+        preparar_base(trabajo)
+        os.chdir(trabajo)
+        configurar_cache('cache')
+        fastf1.Cache.offline_mode(True)
+        fastf1.set_log_level('ERROR')
+        warnings.filterwarnings('ignore')
+        fallos = medir(args.objetivo)
+    finally:
+        os.chdir(origen)
+        shutil.rmtree(trabajo, ignore_errors=True)
+
+    for fallo in fallos:
+        print(f"FALLO: {fallo}")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,528 @@
+"""
+Suite de benchmarks sin red sobre la cache de FastF1 incluida en el repositorio
+(cache/2024/2024-03-02_Bahrain_Grand_Prix: clasificacion y carrera).
+
+Cada caso mide una funcion publica de modules.plotting o de modules.data_loading
+en un proceso nuevo, con su propia copia de la cache, de modo que el resultado
+no depende del orden de los casos:
+- frio_s: primera llamada (importa el modulo del grafico, parsea la sesion si
+  le toca y llena las caches en memoria).
+- caliente_s: mejor de --repeticiones llamadas siguientes.
+- memoria_mb: pico de memoria de la primera llamada con tracemalloc, medido en
+  otro proceso para no alterar los tiempos.
+Las figuras se codifican dentro del tiempo medido como las envia la app (PNG a
+200 dpi o JSON de Plotly).
+
+Todo se ejecuta en un directorio temporal en modo sin conexion de FastF1: el
+calendario se construye a mano y, como la cache no incluye telemetria, los
+graficos de telemetria usan telemetria sintetica generada a partir de los
+tiempos de vuelta reales con la frecuencia de muestreo de FastF1.
+
+Falla (codigo de salida 1) si algun caso falla, si una funcion publica no tiene
+caso (ni esta en OMITIDOS) o si un tiempo o la memoria superan la referencia
+guardada en mas de --tolerancia (y en mas de --minimo-s / --minimo-mb).
+
+Uso (desde la raiz del repositorio):
+    python -m benchmarks.bench_offline [--casos grafico_degradacion ...] [--repeticiones 3] [--tolerancia 0.25]
+    python -m benchmarks.bench_offline --guardar-referencia   # tras un cambio aceptado o en otra maquina
+    python -m benchmarks.bench_offline --listar
+"""
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import inspect
+import argparse
+import tempfile
+import warnings
+import subprocess
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+YEAR = 2024
+GP = 'Bahrain Grand Prix'
+FIXTURE = os.path.join('cache', str(YEAR), '2024-03-02_Bahrain_Grand_Prix')
+REFERENCIA = os.path.join('benchmarks', 'referencia_offline.json')
+# Frecuencia de muestreo aproximada de FastF1 (car data ~4 Hz, pos data ~4.5 Hz)
+PASO_CAR_S = 0.24
+PASO_POS_S = 0.22
+_PREFIJO = 'RESULTADO '
+TIMEOUT_CASO_S = 600
+
+# Funciones publicas que no se pueden medir sin red
+OMITIDOS = {
+    'grafico_comparar_vueltas': 'descarga la clasificacion de Bahrein 2023',
+    'grafico_evolucion_campeonato': 'necesita los resultados de Ergast',
+}
+
+
+def _evento():
+    # Event de FastF1 de Bahrein 2024, como lo devolveria el calendario oficial
+    import pandas as pd
+    from fastf1.events import Event
+
+    sesiones = (('Practice 1', '2024-02-29 14:30', 3), ('Practice 2', '2024-02-29 18:00', 3),
+                ('Practice 3', '2024-03-01 15:30', 3), ('Qualifying', '2024-03-01 19:00', 3),
+                ('Race', '2024-03-02 18:00', 3))
+    datos = {'RoundNumber': 1, 'Country': 'Bahrain', 'Location': 'Sakhir', 'EventName': GP,
+             'OfficialEventName': 'FORMULA 1 GULF AIR BAHRAIN GRAND PRIX 2024', 'EventDate': pd.Timestamp('2024-03-02'),
+             'EventFormat': 'conventional', 'F1ApiSupport': True}
+    for n, (nombre, fecha, horas) in enumerate(sesiones, start=1):
+        local = pd.Timestamp(fecha).tz_localize(f'Etc/GMT-{horas}')
+        datos[f'Session{n}'] = nombre
+        datos[f'Session{n}Date'] = local
+        datos[f'Session{n}DateUtc'] = local.tz_convert('UTC').tz_localize(None)
+    return Event(datos, year=YEAR)
+
+
+def preparar_base(destino):
+    """
+    Directorio de trabajo con la cache del evento, los datos de la app y el
+    indice del calendario, que cada caso copia antes de empezar.
+    """
+    import pandas as pd
+    from fastf1.events import EventSchedule
+    from modules.schedule_index import tabla_calendario
+
+    shutil.copytree(FIXTURE, os.path.join(destino, FIXTURE))
+    shutil.copytree('data', os.path.join(destino, 'data'))
+    tabla = tabla_calendario(EventSchedule(pd.DataFrame([_evento()]), year=YEAR))
+    os.makedirs(os.path.join(destino, 'cache', 'calendario'))
+    tabla.to_parquet(os.path.join(destino, 'cache', 'calendario', f'{YEAR}.parquet'), index=False)
+
+
+def _telemetria_sintetica(session):
+    """
+    Car y pos data sinteticos por piloto: cada vuelta recorre una elipse con un
+    perfil de velocidad que depende de la posicion en la pista, entre los
+    tiempos de inicio y fin reales de cada vuelta.
+    """
+    import numpy as np
+    import pandas as pd
+    from fastf1.core import Telemetry
+    from modules import session_manager
+    from modules.compact_session import compactar_telemetria
+
+    inicio_sesion = pd.Timestamp(session.date).tz_localize(None)
+    car, pos = {}, {}
+    for numero in session.drivers:
+        vueltas = session.laps[session.laps['DriverNumber'] == numero].dropna(subset=['LapStartTime', 'Time'])
+        if vueltas.empty:
+            continue
+        limites = np.append(vueltas['LapStartTime'].dt.total_seconds().to_numpy(),
+                            vueltas['Time'].dt.total_seconds().to_numpy()[-1])
+        desfase = int(numero) * 0.01
+        for paso, destino, fuente in ((PASO_CAR_S, car, 'car'), (PASO_POS_S, pos, 'pos')):
+            t = np.arange(limites[0], limites[-1], paso)
+            # Fraccion de vuelta recorrida en cada muestra
+            fraccion = np.interp(t, limites, np.arange(len(limites))) % 1
+            angulo = 2 * np.pi * fraccion
+            tiempo = pd.to_timedelta(t, unit='s')
+            datos = {'SessionTime': tiempo, 'Time': tiempo - tiempo[0], 'Date': inicio_sesion + tiempo}
+            if fuente == 'car':
+                velocidad = 210 + 90 * np.sin(5 * angulo + desfase)
+                datos.update({'Speed': velocidad, 'RPM': 10500 + 10 * velocidad,
+                              'nGear': np.clip(velocidad // 40, 1, 8), 'Throttle': np.clip(velocidad / 3, 0, 100),
+                              'Brake': velocidad < 150, 'DRS': 0})
+            else:
+                datos.update({'X': 4000 * np.cos(angulo), 'Y': 2500 * np.sin(angulo), 'Z': 0.0, 'Status': 'OnTrack'})
+            datos['Source'] = fuente
+            destino[numero] = Telemetry(datos, session=session, driver=numero)
+    session._car_data, session._pos_data = car, pos
+    # Para requiere_datos la telemetria ya esta cargada: no se pide a FastF1. Se
+    # compacta como hace session_manager.asegurar_datos al cargarla
+    session_manager._estado(session).categorias.add('telemetry')
+    compactar_telemetria(session)
+    return session
+
+
+def _circuit_info():
+    # Curvas repartidas por la elipse de la telemetria sintetica
+    import numpy as np
+    import pandas as pd
+    from fastf1.mvapi import CircuitInfo
+
+    angulos = np.linspace(0, 2 * np.pi, 15, endpoint=False)
+    curvas = pd.DataFrame({'X': 4000 * np.cos(angulos), 'Y': 2500 * np.sin(angulos),
+                           'Number': np.arange(1, 16), 'Letter': '', 'Angle': np.degrees(angulos),
+                           'Distance': np.linspace(0, 5000, 15)})
+    return CircuitInfo(corners=curvas, marshal_lights=curvas.iloc[:0], marshal_sectors=curvas.iloc[:0], rotation=92.0)
+
+
+class Contexto:
+    """
+    Sesiones del evento cargadas (sin medir) con el mismo camino que la app.
+    """
+
+    def __init__(self):
+        self._sesiones = {}
+        self._con_telemetria = set()
+
+    def sesion(self, tipo, telemetria=False):
+        from modules.session_manager import cargar_sesion
+
+        if tipo not in self._sesiones:
+            self._sesiones[tipo] = cargar_sesion(YEAR, GP, tipo)
+        session = self._sesiones[tipo]
+        if telemetria and tipo not in self._con_telemetria:
+            _telemetria_sintetica(session)
+            self._con_telemetria.add(tipo)
+        return session
+
+    def pilotos(self, tipo, n=None):
+        session = self.sesion(tipo)
+        pilotos = session.results.sort_values('Position')['Abbreviation'].tolist()
+        return pilotos[:n] if n else pilotos
+
+
+def _caso_posiciones(constructor):
+    def preparar(ctx):
+        from modules import plotting
+        from modules.position_traces import SeriesPosiciones
+        from modules.styles import registro_estilos
+
+        session = ctx.sesion('R')
+        abreviaturas = dict(zip(session.laps['DriverNumber'], session.laps['Driver']))
+        serie = SeriesPosiciones.desde_vueltas(session.laps, [abreviaturas[d] for d in session.drivers
+                                                              if d in abreviaturas])
+        estilos = registro_estilos(session).estilos_pilotos(serie.pilotos)
+        funcion = getattr(plotting, constructor)
+        return lambda: funcion(serie, estilos, GP)
+    return preparar
+
+
+def _caso_geometria(ctx):
+    # Vuelta rapida de la clasificacion con su pos data e informacion del circuito
+    session = ctx.sesion('Q', telemetria=True)
+    lap = session.laps.pick_fastest()
+    return lap, lap.get_pos_data(), _circuit_info()
+
+
+def _grafico(nombre, *args, tipo=None, telemetria=False, **kwargs):
+    # Caso de un grafico del registro cuyos argumentos son la sesion y valores fijos
+    def preparar(ctx):
+        from modules import plotting
+
+        funcion = getattr(plotting, nombre)
+        if tipo is None:
+            return lambda: funcion(*args, **kwargs)
+        session = ctx.sesion(tipo, telemetria)
+        return lambda: funcion(session, *(a(ctx) if callable(a) else a for a in args), **kwargs)
+    return preparar
+
+
+def _datos(nombre, *args, preparar_sesion=None):
+    # Caso de modules.data_loading; preparar_sesion carga antes la sesion (p. ej. ya almacenada)
+    def preparar(ctx):
+        from modules import data_loading
+
+        if preparar_sesion:
+            ctx.sesion(preparar_sesion)
+        funcion = getattr(data_loading, nombre)
+        return lambda: funcion(*args)
+    return preparar
+
+
+def _preparar_delta(ctx):
+    import pandas as pd
+    from modules import plotting
+    from modules.telemetry_alignment import alinear_telemetria
+
+    alineacion = alinear_telemetria(ctx.sesion('Q', telemetria=True))
+    piloto1, piloto2 = alineacion.pilotos[:2]
+    comparacion = pd.DataFrame({'Distance': alineacion.distancia,
+                                'DeltaTiempo(s)': alineacion.delta(piloto1, piloto2)})
+    return lambda: plotting.grafico_delta_vs_distancia(comparacion)
+
+
+def _preparar_mejor_tiempo(ctx):
+    from modules import plotting
+
+    results = ctx.sesion('Q').results
+    return lambda: results.apply(plotting.get_best_qualifying_time, axis=1)
+
+
+def _preparar_dibujar_mapa(ctx):
+    from modules import plotting
+    from modules.track_geometry import calcular_geometria
+
+    _, pos, circuit_info = _caso_geometria(ctx)
+    geometria = calcular_geometria(pos, circuit_info)
+    return lambda: plotting.dibujar_mapa_circuito(geometria, GP)
+
+
+def _preparar_mostrar_mapa(ctx):
+    from modules import plotting
+
+    lap, pos, circuit_info = _caso_geometria(ctx)
+    return lambda: plotting.mostrar_mapa_circuito(lap, pos, circuit_info, GP)
+
+
+def _preparar_tendencias(ctx):
+    from modules import plotting
+
+    # Las sesiones ya estan en el almacen columnar, como tras visitarlas en la app
+    ctx.sesion('Q')
+    ctx.sesion('R')
+    return lambda: plotting.grafico_tendencias_temporada(YEAR, 'R')
+
+
+def _dos_pilotos(ctx):
+    return ctx.pilotos('Q', 2)
+
+
+CASOS = {
+    # modules.data_loading
+    'cargar_datos_de_sesion[Q]': _datos('cargar_datos_de_sesion', YEAR, GP, 'Q'),
+    'cargar_datos_de_sesion[R]': _datos('cargar_datos_de_sesion', YEAR, GP, 'R'),
+    'cargar_tabla_sesion': _datos('cargar_tabla_sesion', YEAR, GP, 'R', 'laps', ['Driver', 'LapNumber', 'LapTime'],
+                                  preparar_sesion='R'),
+    'cargar_mapa_circuito': _datos('cargar_mapa_circuito', os.path.join('data', 'circuit_image', f'{GP}.png')),
+    'obtener_calendario': _datos('obtener_calendario', YEAR),
+    # modules.plotting
+    'ajustar_tonalidad_color': _grafico('ajustar_tonalidad_color', '#3671C6'),
+    'format_func': _grafico('format_func', 95.3, 0),
+    'get_best_qualifying_time': _preparar_mejor_tiempo,
+    'construir_figura_posiciones': _caso_posiciones('construir_figura_posiciones'),
+    'construir_animacion_posiciones': _caso_posiciones('construir_animacion_posiciones'),
+    'grafico_posiciones': _grafico('grafico_posiciones', GP, YEAR, tipo='R'),
+    'grafico_posiciones_animado': _grafico('grafico_posiciones_animado', GP, YEAR, tipo='R'),
+    'grafico_tiempos_vuelta': _grafico('grafico_tiempos_vuelta', YEAR, lambda ctx: ctx.pilotos('R', 3), tipo='R'),
+    'grafico_velocidad_vuelta': _grafico('grafico_velocidad_vuelta', lambda ctx: ctx.pilotos('Q'), tipo='Q',
+                                         telemetria=True),
+    'grafico_clasificacion': _grafico('grafico_clasificacion', YEAR, tipo='Q'),
+    'grafico_degradacion': _grafico('grafico_degradacion', tipo='R'),
+    'grafico_delta_vs_distancia': _preparar_delta,
+    'grafico_comparar_vueltas_en_mapa': _grafico('grafico_comparar_vueltas_en_mapa',
+                                                 lambda ctx: _dos_pilotos(ctx)[0], lambda ctx: _dos_pilotos(ctx)[1],
+                                                 tipo='Q', telemetria=True),
+    'grafico_matriz_deltas': _grafico('grafico_matriz_deltas', tipo='Q', telemetria=True),
+    'grafico_dominancia_minisectores': _grafico('grafico_dominancia_minisectores', tipo='Q', telemetria=True),
+    'grafico_comparar_desgaste[swarm]': _grafico('grafico_comparar_desgaste', YEAR, 'swarm', tipo='R'),
+    'grafico_comparar_desgaste[jitter]': _grafico('grafico_comparar_desgaste', YEAR, 'jitter', tipo='R'),
+    'grafico_comparar_desgaste[plotly]': _grafico('grafico_comparar_desgaste', YEAR, 'plotly', tipo='R'),
+    'grafico_vel_media_equipo': _grafico('grafico_vel_media_equipo', tipo='R'),
+    'dibujar_mapa_circuito': _preparar_dibujar_mapa,
+    'mostrar_mapa_circuito': _preparar_mostrar_mapa,
+    'grafico_tendencias_temporada': _preparar_tendencias,
+}
+
+
+def funciones_sin_caso():
+    # Funciones publicas de plotting y data_loading sin caso ni motivo para omitirlas
+    from modules import plotting, data_loading
+
+    publicas = {nombre for nombre in plotting.__all__ if callable(plotting.grafico(nombre))}
+    publicas |= {nombre for nombre, valor in vars(data_loading).items()
+                 if inspect.isfunction(valor) and valor.__module__ == data_loading.__name__
+                 and not nombre.startswith('_')}
+    cubiertas = {caso.split('[')[0] for caso in CASOS} | set(OMITIDOS)
+    return sorted(publicas - cubiertas)
+
+
+def _finalizar(resultado):
+    # Trabajo que hace la app con cada resultado antes de enviarlo al navegador
+    import matplotlib.pyplot as plt
+    import plotly.graph_objects as go
+
+    if isinstance(resultado, (tuple, list)):
+        for elemento in resultado:
+            _finalizar(elemento)
+    elif isinstance(resultado, plt.Figure):
+        resultado.savefig(io.BytesIO(), format='png', dpi=200, bbox_inches='tight')
+        plt.close(resultado)
+    elif isinstance(resultado, go.Figure):
+        resultado.to_json()
+
+
+def medir_llamadas(nombre, modo, repeticiones):
+    """
+    Prepara el caso y mide sus llamadas.
+
+    Returns:
+    - dict con frio_s y caliente_s (modo 'tiempo') o memoria_mb (modo 'memoria').
+    """
+    llamada = CASOS[nombre](Contexto())
+    if modo == 'memoria':
+        tracemalloc.start()
+        _finalizar(llamada())
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {'memoria_mb': round(pico / 2 ** 20, 2)}
+
+    inicio = time.perf_counter()
+    _finalizar(llamada())
+    frio = time.perf_counter() - inicio
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        _finalizar(llamada())
+        tiempos.append(time.perf_counter() - inicio)
+    return {'frio_s': round(frio, 4), 'caliente_s': round(min(tiempos), 4)}
+
+
+def _script_caso(nombre, modo, repeticiones, salida):
+    # Script que ejecuta AppTest: sus argumentos llegan por args
+    import json
+    from benchmarks.bench_offline import medir_llamadas
+
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(medir_llamadas(nombre, modo, repeticiones), f)
+
+
+def ejecutar_caso(nombre, base, modo, repeticiones):
+    """
+    Mide un caso en este proceso, trabajando en una copia de `base`. Las
+    llamadas se hacen dentro de una ejecucion de Streamlit (AppTest): fuera de
+    ella st.cache_resource nunca devuelve un acierto.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    origen = os.getcwd()
+    trabajo = tempfile.mkdtemp(prefix='bench_offline_')
+    try:
+        shutil.copytree(base, trabajo, dirs_exist_ok=True)
+        os.chdir(trabajo)
+        import fastf1
+        import matplotlib
+        matplotlib.use('Agg')
+        from modules.utils import configurar_cache
+
+        configurar_cache('cache')
+        fastf1.Cache.offline_mode(True)
+        fastf1.set_log_level('ERROR')
+        warnings.filterwarnings('ignore')
+
+        salida = os.path.join(trabajo, 'resultado.json')
+        app = AppTest.from_function(_script_caso, args=(nombre, modo, repeticiones, salida),
+                                    default_timeout=TIMEOUT_CASO_S)
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+        with open(salida, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.chdir(origen)
+        shutil.rmtree(trabajo, ignore_errors=True)
+
+
+def _medir_en_proceso(nombre, base, modo, repeticiones):
+    # Cada medicion en un interprete nuevo: importaciones y caches en frio
+    salida = subprocess.run([sys.executable, '-m', 'benchmarks.bench_offline', '--caso', nombre, '--modo', modo,
+                             '--base', base, '--repeticiones', str(repeticiones)],
+                            capture_output=True, text=True, cwd=os.getcwd())
+    for linea in reversed(salida.stdout.splitlines()):
+        if linea.startswith(_PREFIJO):
+            return json.loads(linea[len(_PREFIJO):])
+    error = (salida.stderr.strip().splitlines() or ['sin salida'])[-1]
+    return {'error': error}
+
+
+def medir_caso(nombre, base, repeticiones):
+    resultado = {}
+    for modo in ('tiempo', 'memoria'):
+        medicion = _medir_en_proceso(nombre, base, modo, repeticiones)
+        resultado.update(medicion)
+        if 'error' in medicion:
+            break
+    return resultado
+
+
+def comparar(resultados, referencia, tolerancia, minimo_s, minimo_mb):
+    # Regresiones: mas de `tolerancia` por encima de la referencia y por encima del minimo absoluto
+    regresiones = []
+    for nombre, medicion in resultados.items():
+        anterior = referencia.get(nombre)
+        if not anterior:
+            continue
+        for metrica, minimo in (('frio_s', minimo_s), ('caliente_s', minimo_s), ('memoria_mb', minimo_mb)):
+            if metrica not in medicion or metrica not in anterior:
+                continue
+            valor, base = medicion[metrica], anterior[metrica]
+            if valor > base * (1 + tolerancia) and valor - base > minimo:
+                regresiones.append(f"{nombre} {metrica}: {valor} frente a {base} de referencia")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--casos', nargs='+', help="Solo estos casos (por defecto todos)")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Casos en paralelo (mas rapido, pero los tiempos se ven afectados)")
+    parser.add_argument('--tolerancia', type=float, default=0.25, help="Aumento relativo permitido sobre la referencia")
+    parser.add_argument('--minimo-s', type=float, default=0.05, help="Diferencia minima en segundos para avisar")
+    parser.add_argument('--minimo-mb', type=float, default=5.0, help="Diferencia minima en MB para avisar")
+    parser.add_argument('--referencia', default=REFERENCIA)
+    parser.add_argument('--guardar-referencia', action='store_true')
+    parser.add_argument('--listar', action='store_true')
+    # Uso interno: medir un caso en este proceso
+    parser.add_argument('--caso', help=argparse.SUPPRESS)
+    parser.add_argument('--modo', choices=['tiempo', 'memoria'], default='tiempo', help=argparse.SUPPRESS)
+    parser.add_argument('--base', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.caso:
+        resultado = ejecutar_caso(args.caso, args.base, args.modo, args.repeticiones)
+        print(_PREFIJO + json.dumps(resultado), flush=True)
+        return
+
+    if args.listar:
+        for nombre in CASOS:
+            print(nombre)
+        for nombre, motivo in OMITIDOS.items():
+            print(f"{nombre} (omitido: {motivo})")
+        return
+
+    casos = args.casos or list(CASOS)
+    desconocidos = sorted(set(casos) - set(CASOS))
+    if desconocidos:
+        parser.error(f"casos desconocidos: {', '.join(desconocidos)}")
+
+    import pandas as pd
+
+    base = tempfile.mkdtemp(prefix='bench_offline_base_')
+    try:
+        preparar_base(base)
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            mediciones = dict(zip(casos, pool.map(lambda caso: medir_caso(caso, base, args.repeticiones), casos)))
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    tabla = pd.DataFrame.from_dict(mediciones, orient='index').reindex(
+        columns=['frio_s', 'caliente_s', 'memoria_mb', 'error'])
+    print(tabla.drop(columns='error' if tabla['error'].isna().all() else []).to_string(na_rep='-'))
+    print(f"{len(casos)} casos en {time.perf_counter() - inicio:.0f} s; omitidos sin red: {', '.join(OMITIDOS)}")
+
+    fallos = [f"{nombre}: {medicion['error']}" for nombre, medicion in mediciones.items() if 'error' in medicion]
+    sin_caso = funciones_sin_caso()
+    if sin_caso:
+        fallos.append(f"funciones publicas sin caso: {', '.join(sin_caso)}")
+
+    if args.guardar_referencia:
+        referencia = {}
+        if os.path.exists(args.referencia):
+            with open(args.referencia, encoding='utf-8') as f:
+                referencia = json.load(f)['casos']
+        referencia.update({nombre: medicion for nombre, medicion in mediciones.items() if 'error' not in medicion})
+        with open(args.referencia, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'repeticiones': args.repeticiones, 'casos': referencia},
+                      f, indent=2)
+            f.write('\n')
+        print(f"Referencia guardada en {args.referencia}")
+    elif os.path.exists(args.referencia):
+        with open(args.referencia, encoding='utf-8') as f:
+            referencia = json.load(f)['casos']
+        fallos += [f"regresion en {r}" for r in comparar(mediciones, referencia, args.tolerancia, args.minimo_s,
+                                                         args.minimo_mb)]
+
+    for fallo in fallos:
+        print(f"FALLO: {fallo}")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark del grafico de evolucion de posiciones: version anterior (pick_driver
+y una traza por piloto) frente al constructor de una sola pasada de
+modules.position_traces, con trazas por piloto, con un Scattergl por equipo y en
+la variante animada. Mide tiempo de construccion y tamaño del JSON enviado al navegador.
+
+Uso (desde la raiz del repositorio):
+    python -m benchmarks.bench_posiciones [--pilotos 20] [--vueltas 70] [--repeticiones 20]
+    python -m benchmarks.bench_posiciones --year 2024 --gp Bahrain
+
+Sin --year/--gp se usa una carrera sintetica (pilotos x vueltas), sin red ni cache.
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import fastf1
+import plotly.graph_objects as go
+from fastf1.core import Laps
+from modules.position_traces import SeriesPosiciones
+from modules.plotting import construir_figura_posiciones, construir_animacion_posiciones
+from modules.utils import configurar_cache
+
+COLORES = ['#3671C6', '#27F4D2', '#E8002D', '#FF8000', '#229971', '#0093CC', '#64C4FF', '#B6BABD',
+           '#52E252', '#6692FF']
+
+
+def _laps_sinteticas(n_pilotos, n_vueltas, semilla=0):
+    rng = np.random.default_rng(semilla)
+    pilotos = [f'D{i:02d}' for i in range(n_pilotos)]
+    # Cada vuelta es una permutacion de la anterior con algunos adelantamientos
+    orden = np.arange(n_pilotos)
+    filas = []
+    for vuelta in range(1, n_vueltas + 1):
+        for _ in range(rng.integers(0, 3)):
+            i = rng.integers(0, n_pilotos - 1)
+            orden[[i, i + 1]] = orden[[i + 1, i]]
+        for posicion, piloto in enumerate(orden, start=1):
+            filas.append((pilotos[piloto], str(piloto + 1), float(vuelta), float(posicion)))
+    return Laps(pd.DataFrame(filas, columns=['Driver', 'DriverNumber', 'LapNumber', 'Position'])), \
+        [str(i + 1) for i in range(n_pilotos)]
+
+
+def _posiciones_por_piloto(laps, drivers, estilos, titulo):
+    # Implementacion anterior, conservada solo como referencia para el benchmark
+    fig = go.Figure()
+    for drv in drivers:
+        drv_laps = laps.pick_driver(drv)
+        abb = drv_laps['Driver'].iloc[0]
+        color, dash = estilos[abb]
+        fig.add_trace(go.Scatter(x=drv_laps['LapNumber'], y=drv_laps['Position'],
+                                 mode='lines+markers', name=abb,
+                                 line=dict(color=color, dash=dash),
+                                 marker=dict(color=color, size=2)))
+    fig.update_layout(title=titulo, yaxis=dict(autorange="reversed"), template='plotly_white')
+    return fig
+
+
+def _medir(func, repeticiones):
+    resultado = func()
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        func()
+    return (time.perf_counter() - inicio) / repeticiones, len(resultado.to_json())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pilotos', type=int, default=20)
+    parser.add_argument('--vueltas', type=int, default=70)
+    parser.add_argument('--year', type=int)
+    parser.add_argument('--gp')
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.year and args.gp:
+        configurar_cache('cache')
+        session = fastf1.get_session(args.year, args.gp, 'R')
+        session.load(laps=True, telemetry=False, weather=False, messages=False)
+        laps, drivers = session.laps, session.drivers
+        etiqueta = f"{args.year} {session.event['EventName']}"
+    else:
+        laps, drivers = _laps_sinteticas(args.pilotos, args.vueltas)
+        etiqueta = f"sintetica {args.pilotos} pilotos x {args.vueltas} vueltas"
+
+    abreviaturas = dict(zip(laps['DriverNumber'], laps['Driver']))
+    orden = [abreviaturas[drv] for drv in drivers if drv in abreviaturas]
+    estilos = {abb: (COLORES[(i // 2) % len(COLORES)], 'solid' if i % 2 == 0 else 'dash') for i, abb in enumerate(orden)}
+    # Dos pilotos por equipo, como en la parrilla
+    equipos = {abb: f'Equipo {i // 2}' for i, abb in enumerate(orden)}
+    titulo = 'Evolución de las Posiciones'
+
+    casos = {
+        'por piloto (anterior)': lambda: _posiciones_por_piloto(laps, drivers, estilos, titulo),
+        'una pasada': lambda: construir_figura_posiciones(SeriesPosiciones.desde_vueltas(laps, orden),
+                                                          estilos, titulo),
+        'una pasada, Scattergl por equipo': lambda: construir_figura_posiciones(SeriesPosiciones.desde_vueltas(laps, orden),
+                                                                     estilos, titulo, una_traza=True,
+                                                                     equipos=equipos),
+        'animada': lambda: construir_animacion_posiciones(SeriesPosiciones.desde_vueltas(laps, orden),
+                                                          estilos, titulo),
+    }
+    filas = []
+    for nombre, func in casos.items():
+        segundos, tamano = _medir(func, args.repeticiones)
+        filas.append({'variante': nombre, 'construccion_ms': segundos * 1000, 'json_kb': tamano / 1024})
+    tabla = pd.DataFrame(filas)
+    tabla['speedup'] = tabla['construccion_ms'].iloc[0] / tabla['construccion_ms']
+    print(etiqueta)
+    print(tabla.round(2).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
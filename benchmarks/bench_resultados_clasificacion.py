@@ -0,0 +1,102 @@
+"""
+Benchmark del procesamiento de resultados de clasificacion: version fila a fila
+(apply + iterrows, como estaba en grafico_clasificacion) frente a la vectorizada
+de modules.results_processing, sobre todas las clasificaciones 2020-2024.
+
+Uso (desde la raiz del repositorio):
+    python -m benchmarks.bench_resultados_clasificacion [--years 2020 2021 ...] [--repeticiones 20]
+
+Las sesiones se leen de la cache de FastF1 en cache/; las que no esten en la
+cache se descargan (o se omiten si no hay red).
+"""
+import argparse
+import time
+from itertools import cycle
+import fastf1
+import pandas as pd
+import seaborn as sns
+from matplotlib.colors import to_hex
+from modules.plotting import get_best_qualifying_time
+from modules.results_processing import procesar_resultados_clasificacion
+from modules.utils import configurar_cache
+
+
+def _procesar_por_filas(results, session):
+    # Implementacion anterior, conservada solo como referencia para el benchmark
+    results = results.copy()
+    results['BestQualifyingTime'] = results.apply(get_best_qualifying_time, axis=1)
+    filtered_results = results.dropna(subset=['BestQualifyingTime'])
+    sorted_results = filtered_results.sort_values(by='BestQualifyingTime').reset_index(drop=True)
+    pole_time = sorted_results.iloc[0]['BestQualifyingTime']
+    sorted_results['TimeDelta'] = (sorted_results['BestQualifyingTime'] - pole_time).dt.total_seconds()
+    fallback_colors = cycle(sns.color_palette("tab20", n_colors=20))
+    team_colors_map = {}
+    for _, lap in sorted_results.iterrows():
+        team_name = lap['TeamName']
+        if team_name not in team_colors_map:
+            try:
+                color = fastf1.plotting.get_team_color(team_name, session)
+            except KeyError:
+                color = to_hex(next(fallback_colors))
+            while color in team_colors_map.values():
+                color = to_hex(next(fallback_colors))
+            team_colors_map[team_name] = color
+    team_colors = [team_colors_map[lap['TeamName']] for _, lap in sorted_results.iterrows()]
+    return sorted_results, team_colors
+
+
+def _tiene_tiempos(results):
+    return results[['Q1', 'Q2', 'Q3']].notna().any(axis=None)
+
+
+def _medir(func, repeticiones, *args):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        func(*args)
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, nargs='+', default=[2020, 2021, 2022, 2023, 2024])
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    configurar_cache('cache')
+    filas = []
+    for year in args.years:
+        try:
+            schedule = fastf1.get_event_schedule(year, include_testing=False)
+        except Exception as e:
+            print(f"{year}: no se pudo obtener el calendario ({e})")
+            continue
+        for _, event in schedule.iterrows():
+            try:
+                session = fastf1.get_session(year, event['EventName'], 'Q')
+                session.load(laps=False, telemetry=False, weather=False, messages=False)
+                results = session.results
+                if not _tiene_tiempos(results):
+                    continue
+            except Exception as e:
+                print(f"{year} {event['EventName']}: omitida ({e})")
+                continue
+            por_filas = _medir(_procesar_por_filas, args.repeticiones, results, session)
+            vectorizado = _medir(procesar_resultados_clasificacion, args.repeticiones, results, session)
+            filas.append({'year': year, 'gp': event['EventName'],
+                          'por_filas_ms': por_filas * 1000, 'vectorizado_ms': vectorizado * 1000})
+
+    if not filas:
+        print("No se ha podido medir ninguna sesion.")
+        return
+    tabla = pd.DataFrame(filas)
+    tabla['speedup'] = tabla['por_filas_ms'] / tabla['vectorizado_ms']
+    pd.set_option('display.width', 120)
+    print(tabla.round(3).to_string(index=False))
+    total_filas = tabla['por_filas_ms'].sum()
+    total_vec = tabla['vectorizado_ms'].sum()
+    print(f"\n{len(tabla)} sesiones | por filas: {total_filas:.1f} ms | vectorizado: {total_vec:.1f} ms "
+          f"| speedup total: {total_filas / total_vec:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark del almacen de telemetria compartido (modules.shared_telemetry): varios
+procesos, como los de Streamlit detras de un balanceador, piden a la vez la
+telemetria de la misma carrera con session_manager.asegurar_datos.
+
+Usa la carrera de Bahrein 2024 de la cache incluida en el repositorio, sin
+conexion y en un directorio temporal comun a todos los procesos. La cache no
+incluye telemetria, asi que la carga de FastF1 (Session._load_telemetry) genera
+la de benchmarks.bench_memoria_sesion, con el formato de FastF1.
+
+Por proceso se mide el tiempo hasta tener la telemetria y la memoria propia que
+retiene (tracemalloc, tras gc.collect; las paginas proyectadas del almacen no
+cuentan porque las comparten todos). Falla (codigo de salida 1) si la
+telemetria la carga con FastF1 mas de un proceso, o ninguno, o si algun proceso
+ve datos distintos.
+
+Uso (desde la raiz del repositorio):
+    python -m benchmarks.bench_telemetria_compartida [--procesos 4]
+"""
+import os
+import gc
+import sys
+import time
+import types
+import shutil
+import argparse
+import tempfile
+import warnings
+import tracemalloc
+import multiprocessing
+import pandas as pd
+
+from benchmarks.bench_offline import YEAR, GP, preparar_base
+
+
+def _cargar_telemetria_sintetica(session):
+    # Sustituye a Session._load_telemetry: fija t0_date y genera car y pos data
+    from benchmarks.bench_memoria_sesion import telemetria_fastf1
+
+    session._t0_date = pd.Timestamp(session.date).tz_localize(None) - session.session_start_time
+    session._car_data, session._pos_data = telemetria_fastf1(session)
+    session._laps['LapStartDate'] = session._laps['LapStartTime'] + session._t0_date
+
+
+def _proceso(trabajo, barrera, resultados):
+    import fastf1
+    from modules.utils import configurar_cache
+    from modules.session_manager import cargar_sesion, asegurar_datos, informe_carga
+    from modules.compact_session import telemetria_compacta
+
+    os.chdir(trabajo)
+    configurar_cache('cache')
+    fastf1.Cache.offline_mode(True)
+    fastf1.set_log_level('ERROR')
+    warnings.filterwarnings('ignore')
+
+    session = cargar_sesion(YEAR, GP, 'R')
+    session._load_telemetry = types.MethodType(_cargar_telemetria_sintetica, session)
+    tracemalloc.start()
+    gc.collect()
+    antes = tracemalloc.get_traced_memory()[0]
+    barrera.wait()
+
+    inicio = time.perf_counter()
+    asegurar_datos(session, 'telemetry')
+    car = telemetria_compacta(session, 'car')
+    # Se recorre toda la velocidad para que las paginas del almacen esten en memoria
+    suma = int(sum(car.tabla(numero)['Speed'].sum() for numero in car))
+    segundos = time.perf_counter() - inicio
+    gc.collect()
+    memoria = tracemalloc.get_traced_memory()[0] - antes
+    resultados.put({'pid': os.getpid(), 'cargada': int(informe_carga().loc['telemetry', 'parseos']),
+                    'segundos': segundos, 'memoria_mb': memoria / 2 ** 20, 'suma_velocidad': suma})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--procesos', type=int, default=4)
+    args = parser.parse_args()
+
+    origen = os.getcwd()
+    trabajo = tempfile.mkdtemp(prefix='bench_compartida_')
+    contexto = multiprocessing.get_context('spawn')
+    try:
+        preparar_base(trabajo)
+        barrera = contexto.Barrier(args.procesos)
+        resultados = contexto.Queue()
+        procesos = [contexto.Process(target=_proceso, args=(trabajo, barrera, resultados))
+                    for _ in range(args.procesos)]
+        for proceso in procesos:
+            proceso.start()
+        filas = [resultados.get() for _ in procesos]
+        for proceso in procesos:
+            proceso.join()
+    finally:
+        os.chdir(origen)
+        shutil.rmtree(trabajo, ignore_errors=True)
+
+    tabla = pd.DataFrame(filas).sort_values('segundos').set_index('pid')
+    print(f"{GP} {YEAR} carrera: telemetria pedida a la vez por {args.procesos} procesos")
+    print(tabla[['cargada', 'segundos', 'memoria_mb']].round(3).to_string())
+
+    fallos = []
+    if tabla['cargada'].sum() != 1:
+        fallos.append(f"la telemetria se ha cargado con FastF1 {tabla['cargada'].sum()} veces (deberia ser 1)")
+    if tabla['suma_velocidad'].nunique() != 1:
+        fallos.append("los procesos no ven la misma telemetria")
+    for fallo in fallos:
+        print(f"FALLO: {fallo}")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
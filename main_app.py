@@ -1,92 +1,78 @@
 import os
+import uuid
 import streamlit as st
-import fastf1
-import pandas as pd
 from datetime import datetime
-from modules.data_loading import cargar_datos_de_sesion, obtener_calendario, cargar_mapa_circuito
-from modules.plotting import (grafico_posiciones, grafico_tiempos_vuelta, grafico_clasificacion, 
-                              grafico_comparar_vueltas_en_mapa, grafico_comparar_desgaste, 
-                              mostrar_mapa_circuito, grafico_vel_media_equipo, grafico_evolucion_campeonato)
+from modules.data_loading import cargar_datos_de_sesion, cargar_tabla_sesion, cargar_mapa_circuito
+# Los graficos se importan la primera vez que se piden (ver modules.plotting)
+from modules import plotting
+from modules import instrumentation
 
+from modules.session_manager import informe_carga
+from modules.race_pace import ritmo_carrera, resumen_compuestos
+from modules.schedule_index import obtener_indice_calendario
+from modules.prefetch import precargar_evento
+from modules.track_geometry import cargar_geometria
+from modules.geocoding import obtener_coordenadas_circuito
+from modules.render_cache import renderizar_png
 from modules.utils import configurar_cache
-import requests
-from streamlit_globe import streamlit_globe
-import folium
-from streamlit_folium import st_folium
-
-
-from fastf1.ergast import Ergast
-import plotly.graph_objects as go
-
-def obtener_coordenadas_osm(query):
-    nominatim_url = "https://nominatim.openstreetmap.org/search"
-    parametros = {'q': query, 'format': 'json'}
-    response = requests.get(nominatim_url, params=parametros)
-    if response.status_code == 200:
-        resultados = response.json()
-        if resultados:
-            latitud = resultados[0]['lat']
-            longitud = resultados[0]['lon']
-            return (latitud, longitud)
-        else:
-            return None
-    else:
-        return None
-
-def obtener_coordenadas_circuito(ubicacion_evento, archivo_circuitos='data/circuitos_f1.csv'):
-    df_circuitos = pd.read_csv(archivo_circuitos)
-    ciudad, pais = ubicacion_evento.split(', ')
 
-    circuito_por_ciudad = df_circuitos[df_circuitos['NAME'].str.contains(ciudad, case=False)]
-    if not circuito_por_ciudad.empty:
-        return (circuito_por_ciudad.iloc[0]['LAT'], circuito_por_ciudad.iloc[0]['LNG'])
 
-    circuitos_en_pais = df_circuitos[df_circuitos['COUNTRY'].str.contains(pais, case=False)]
-    if len(circuitos_en_pais) == 1:
-        return (circuitos_en_pais.iloc[0]['LAT'], circuitos_en_pais.iloc[0]['LNG'])
-
-    return obtener_coordenadas_osm(ubicacion_evento)
 
 def mostrar_analisis():
     if f'mostrar_analisis_{analisis_seleccionado}' in st.session_state and st.session_state[f'mostrar_analisis_{analisis_seleccionado}']:
         if analisis_seleccionado == 'Qualy':
             session = cargar_datos_de_sesion(year, gp_selected, 'Q')
-            session.load(laps=True, telemetry=True, weather=True)
             if not session.laps.empty:
-                fig = grafico_clasificacion(session, year)
+                fig = plotting.grafico_clasificacion(session, year)
                 st.plotly_chart(fig)
                 
-                drivers = session.laps['Driver'].unique()
-                selected_drivers = st.multiselect('Selecciona dos pilotos para comparar', drivers, default=(drivers[:1], drivers[1:2]))
+                drivers = cargar_tabla_sesion(year, gp_selected, 'Q', 'laps', ['Driver'])['Driver'].unique()
+                # Solo se pueden comparar los pilotos con telemetría de su mejor vuelta
+                from modules.telemetry_alignment import alinear_telemetria
+                alineacion = alinear_telemetria(session)
+                if alineacion.omitidos:
+                    st.info("Sin telemetría de clasificación para comparar: "
+                            + ", ".join(f"{piloto} ({motivo})" for piloto, motivo in alineacion.omitidos.items()))
+                comparables = [piloto for piloto in drivers if piloto in alineacion.indice]
+                selected_drivers = st.multiselect('Selecciona dos pilotos para comparar', comparables, default=comparables[:2])
                 if len(selected_drivers) == 2:
-                    fig2, fig3 = grafico_comparar_vueltas_en_mapa(session, selected_drivers[0], selected_drivers[1])
-                    st.pyplot(fig2)
-                    st.pyplot(fig3)
+                    fig2, fig3 = renderizar_png(plotting.grafico_comparar_vueltas_en_mapa, session, selected_drivers[0], selected_drivers[1])
+                    st.image(fig2, use_column_width=True)
+                    st.image(fig3, use_column_width=True)
                 else:
                     st.warning("Por favor, selecciona dos pilotos.")
+
+                if st.checkbox("Comparar toda la parrilla"):
+                    st.plotly_chart(plotting.grafico_matriz_deltas(session))
+                    st.plotly_chart(plotting.grafico_velocidad_vuelta(session, list(drivers)))
+                    st.image(renderizar_png(plotting.grafico_dominancia_minisectores, session), use_column_width=True)
             else:
                 st.error("No se encontraron datos para esta sesión.")
         elif analisis_seleccionado == 'Carrera':
             session = cargar_datos_de_sesion(year, gp_selected, 'R')
-            session.load(laps=True, telemetry=True, weather=True)
             opcion_grafico = st.selectbox(
                 "Elige una opción de análisis:",
-                ('Evolución de las posiciones', 'Tiempos de vuelta','Velocidad en carrera'),
+                ('Evolución de las posiciones', 'Tiempos de vuelta','Velocidad en carrera', 'Ritmo y degradación'),
                 key="opcion_analisis_selectbox"
             )
             if opcion_grafico == 'Evolución de las posiciones':        
                 if not session.laps.empty:
-                    fig = grafico_posiciones(session, gp_selected, year)
+                    if st.checkbox("Animar vuelta a vuelta"):
+                        fig = plotting.grafico_posiciones_animado(session, gp_selected, year)
+                    else:
+                        # Una traza WebGL por equipo en lugar de una por piloto
+                        fig = plotting.grafico_posiciones(session, gp_selected, year,
+                                                 una_traza=st.checkbox("Modo WebGL (una traza por equipo)"))
                     st.plotly_chart(fig)
                 else:
                     st.error('No se encontraron datos para esta sesión.')
 
             elif opcion_grafico == 'Tiempos de vuelta':
                 if not session.laps.empty:
-                    drivers = session.laps['Driver'].unique()
+                    drivers = cargar_tabla_sesion(year, gp_selected, 'R', 'laps', ['Driver'])['Driver'].unique()
                     selected_drivers = st.multiselect('Selecciona pilotos para comparar', drivers, default=drivers[:1])
                     if selected_drivers:
-                        fig = grafico_tiempos_vuelta(session, year, selected_drivers)
+                        fig = plotting.grafico_tiempos_vuelta(session, year, selected_drivers)
                         st.plotly_chart(fig)
                     else:
                         st.warning("Por favor, selecciona al menos un piloto.")
@@ -95,12 +81,30 @@ def mostrar_analisis():
 
             elif opcion_grafico == 'Velocidad en carrera':
                 if not session.laps.empty:
-                    fig1, fig2 = grafico_comparar_desgaste(session, year)
-                    st.pyplot(fig1)
-                    st.pyplot(fig2)
+                    representacion = st.radio("Representación de las vueltas",
+                                              ('Dispersión (rápida)', 'Enjambre (seaborn)', 'Interactiva (Plotly)'),
+                                              horizontal=True)
+                    if representacion == 'Interactiva (Plotly)':
+                        fig1, fig2 = plotting.grafico_comparar_desgaste(session, year, renderizador='plotly')
+                        st.plotly_chart(fig1)
+                        st.plotly_chart(fig2)
+                    else:
+                        renderizador = 'swarm' if representacion == 'Enjambre (seaborn)' else 'jitter'
+                        fig1, fig2 = renderizar_png(plotting.grafico_comparar_desgaste, session, year, renderizador=renderizador)
+                        st.image(fig1, use_column_width=True)
+                        st.image(fig2, use_column_width=True)
 
-                    fig3 = grafico_vel_media_equipo(session)
-                    st.pyplot(fig3)
+                    fig3 = renderizar_png(plotting.grafico_vel_media_equipo, session)
+                    st.image(fig3, use_column_width=True)
+                else:
+                    st.error("No se encontraron datos para esta sesión.")
+
+            elif opcion_grafico == 'Ritmo y degradación':
+                if not session.laps.empty:
+                    st.plotly_chart(plotting.grafico_degradacion(session))
+                    tabla_ritmo = ritmo_carrera(session)
+                    st.dataframe(tabla_ritmo.round(3), hide_index=True)
+                    st.dataframe(resumen_compuestos(tabla_ritmo).round(3))
                 else:
                     st.error("No se encontraron datos para esta sesión.")
         else:
@@ -110,6 +114,23 @@ def mostrar_analisis():
 cache_dir = 'cache'
 configurar_cache(cache_dir)
 
+# Panel de depuración: tiempos (y memoria) de carga y de cada gráfico y aciertos de las
+# caches. Las medidas son del proceso, no de la sesión del usuario: el panel solo las
+# muestra (y puede activarlas), nunca las desactiva para el resto de usuarios ni lo
+# pedido con F1APP_INSTRUMENTACION. Se rellena al final del script para incluir los
+# tramos de esta ejecución
+panel_depuracion = None
+if st.sidebar.checkbox("Mostrar panel de instrumentación"):
+    if not instrumentation.activa():
+        if st.sidebar.button("Activar instrumentación del proceso"):
+            instrumentation.activar()
+    elif not instrumentation.midiendo_memoria():
+        if st.sidebar.button("Medir también la memoria (más lento)"):
+            instrumentation.activar(memoria=True)
+    if st.sidebar.button("Reiniciar medidas"):
+        instrumentation.reiniciar()
+    panel_depuracion = st.sidebar.container()
+
 st.title('Análisis de Fórmula 1')
 
 # Paso 1: Selección del año
@@ -120,19 +141,29 @@ default_year_index = years.index(current_year) if current_year in years else len
 year = st.selectbox('Año', years, index=default_year_index)
 
 # Paso 2: Selección del circuito
-schedule = obtener_calendario(year)
-gps_disponibles = schedule['EventName'].unique().tolist()
-gps_disponibles = [gp for gp in gps_disponibles if "Pre-Season" not in gp]
+# El indice del calendario (sin tests de pretemporada) se construye una vez por temporada
+calendario = obtener_indice_calendario(year)
+gps_disponibles = calendario.nombres
 gp_selected = st.selectbox('Gran Premio', gps_disponibles)
 
+# Precarga en segundo plano de la clasificación y la carrera del evento elegido;
+# al cambiar de evento se cancelan las precargas pendientes del anterior
+if 'id_precarga' not in st.session_state:
+    st.session_state['id_precarga'] = str(uuid.uuid4())
+precargar_evento(st.session_state['id_precarga'], year, gp_selected, calendario.fechas(gp_selected))
+
 # Obtén la ubicación del circuito seleccionado para mostrar en el mapa
-ubicacion_evento = schedule.loc[schedule['EventName'] == gp_selected, ['Location', 'Country']].apply(lambda x: f"{x['Location']}, {x['Country']}", axis=1).values[0]
-coordenadas = obtener_coordenadas_circuito(ubicacion_evento)
+ubicacion_evento = calendario.ubicacion(gp_selected)
+coordenadas = obtener_coordenadas_circuito(ubicacion_evento, gp_selected)
 
 # Información adicional del circuito
 if st.checkbox("Mostrar información adicional del circuito"):
     st.write(f"Ubicación: {ubicacion_evento}")
     if coordenadas:
+        # Componentes de mapa importados solo cuando se muestran
+        import folium
+        from streamlit_folium import st_folium
+        from streamlit_globe import streamlit_globe
         latitude = coordenadas[0]
         longitude = coordenadas[1]
         col1, col2 = st.columns(2)
@@ -150,82 +181,59 @@ if st.checkbox("Mostrar información adicional del circuito"):
         st.error('No se pudieron obtener las coordenadas del circuito seleccionado.')
         
     if os.path.exists("data/circuit_image/" + gp_selected + ".png"):
-        circuito = cargar_mapa_circuito("data/circuit_image/" + gp_selected + ".png")
-        st.pyplot(circuito)
+        circuito = renderizar_png(cargar_mapa_circuito, "data/circuit_image/" + gp_selected + ".png")
+        st.image(circuito, use_column_width=True)
     else:
-        for years in range(2024, 2018, -1):
-            funciona = False
-            try:
-                schedule = obtener_calendario(years)
-                if gp_selected in schedule['EventName'].unique():
-                    if os.path.exists("data/circuit_image/" + gp_selected + ".png"):
-                        circuito = cargar_mapa_circuito("data/circuit_image/" + gp_selected + ".png")
-                    else:
-                        session = cargar_datos_de_sesion(years, gp_selected, 'R')
-                        session.load(laps=True, telemetry=True, weather=True)
-                        lap = session.laps.pick_fastest()
-                        pos = lap.get_pos_data()
-                        circuit_info = session.get_circuit_info()
-                        circuito = mostrar_mapa_circuito(lap, pos, circuit_info, session.event['EventName'])
-                    st.pyplot(circuito)
-                    funciona = True
-            except Exception as e:
-                print(f"No se pudo cargar los datos para el año {years}: {e}")
-            if funciona:
-                break
+        # Mapa dibujado desde la geometría precalculada: nunca se carga telemetría aquí
+        geometria = cargar_geometria(gp_selected)
+        if geometria is not None:
+            st.image(renderizar_png(plotting.dibujar_mapa_circuito, geometria, gp_selected), use_column_width=True)
+        else:
+            st.info("No hay mapa precalculado para este circuito. "
+                    "Genéralo con: python -m modules.track_geometry --years " + " ".join(map(str, years[::-1])))
 
 
 if st.checkbox("Mostrar evolución del campeonato de pilotos"):
-    fig1, fig2, fig3 = grafico_evolucion_campeonato(year)
+    fig1, fig2, fig3 = plotting.grafico_evolucion_campeonato(year)
     
     if fig1 is not None and fig2 is not None and fig3 is not None:
         st.plotly_chart(fig1)
         st.plotly_chart(fig2)
         st.plotly_chart(fig3)
+
+        # Clasificación tras cualquier ronda, leída directamente del modelo ya calculado
+        from modules.championship import obtener_modelo_campeonato
+        modelo_campeonato, _ = obtener_modelo_campeonato(year)
+        ronda = st.select_slider("Clasificación tras la ronda", options=modelo_campeonato.rondas.tolist(),
+                                 value=int(modelo_campeonato.rondas[-1]),
+                                 format_func=lambda r: f"{r} - {modelo_campeonato.carreras[list(modelo_campeonato.rondas).index(r)]}")
+        col_pilotos, col_equipos = st.columns(2)
+        col_pilotos.dataframe(modelo_campeonato.clasificacion_tras_ronda(ronda, 'pilotos'))
+        col_equipos.dataframe(modelo_campeonato.clasificacion_tras_ronda(ronda, 'equipos'))
+
+if st.checkbox("Mostrar tendencias de ritmo de la temporada"):
+    # Resúmenes por evento guardados en cache/tendencias: solo el primer acceso carga las sesiones
+    col_sesion, col_metrica = st.columns(2)
+    tipo_tendencia = col_sesion.selectbox("Sesión", ('Q', 'R'), index=1,
+                                          format_func=lambda t: 'Clasificación' if t == 'Q' else 'Carrera')
+    metrica_tendencia = col_metrica.selectbox("Métrica", list(plotting.METRICAS),
+                                            format_func=plotting.METRICAS.get)
+    fig_tendencia, tabla_tendencia = plotting.grafico_tendencias_temporada(year, tipo_tendencia, metrica_tendencia)
+    if fig_tendencia is not None:
+        st.plotly_chart(fig_tendencia)
+        st.dataframe(tabla_tendencia.round(3))
+    else:
+        st.warning("No hay eventos disputados con datos para esta temporada.")
         
         
 if 'mostrar_analisis' not in st.session_state:
     st.session_state['mostrar_analisis'] = False
 
-event = fastf1.get_event(year, gp_selected)
-event_date = event.get_session_date('FP1', utc=True)
-
-fechas = None
-
-if event['EventFormat'] == 'conventional':
-    prac1_date = event.get_session_date('FP1', utc=True)
-    prac2_date = event.get_session_date('FP2', utc=True)
-    prac3_date = event.get_session_date('FP3', utc=True)
-    qualy_date = event.get_session_date('Q', utc=True)
-    race_date = event.get_session_date('R', utc=True)
-    fechas = {'FP1': prac1_date, 'FP2': prac2_date, 'FP3': prac3_date, 'Qualy': qualy_date, 'Carrera': race_date}
-
-elif event['EventFormat'] == 'sprint':
-    prac1_date = event.get_session_date('FP1', utc=True)
-    qualy_date = event.get_session_date('Q', utc=True)
-    prac2_date = event.get_session_date('FP2', utc=True)
-    sprint_date = event.get_session_date('S', utc=True)
-    race_date = event.get_session_date('R', utc=True)
-    fechas = {'FP1': prac1_date, 'Qualy': qualy_date, 'FP2': prac2_date, 'Sprint': sprint_date, 'Carrera': race_date}
-
-elif event['EventFormat'] == 'sprint-shootout':
-    prac1_date = event.get_session_date('FP1', utc=True)
-    qualy_date = event.get_session_date('Q', utc=True)
-    sprint_shootout_date = event.get_session_date('SS', utc=True)
-    sprint_date = event.get_session_date('S', utc=True)
-    race_date = event.get_session_date('R', utc=True)
-    fechas = {'FP1': prac1_date, 'Qualy': qualy_date, 'Sprint Shootout': sprint_shootout_date, 'Sprint': sprint_date, 'Carrera': race_date}
-
-elif event['EventFormat'] == 'sprint_qualifying':
-    prac1_date = event.get_session_date('FP1', utc=True)
-    sprint_qualy_date = event.get_session_date('SQ', utc=True)
-    sprint_date = event.get_session_date('S', utc=True)
-    qualy_date = event.get_session_date('Q', utc=True)
-    race_date = event.get_session_date('R', utc=True)
-    fechas = {'FP1': prac1_date, 'Sprint Qualy': sprint_qualy_date, 'Sprint': sprint_date, 'Qualy': qualy_date, 'Carrera': race_date}
-else:
+# Fechas (UTC) de las sesiones del evento en orden de disputa, leídas del indice
+fechas = calendario.fechas(gp_selected)
+if fechas is None:
     st.write("No se ha encontrado el formato del evento")
-    st.write(event['EventFormat'])
+    st.write(calendario.formato(gp_selected))
 
 if fechas:
     current_time = datetime.now()
@@ -244,4 +252,22 @@ if fechas:
 
     mostrar_analisis()
 else:
-    st.write("No se ha definido 'fechas'. Verifica el formato del evento.")
\ No newline at end of file
+    st.write("No se ha definido 'fechas'. Verifica el formato del evento.")
+
+if st.sidebar.checkbox("Mostrar informe de carga de datos"):
+    # Peticiones y parseos por categoria: en un rerun los parseos no deben crecer
+    st.sidebar.dataframe(informe_carga())
+
+if panel_depuracion is not None:
+    with panel_depuracion:
+        st.caption("Tramos (s)")
+        st.dataframe(instrumentation.resumen_tramos())
+        st.caption("Caches")
+        st.dataframe(instrumentation.resumen_contadores())
+        st.download_button("Exportar JSONL", '\n'.join(instrumentation.lineas_jsonl()) + '\n',
+                           file_name='instrumentacion.jsonl', mime='application/jsonl')
+
+if instrumentation.RUTA_JSONL and instrumentation.activa():
+    # Exportacion continua para el sistema de metricas: cada tramo se escribe una sola vez
+    # y el panel de depuracion de las demas sesiones conserva lo medido
+    instrumentation.exportar_jsonl(instrumentation.RUTA_JSONL, incremental=True)
@@ -0,0 +1,289 @@
+import os
+import difflib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import fastf1.ergast.interface
+from fastf1.ergast import Ergast
+from modules.instrumentation import medir
+
+# Almacen persistente de resultados del campeonato por (temporada, ronda).
+# Las rondas ya disputadas y guardadas nunca se vuelven a pedir a Ergast.
+DIRECTORIO_CAMPEONATO = os.path.join('cache', 'campeonato')
+MAX_PETICIONES_CONCURRENTES = 4
+COLUMNAS = ['round', 'race', 'driverCode', 'constructorName', 'points']
+
+# Permite apuntar a un servidor local que sirva JSON con el formato de Ergast
+# (por ejemplo para pruebas sin red): F1APP_ERGAST_URL=http://127.0.0.1:8000/api/f1
+if os.environ.get('F1APP_ERGAST_URL'):
+    fastf1.ergast.interface.BASE_URL = os.environ['F1APP_ERGAST_URL'].rstrip('/')
+
+_lock = threading.Lock()
+
+
+def configurar_ergast(url):
+    fastf1.ergast.interface.BASE_URL = url.rstrip('/')
+
+
+def _ruta(year, nombre, directorio):
+    return os.path.join(directorio, f'{year}_{nombre}.parquet')
+
+
+def _escribir_atomico(df, ruta):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, ruta)
+
+
+def obtener_carreras(year, directorio=DIRECTORIO_CAMPEONATO):
+    """
+    Calendario de la temporada (round, race, raceDate), guardado tras la primera consulta.
+    """
+    ruta = _ruta(year, 'carreras', directorio)
+    if os.path.exists(ruta):
+        return pd.read_parquet(ruta)
+    races = Ergast().get_race_schedule(year)
+    carreras = pd.DataFrame({
+        'round': races['round'].astype(int),
+        'race': races['raceName'].str.removesuffix(' Grand Prix'),
+        'raceDate': pd.to_datetime(races['raceDate']),
+    })
+    _escribir_atomico(carreras, ruta)
+    return carreras
+
+
+def _leer_resultados(ruta):
+    if os.path.exists(ruta):
+        return pd.read_parquet(ruta)
+    return pd.DataFrame(columns=COLUMNAS)
+
+
+def _resultados_ronda(year, ronda, race):
+    # Resultados de una ronda (carrera + sprint) con el mismo tratamiento que
+    # hacia grafico_evolucion_campeonato. Devuelve (DataFrame o None, aviso o None).
+    ergast = Ergast()
+    temp = ergast.get_race_results(season=year, round=ronda)
+    if not temp.content:
+        return None, None
+    temp = temp.content[0]
+    # Verificar los nombres de las columnas y eliminar espacios en blanco
+    temp.columns = temp.columns.str.strip()
+
+    # Si hay un sprint, también obtén los resultados del sprint
+    sprint = ergast.get_sprint_results(season=year, round=ronda)
+    if sprint.content and sprint.description['round'][0] == ronda:
+        temp = pd.merge(temp, sprint.content[0], on='driverCode', how='left', suffixes=('', '_sprint'))
+        # Suma los puntos de la carrera y del sprint, si existen
+        if 'points_sprint' in temp.columns:
+            temp['points'] = temp['points'] + temp['points_sprint'].fillna(0)
+        temp.drop(columns=[col for col in temp.columns if col.endswith('_sprint')], inplace=True)
+
+    aviso = None
+    if 'constructorName' not in temp.columns:
+        aviso = (f"La columna 'constructorName' no está disponible después de procesar la carrera {race}. "
+                 "Se omitirá esta carrera en el análisis del campeonato de equipos.")
+        temp['constructorName'] = None
+
+    temp['round'] = ronda
+    temp['race'] = race
+    return temp[COLUMNAS], aviso
+
+
+def _resultados_ronda_o_error(year, ronda, race):
+    # Un error en una ronda no descarta las demas: se devuelve como aviso y la
+    # ronda, al no guardarse, se vuelve a pedir en la siguiente llamada
+    try:
+        return _resultados_ronda(year, ronda, race)
+    except Exception as e:
+        return None, f"No se han podido obtener los resultados de la ronda {ronda} ({race}): {e}"
+
+
+@medir()
+def obtener_resultados_campeonato(year, max_workers=MAX_PETICIONES_CONCURRENTES, directorio=DIRECTORIO_CAMPEONATO):
+    """
+    Devuelve los resultados por ronda de la temporada, pidiendo a Ergast solo las
+    rondas ya disputadas que aun no esten en el almacen, en paralelo.
+
+    Parameters:
+    - year: Temporada.
+    - max_workers: Numero maximo de peticiones simultaneas.
+
+    Returns:
+    - carreras: DataFrame con round, race y raceDate de toda la temporada.
+    - resultados: DataFrame con round, race, driverCode, constructorName y points.
+    - avisos: Lista de avisos generados al procesar las rondas nuevas, incluidas
+      las que no se han podido obtener (se reintentan en la siguiente llamada).
+    """
+    carreras = obtener_carreras(year, directorio)
+    ruta = _ruta(year, 'resultados', directorio)
+    # El cerrojo solo protege el archivo: las peticiones a Ergast se hacen sin
+    # el, para no bloquear a las demas llamadas mientras dura la red
+    with _lock:
+        resultados = _leer_resultados(ruta)
+
+    hoy = pd.Timestamp.now().normalize()
+    guardadas = set(resultados['round'].unique())
+    pendientes = carreras[(~carreras['round'].isin(guardadas)) & (carreras['raceDate'] <= hoy)]
+
+    avisos = []
+    if not pendientes.empty:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pendientes))) as pool:
+            nuevos = list(pool.map(_resultados_ronda_o_error, [year] * len(pendientes),
+                                   pendientes['round'], pendientes['race']))
+        nuevos_df = [df for df, _ in nuevos if df is not None]
+        avisos = [aviso for _, aviso in nuevos if aviso]
+        if nuevos_df:
+            with _lock:
+                # Se relee el archivo: otra llamada puede haber guardado rondas
+                # mientras tanto, y las que ya estan no se duplican
+                resultados = _leer_resultados(ruta)
+                guardadas = set(resultados['round'].unique())
+                nuevos_df = [df for df in nuevos_df if df['round'].iloc[0] not in guardadas]
+                if nuevos_df:
+                    partes = nuevos_df if resultados.empty else [resultados, *nuevos_df]
+                    resultados = pd.concat(partes, ignore_index=True)
+                    resultados = resultados.sort_values(by='round', kind='stable').reset_index(drop=True)
+                    _escribir_atomico(resultados, ruta)
+    return carreras, resultados, avisos
+
+
+class ModeloCampeonato:
+    """
+    Modelo materializado de la clasificacion de una temporada: puntos por ronda y
+    acumulados de pilotos y equipos en arrays de NumPy, actualizables de forma
+    incremental cuando llega una ronda nueva.
+
+    - rondas: numeros de ronda disputados, (R,).
+    - carreras: nombre de cada ronda.
+    - pilotos / equipos: etiquetas de las filas.
+    - puntos_pilotos / acumulado_pilotos: (pilotos, R).
+    - puntos_equipos / acumulado_equipos: (equipos, R).
+    - equipos_canonicos: tabla nombre de constructor -> nombre canonico de equipo.
+    """
+
+    def __init__(self, equipos_referencia=()):
+        self.equipos_referencia = list(equipos_referencia)
+        self.equipos_canonicos = {}
+        self.rondas = np.empty(0, dtype=int)
+        self.carreras = []
+        self.pilotos = []
+        self.equipos = []
+        self.puntos_pilotos = np.zeros((0, 0))
+        self.acumulado_pilotos = np.zeros((0, 0))
+        self.puntos_equipos = np.zeros((0, 0))
+        self.acumulado_equipos = np.zeros((0, 0))
+
+    def canonizar_equipo(self, nombre):
+        # Cada nombre de constructor se resuelve una sola vez contra los equipos de referencia
+        if nombre is None or pd.isna(nombre):
+            return None
+        if nombre not in self.equipos_canonicos:
+            coincidencia = difflib.get_close_matches(nombre, self.equipos_referencia, n=1, cutoff=0.6)
+            self.equipos_canonicos[nombre] = coincidencia[0] if coincidencia else nombre
+        return self.equipos_canonicos[nombre]
+
+    @staticmethod
+    def _extender(etiquetas, puntos, acumulado, nuevos):
+        # nuevos: DataFrame etiqueta x ronda con los puntos de las rondas nuevas
+        existentes = set(etiquetas)
+        filas = list(etiquetas) + [e for e in nuevos.index if e not in existentes]
+        n_nuevas = len(filas) - len(etiquetas)
+        puntos = np.vstack([puntos, np.zeros((n_nuevas, puntos.shape[1]))])
+        acumulado = np.vstack([acumulado, np.zeros((n_nuevas, acumulado.shape[1]))])
+        bloque = nuevos.reindex(index=filas, fill_value=0).to_numpy(dtype=float)
+        base = acumulado[:, -1:] if acumulado.shape[1] else np.zeros((len(filas), 1))
+        return filas, np.hstack([puntos, bloque]), np.hstack([acumulado, base + np.cumsum(bloque, axis=1)])
+
+    def actualizar(self, resultados, carreras):
+        """
+        Incorpora las rondas de `resultados` que aun no esten en el modelo.
+
+        Returns:
+        - True si se ha añadido alguna ronda.
+        """
+        nuevas = resultados[~resultados['round'].isin(self.rondas)]
+        if nuevas.empty:
+            return False
+        nuevas = nuevas.copy()
+        nuevas['constructorName'] = [self.canonizar_equipo(nombre) for nombre in nuevas['constructorName']]
+        rondas = np.sort(nuevas['round'].unique())
+
+        pilotos = nuevas.pivot_table(index='driverCode', columns='round', values='points', aggfunc='sum')
+        pilotos = pilotos.reindex(columns=rondas).fillna(0)
+        equipos = nuevas.dropna(subset=['constructorName'])
+        equipos = equipos.pivot_table(index='constructorName', columns='round', values='points', aggfunc='sum')
+        equipos = equipos.reindex(columns=rondas).fillna(0)
+
+        self.pilotos, self.puntos_pilotos, self.acumulado_pilotos = self._extender(
+            self.pilotos, self.puntos_pilotos, self.acumulado_pilotos, pilotos)
+        self.equipos, self.puntos_equipos, self.acumulado_equipos = self._extender(
+            self.equipos, self.puntos_equipos, self.acumulado_equipos, equipos)
+        nombres = dict(zip(carreras['round'], carreras['race']))
+        tardias = len(self.rondas) and rondas.min() < self.rondas.max()
+        self.rondas = np.concatenate([self.rondas, rondas])
+        self.carreras = self.carreras + [nombres.get(rnd, str(rnd)) for rnd in rondas]
+        if tardias:
+            # Una ronda sin resultados en consultas anteriores puede llegar despues de
+            # otras posteriores: se coloca en su sitio y se recalculan los acumulados
+            orden = np.argsort(self.rondas, kind='stable')
+            self.rondas = self.rondas[orden]
+            self.carreras = [self.carreras[i] for i in orden]
+            self.puntos_pilotos = self.puntos_pilotos[:, orden]
+            self.acumulado_pilotos = np.cumsum(self.puntos_pilotos, axis=1)
+            self.puntos_equipos = self.puntos_equipos[:, orden]
+            self.acumulado_equipos = np.cumsum(self.puntos_equipos, axis=1)
+        return True
+
+    def _indice_ronda(self, ronda):
+        posiciones = np.flatnonzero(self.rondas <= ronda)
+        if not len(posiciones):
+            raise ValueError(f"No hay resultados hasta la ronda {ronda}")
+        return posiciones[-1]
+
+    def clasificacion_tras_ronda(self, ronda, tipo='pilotos'):
+        """
+        Clasificacion (puntos acumulados) tras la ronda indicada, sin recalcular nada.
+        """
+        if tipo == 'pilotos':
+            etiquetas, acumulado = self.pilotos, self.acumulado_pilotos
+        elif tipo == 'equipos':
+            etiquetas, acumulado = self.equipos, self.acumulado_equipos
+        else:
+            raise ValueError("tipo debe ser 'pilotos' o 'equipos'")
+        columna = acumulado[:, self._indice_ronda(ronda)]
+        return pd.Series(columna, index=etiquetas, name='points').sort_values(ascending=False, kind='stable')
+
+    def orden(self, tipo='pilotos'):
+        # Indices de las filas ordenadas por puntos totales (mayor a menor)
+        acumulado = self.acumulado_pilotos if tipo == 'pilotos' else self.acumulado_equipos
+        if not acumulado.shape[1]:
+            return np.arange(acumulado.shape[0])
+        return np.argsort(-acumulado[:, -1], kind='stable')
+
+
+_modelos = {}
+
+
+@medir()
+def obtener_modelo_campeonato(year, equipos_referencia=None, directorio=DIRECTORIO_CAMPEONATO):
+    """
+    Devuelve el modelo de la temporada, creandolo la primera vez y añadiendo solo
+    las rondas nuevas en las llamadas siguientes. Si se pasan equipos de
+    referencia distintos a los del modelo existente, se reconstruye; con None se
+    reutiliza el modelo que ya haya en memoria.
+
+    Returns:
+    - modelo: ModeloCampeonato.
+    - avisos: Lista de avisos generados al procesar las rondas nuevas.
+    """
+    carreras, resultados, avisos = obtener_resultados_campeonato(year, directorio=directorio)
+    with _lock:
+        modelo = _modelos.get(year)
+        if modelo is None or (equipos_referencia is not None
+                              and list(equipos_referencia) != modelo.equipos_referencia):
+            modelo = ModeloCampeonato(equipos_referencia or ())
+            _modelos[year] = modelo
+        modelo.actualizar(resultados, carreras)
+    return modelo, avisos
@@ -0,0 +1,239 @@
+"""
+Representacion compacta de las vueltas y la telemetria de una sesion.
+
+FastF1 guarda cada canal en float64 o int64, los textos como object y los
+tiempos como timedelta64, y en la telemetria repite el instante de cada muestra
+en Date, SessionTime y Time. Las tablas compactas tienen:
+- los tiempos en segundos ya calculados (columna '<nombre>(s)', float64, que
+  conserva el nanosegundo) en lugar de los timedelta;
+- los canales enteros (velocidad, RPM, marcha, acelerador, DRS, coordenadas...)
+  en int16 si caben (int32 si no) y el resto de numeros en float32;
+- los textos (piloto, equipo, compuesto, Source, Status) como categorias;
+- en la telemetria, sin Date ni Time cuando se deducen de SessionTime.
+
+La telemetria compacta sustituye a session.car_data y session.pos_data (ver
+TelemetriaCompacta), asi que la original se libera y la API de FastF1
+(lap.get_car_data(), ...) sigue funcionando. Los graficos leen las tablas
+compactas con vueltas_compactas() y telemetria_vuelta(), sin convertir ni
+copiar columnas.
+"""
+import weakref
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+from fastf1.core import Telemetry
+from modules.instrumentation import medir, contar_cache
+
+SUFIJO_SEGUNDOS = '(s)'
+TIPOS_TELEMETRIA = {'car': '_car_data', 'pos': '_pos_data'}
+
+_vueltas = weakref.WeakKeyDictionary()
+
+
+def columna_segundos(columna):
+    return f'{columna}{SUFIJO_SEGUNDOS}'
+
+
+def segundos(datos, columna):
+    """
+    Segundos de una columna de tiempo de una tabla o una fila: la columna
+    precalculada si es compacta o, si no, la conversion del timedelta.
+    """
+    compacta = columna_segundos(columna)
+    if compacta in datos:
+        return datos[compacta]
+    valor = datos[columna]
+    if isinstance(valor, pd.Series):
+        return valor.dt.total_seconds()
+    return pd.Timedelta(valor).total_seconds()
+
+
+def _entero(valores):
+    # Menor tipo entero (int16 o int32) en el que caben los valores, o None
+    if len(valores) == 0:
+        return np.int16
+    for tipo in (np.int16, np.int32):
+        limites = np.iinfo(tipo)
+        if valores.min() >= limites.min and valores.max() <= limites.max:
+            return tipo
+    return None
+
+
+def _compactar_columna(serie):
+    # (nombre, valores) de la columna en la tabla compacta
+    if pd.api.types.is_timedelta64_dtype(serie.dtype):
+        return columna_segundos(serie.name), serie.dt.total_seconds().to_numpy()
+    if pd.api.types.is_bool_dtype(serie.dtype):
+        return serie.name, serie.to_numpy()
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        valores = serie.to_numpy()
+        tipo = _entero(valores)
+        return serie.name, valores if tipo is None else valores.astype(tipo)
+    if pd.api.types.is_float_dtype(serie.dtype):
+        valores = serie.to_numpy()
+        # Sin NaN y sin decimales (los canales de FastF1 son enteros guardados como float)
+        if not np.isnan(valores).any() and np.array_equal(valores, np.round(valores)):
+            tipo = _entero(valores)
+            if tipo is not None:
+                return serie.name, valores.astype(tipo)
+        return serie.name, valores.astype(np.float32)
+    if serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty'):
+        return serie.name, pd.Categorical(serie)
+    return serie.name, serie.to_numpy()
+
+
+def compactar_tabla(df, descartar=()):
+    """
+    Version compacta de un DataFrame (ver el docstring del modulo). Mantiene el
+    indice; las columnas `descartar` no se copian.
+    """
+    columnas = dict(_compactar_columna(serie) for nombre, serie in df.items() if nombre not in descartar)
+    return pd.DataFrame(columnas, index=df.index)
+
+
+def _a_timedelta(segundos_float):
+    # Inversa exacta de total_seconds() para tiempos de sesion (float64 conserva el ns)
+    return pd.to_timedelta(np.round(segundos_float * 1e9).astype('int64'), unit='ns')
+
+
+class TelemetriaCompacta(Mapping):
+    """
+    car_data o pos_data de una sesion por numero de piloto, en tablas compactas.
+
+    Sustituye al dict de FastF1: session.car_data['1'] (y con ello
+    lap.get_car_data()) reconstruye la Telemetry del piloto con sus tipos
+    originales, sin guardarla. tabla(numero) devuelve la tabla compacta.
+    """
+
+    def __init__(self, session, datos):
+        self._session = weakref.ref(session)
+        self._tablas = {}
+        self._tipos = {}
+        # Instante de referencia de la telemetria (FastF1 lo fija al cargarla)
+        t0 = getattr(session, '_t0_date', None)
+        for numero, tel in datos.items():
+            descartar = []
+            if 'SessionTime' in tel:
+                # Date y Time solo se descartan si se pueden reconstruir exactamente
+                if 'Time' in tel and tel['Time'].equals(tel['SessionTime']):
+                    descartar.append('Time')
+                if 'Date' in tel and t0 is not None and (tel['Date'] - tel['SessionTime']).eq(t0).all():
+                    descartar.append('Date')
+            self._tablas[numero] = compactar_tabla(tel.reset_index(drop=True), descartar)
+            self._tipos[numero] = tel.dtypes.to_dict()
+
+    @classmethod
+    def desde_tablas(cls, session, tablas, tipos):
+        # Con tablas ya compactas (p. ej. abiertas de modules.shared_telemetry) y
+        # los tipos originales de cada piloto
+        compacta = cls(session, {})
+        compacta._tablas = dict(tablas)
+        compacta._tipos = dict(tipos)
+        return compacta
+
+    def tabla(self, numero):
+        return self._tablas[numero]
+
+    def tipos_originales(self, numero):
+        return self._tipos[numero]
+
+    def __getitem__(self, numero):
+        tabla = self._tablas[numero]
+        session = self._session()
+        sesion = None
+        datos = {}
+        for columna, tipo in self._tipos[numero].items():
+            if columna in tabla:
+                datos[columna] = tabla[columna].astype(tipo)
+                continue
+            if sesion is None:
+                sesion = _a_timedelta(tabla[columna_segundos('SessionTime')].to_numpy())
+            if columna == 'Date':
+                datos[columna] = session.t0_date + sesion
+            elif columna == 'Time':
+                datos[columna] = sesion
+            else:
+                datos[columna] = _a_timedelta(tabla[columna_segundos(columna)].to_numpy())
+        return Telemetry(datos, session=session, driver=numero)
+
+    def __iter__(self):
+        return iter(self._tablas)
+
+    def __len__(self):
+        return len(self._tablas)
+
+    def memoria(self):
+        # Bytes de las tablas compactas
+        return sum(int(tabla.memory_usage(index=True).sum()) for tabla in self._tablas.values())
+
+
+@medir()
+def compactar_telemetria(session):
+    """
+    Sustituye car_data y pos_data de la sesion (si estan cargadas y aun no son
+    compactas) por TelemetriaCompacta; la telemetria original se libera.
+    """
+    for atributo in TIPOS_TELEMETRIA.values():
+        datos = getattr(session, atributo, None)
+        if datos and not isinstance(datos, TelemetriaCompacta):
+            setattr(session, atributo, TelemetriaCompacta(session, datos))
+    return session
+
+
+def telemetria_compacta(session, tipo='car'):
+    """
+    TelemetriaCompacta de car ('car') o pos data ('pos') de una sesion con la
+    telemetria cargada, compactandola si aun no lo estaba.
+    """
+    atributo = TIPOS_TELEMETRIA[tipo]
+    compacta = isinstance(getattr(session, atributo, None), TelemetriaCompacta)
+    contar_cache('telemetria_compacta', compacta)
+    if not compacta:
+        compactar_telemetria(session)
+    datos = getattr(session, atributo, None)
+    if not datos:
+        raise ValueError(f"La sesion no tiene telemetria ({tipo}) cargada")
+    return datos
+
+
+def telemetria_vuelta(session, lap, tipo='car'):
+    """
+    Muestras de car o pos data de una vuelta, como lap.get_car_data() (entre
+    LapStartTime y Time, ambos incluidos) pero sin reconstruir la telemetria:
+    las columnas son vistas de la tabla compacta del piloto.
+
+    Parameters:
+    - lap: Vuelta de FastF1 o fila de vueltas_compactas().
+
+    Returns:
+    - muestras: filas de la vuelta de la tabla compacta.
+    - tiempo: segundos desde el inicio de la vuelta de cada muestra (float64).
+    """
+    tabla = telemetria_compacta(session, tipo).tabla(str(lap['DriverNumber']))
+    inicio, fin = segundos(lap, 'LapStartTime'), segundos(lap, 'Time')
+    sesion = tabla[columna_segundos('SessionTime')].to_numpy()
+    desde, hasta = np.searchsorted(sesion, inicio, side='left'), np.searchsorted(sesion, fin, side='right')
+    return tabla.iloc[desde:hasta], sesion[desde:hasta] - inicio
+
+
+def distancia_vuelta(velocidad, tiempo):
+    """
+    Distancia (m) recorrida en cada muestra integrando la velocidad (km/h), como
+    add_distance() de FastF1 con el tiempo desde el inicio de la vuelta.
+    """
+    dt = np.diff(tiempo, prepend=0.0)
+    return np.cumsum(np.asarray(velocidad, dtype=float) / 3.6 * dt)
+
+
+def vueltas_compactas(session):
+    """
+    Tabla compacta de session.laps (mismo indice), calculada una vez por sesion
+    y de nuevo solo si FastF1 vuelve a procesar las vueltas.
+    """
+    laps = session.laps
+    guardada = _vueltas.get(session)
+    contar_cache('vueltas_compactas', guardada is not None and guardada[0]() is laps)
+    if guardada is None or guardada[0]() is not laps:
+        guardada = (weakref.ref(laps), compactar_tabla(laps))
+        _vueltas[session] = guardada
+    return guardada[1]
@@ -1,24 +1,59 @@
-from fastf1 import get_session
-from fastf1 import get_event_schedule
+import threading
 import streamlit as st
-import pickle
-from PIL import Image
-import matplotlib.pyplot as plt
+from modules import session_store
+from modules.session_manager import cargar_sesion
+from modules.schedule_index import obtener_indice_calendario
+from modules.prefetch import sesion_precargada, CATEGORIAS_PRECARGA
+from modules.instrumentation import medir, contar_cache
 
-@st.cache_data
+# Numero maximo de sesiones completas que se mantienen en memoria por proceso
+MAX_SESIONES_EN_MEMORIA = 4
+
+# Marca si la ultima llamada del hilo ha tenido que cargar la sesion (fallo de cache)
+_local = threading.local()
+
+# cache_resource guarda el objeto tal cual (sin serializarlo ni hashearlo en
+# cada acierto) y max_entries acota la memoria aunque se visiten muchas sesiones
+@st.cache_resource(max_entries=MAX_SESIONES_EN_MEMORIA)
+def _sesion_en_memoria(year, gp, session_type):
+    _local.fallo = True
+    # Si la sesion se estaba precargando en segundo plano se reutiliza (esperando
+    # a que termine) en lugar de cargarla otra vez
+    precargada = sesion_precargada(year, gp, session_type)
+    if precargada is not None:
+        return precargada
+    # Solo vueltas y mensajes, del almacen columnar si la sesion ya esta guardada
+    # (sin Session.load); la telemetria y el tiempo se cargan de forma incremental
+    # cuando un grafico los declara con requiere_datos
+    return cargar_sesion(year, gp, session_type, categorias=CATEGORIAS_PRECARGA, desde_almacen=True)
+
+@medir()
 def cargar_datos_de_sesion(year, gp, session_type):
-    session = get_session(year, gp, session_type)
-    session.load(telemetry=True, weather=False)
+    # Sesion de FastF1 compartida por todas las ejecuciones de la app en este proceso.
+    # En un proceso nuevo se rellena desde el almacen columnar si ya esta guardada
+    _local.fallo = False
+    session = _sesion_en_memoria(year, gp, session_type)
+    contar_cache('sesiones_en_memoria', not _local.fallo)
     return session
 
-def obtener_calendario(year):
-    return get_event_schedule(year)
-
-def guardar_datos_mapa(lap, pos, circuit_info, filepath):
-    with open(filepath, 'wb') as f:
-        pickle.dump((lap, pos, circuit_info), f)
+@medir()
+def cargar_tabla_sesion(year, gp, session_type, tabla, columnas=None):
+    """
+    Devuelve una tabla de la sesion ('laps', 'results' o 'ritmo') desde el almacen columnar,
+    leyendo solo las columnas pedidas. Si la sesion aun no esta almacenada se carga
+    una vez con FastF1 y se persiste.
+    """
+    almacenada = session_store.sesion_almacenada(year, gp, session_type)
+    contar_cache('almacen_columnar', almacenada)
+    if not almacenada:
+        cargar_datos_de_sesion(year, gp, session_type)
+    return session_store.leer_tabla(year, gp, session_type, tabla, columnas)
 
+def obtener_calendario(year):
+    # Eventos de la temporada desde el indice persistente (sin parsear el calendario de FastF1)
+    return obtener_indice_calendario(year).eventos
 
+@medir()
 def cargar_mapa_circuito(filepath):
     """
     Loads and returns a matplotlib figure object from an image file.
@@ -29,6 +64,10 @@ def cargar_mapa_circuito(filepath):
     Returns:
     - fig: A matplotlib figure object containing the loaded image.
     """
+    # Solo al mostrar el mapa: matplotlib.pyplot y PIL pesan en el arranque de la app
+    from PIL import Image
+    import matplotlib.pyplot as plt
+
     img = Image.open(filepath)
     fig, ax = plt.subplots()
     ax.imshow(img)
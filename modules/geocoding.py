@@ -0,0 +1,174 @@
+import os
+import json
+import threading
+import unicodedata
+import functools
+import requests
+import pandas as pd
+from modules.instrumentation import contar_cache
+from modules.utils import cerrojo_archivo
+
+ARCHIVO_CIRCUITOS = os.path.join('data', 'circuitos_f1.csv')
+# Cache persistente de geocodificacion: cada consulta va a la red como mucho una vez
+ARCHIVO_CACHE_GEOCODIFICACION = os.path.join('cache', 'geocodificacion.json')
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+TIMEOUT_GEOCODIFICACION = float(os.environ.get('F1APP_GEOCODING_TIMEOUT', 5))
+
+_lock = threading.Lock()
+
+
+def _normalizar(texto):
+    # Minusculas, sin acentos y con espacios simples: "São Paulo" -> "sao paulo"
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(''.join(c if c.isalnum() else ' ' for c in texto.lower()).split())
+
+
+class IndiceCircuitos:
+    """
+    Indice en memoria de data/circuitos_f1.csv. Las busquedas resueltas se
+    memorizan por ubicacion normalizada y por nombre de evento.
+    """
+
+    def __init__(self, archivo_circuitos=ARCHIVO_CIRCUITOS):
+        df = pd.read_csv(archivo_circuitos)
+        self.nombres = [_normalizar(nombre) for nombre in df['NAME']]
+        self.coordenadas = list(zip(df['LAT'], df['LNG']))
+        self.por_pais = {}
+        for pais, coordenadas in zip(df['COUNTRY'], self.coordenadas):
+            self.por_pais.setdefault(_normalizar(pais), []).append(coordenadas)
+        self.por_ubicacion = {}
+        self.por_evento = {}
+
+    def buscar_local(self, ciudad, pais):
+        # Mismo criterio que la busqueda original en el CSV: primero un circuito
+        # cuyo nombre contenga la ciudad y, si no, el unico circuito del pais
+        ciudad_n, pais_n = _normalizar(ciudad), _normalizar(pais)
+        if ciudad_n:
+            for nombre, coordenadas in zip(self.nombres, self.coordenadas):
+                if ciudad_n in nombre:
+                    return coordenadas
+        en_pais = [c for clave, lista in self.por_pais.items() if pais_n and pais_n in clave for c in lista]
+        if len(en_pais) == 1:
+            return en_pais[0]
+        return None
+
+    def primer_circuito_del_pais(self, pais):
+        pais_n = _normalizar(pais)
+        for clave, lista in self.por_pais.items():
+            if pais_n and pais_n in clave:
+                return lista[0]
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def cargar_indice(archivo_circuitos=ARCHIVO_CIRCUITOS):
+    # Se construye una sola vez por proceso
+    return IndiceCircuitos(archivo_circuitos)
+
+
+def _leer_cache_disco(archivo):
+    if os.path.exists(archivo):
+        with open(archivo, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+@functools.lru_cache(maxsize=None)
+def _cache_disco(archivo):
+    # Copia del proceso; se completa con lo que guardan los demas procesos
+    return _leer_cache_disco(archivo)
+
+
+def _guardar_cache_disco(query, coordenadas, archivo):
+    """
+    Añade una consulta a la cache persistente. El archivo se vuelve a leer y se
+    mezcla bajo un cerrojo entre procesos antes de reemplazarlo, para no perder
+    lo que otro proceso haya guardado desde que se leyo.
+    """
+    cache = _cache_disco(archivo)
+    with _lock, cerrojo_archivo(f'{archivo}.lock'):
+        en_disco = _leer_cache_disco(archivo)
+        en_disco[query] = list(coordenadas) if coordenadas else None
+        tmp = f"{archivo}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(en_disco, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, archivo)
+        cache.update(en_disco)
+
+
+def _geocodificar(query, timeout):
+    # Coordenadas o None. Solo se guarda en la cache una respuesta valida de
+    # Nominatim, con o sin resultados (no un fallo de red, un error HTTP o un
+    # cuerpo que no es JSON)
+    archivo = ARCHIVO_CACHE_GEOCODIFICACION
+    cache = _cache_disco(archivo)
+    if query not in cache:
+        # Quiza ya la ha resuelto otro proceso
+        with _lock:
+            cache.update(_leer_cache_disco(archivo))
+    contar_cache('geocodificacion', query in cache)
+    if query in cache:
+        return tuple(cache[query]) if cache[query] else None
+
+    parametros = {'q': query, 'format': 'json'}
+    try:
+        response = requests.get(NOMINATIM_URL, params=parametros, timeout=timeout,
+                                headers={'User-Agent': 'F1-Data-App'})
+    except requests.RequestException:
+        # Fallo de red: no se guarda para poder reintentar en otra sesion
+        return None
+    if response.status_code != 200:
+        return None
+    try:
+        resultados = response.json()
+    except ValueError:
+        # Una pagina de error o de limite de uso con estado 200
+        return None
+    if not isinstance(resultados, list):
+        return None
+    coordenadas = (resultados[0]['lat'], resultados[0]['lon']) if resultados else None
+
+    _guardar_cache_disco(query, coordenadas, archivo)
+    return coordenadas
+
+
+def obtener_coordenadas_osm(query, timeout=TIMEOUT_GEOCODIFICACION):
+    """
+    Geocodifica una consulta con Nominatim usando la cache persistente.
+
+    Returns:
+    - (latitud, longitud), o None si Nominatim no encuentra la consulta o no responde.
+    """
+    return _geocodificar(query, timeout)
+
+
+def obtener_coordenadas_circuito(ubicacion_evento, nombre_evento=None, archivo_circuitos=ARCHIVO_CIRCUITOS,
+                                 timeout=TIMEOUT_GEOCODIFICACION):
+    """
+    Coordenadas del circuito de un evento a partir de su ubicacion "Ciudad, País".
+
+    Se busca en el indice local y, si no esta, en Nominatim (con cache persistente).
+    Si Nominatim no lo encuentra o no responde se usa como aproximacion el primer
+    circuito del pais en el CSV, sin memorizarla: solo se memorizan las
+    coordenadas encontradas, y si la red fallo la siguiente llamada vuelve a
+    consultar Nominatim.
+    """
+    indice = cargar_indice(archivo_circuitos)
+    if nombre_evento is not None and nombre_evento in indice.por_evento:
+        return indice.por_evento[nombre_evento]
+    clave = _normalizar(ubicacion_evento)
+    if clave in indice.por_ubicacion:
+        return indice.por_ubicacion[clave]
+
+    ciudad, _, pais = ubicacion_evento.partition(', ')
+    coordenadas = indice.buscar_local(ciudad, pais)
+    if coordenadas is None:
+        coordenadas = _geocodificar(ubicacion_evento, timeout)
+    if coordenadas is None:
+        return indice.primer_circuito_del_pais(pais)
+
+    indice.por_ubicacion[clave] = coordenadas
+    if nombre_evento is not None:
+        indice.por_evento[nombre_evento] = coordenadas
+    return coordenadas
@@ -0,0 +1,290 @@
+"""
+Graficos de Plotly de una sesion: evolucion de posiciones, tiempos de vuelta,
+velocidad en la vuelta rapida, clasificacion y degradacion por stint.
+"""
+import numpy as np
+import pandas as pd
+import fastf1.plotting
+import plotly.graph_objects as go
+from colour import Color
+from fastf1.core import Laps
+from modules.utils import clase_traza, reducir_serie, ticks_tiempo, MAX_PUNTOS_SERIE
+from modules.session_manager import requiere_datos
+from modules.results_processing import procesar_resultados_clasificacion
+from modules.styles import registro_estilos
+from modules.race_pace import ritmo_carrera
+from modules.position_traces import SeriesPosiciones
+from modules.compact_session import vueltas_compactas, telemetria_vuelta, distancia_vuelta
+
+# Símbolo del marcador que sustituye al estilo de línea en las trazas por equipo, con
+# el código numérico de Plotly (circle, diamond, x, square) para no repetir cadenas por punto
+SIMBOLOS_LINEA = {'solid': 0, 'dash': 2, 'dot': 4, 'dashdot': 1}
+
+def ajustar_tonalidad_color(color_hex, ajuste_luminosidad=0.05):
+    # Convertir hex a color
+    color = Color(color_hex)
+    
+    # Ajustar la luminosidad
+    luminosidad_ajustada = max(min(color.luminance + ajuste_luminosidad, 1), 0)  # Asegurar que está en el rango [0, 1]
+    color.luminance = luminosidad_ajustada
+    
+    return color.hex_l
+
+def _series_posiciones(session):
+    # Pilotos en el orden de session.drivers y todas sus posiciones en una sola pasada
+    abreviaturas = dict(zip(session.laps['DriverNumber'], session.laps['Driver']))
+    orden = [abreviaturas[drv] for drv in session.drivers if drv in abreviaturas]
+    return SeriesPosiciones.desde_vueltas(session.laps, orden)
+
+def _layout_posiciones(fig, titulo):
+    # Configura el layout del gráfico
+    fig.update_layout(title=titulo,
+                    xaxis_title='Número de Vuelta',
+                    yaxis_title='Posición',
+                    yaxis=dict(autorange="reversed"),  # Invierte el eje Y para que la posición 1 esté arriba
+                    legend_title='Piloto',
+                    template='plotly_white')
+    return fig
+
+def construir_figura_posiciones(serie, estilos, titulo, una_traza=False, equipos=None):
+    """
+    Figura de evolución de posiciones a partir de arrays ya calculados.
+
+    Parameters:
+    - serie: SeriesPosiciones de la sesión.
+    - estilos: dict piloto -> (color, dash).
+    - titulo: Título del gráfico.
+    - una_traza: Si es True se dibuja un Scattergl por equipo en lugar de uno por
+      piloto, con el color de su primer piloto. El estilo de línea no puede variar
+      dentro de una traza: los compañeros se distinguen por el símbolo del
+      marcador (SIMBOLOS_LINEA) y por una etiqueta al final.
+    - equipos: dict piloto -> equipo para agrupar las trazas con una_traza. Los
+      pilotos sin equipo conocido van en su propia traza.
+    """
+    fig = go.Figure()
+    if una_traza:
+        equipos = equipos or {}
+        grupos = {}
+        for i, piloto in enumerate(serie.pilotos):
+            grupos.setdefault(equipos.get(piloto) or ('piloto', piloto), []).append(i)
+        for filas in grupos.values():
+            color = estilos[serie.pilotos[filas[0]]][0]
+            x, y, pilotos = serie.arrays_concatenados(filas)
+            simbolos = np.repeat([SIMBOLOS_LINEA.get(estilos[serie.pilotos[i]][1], 0) for i in filas],
+                                 len(x) // len(filas))
+            fig.add_trace(go.Scattergl(x=x, y=y, mode='lines+markers', customdata=pilotos,
+                                       name=' / '.join(serie.pilotos[i] for i in filas),
+                                       line=dict(color=color, width=1.5),
+                                       marker=dict(color=color, symbol=simbolos, size=5),
+                                       hovertemplate='%{customdata} - Vuelta %{x}: P%{y}<extra></extra>'))
+        etiquetas = [dict(x=vueltas[-1], y=posiciones[-1], text=piloto, showarrow=False, xanchor='left', xshift=4,
+                          font=dict(color=estilos[piloto][0], size=10))
+                     for piloto, vueltas, posiciones in serie.trazas() if len(vueltas)]
+        fig.update_layout(annotations=etiquetas)
+        return _layout_posiciones(fig, titulo)
+
+    for piloto, vueltas, posiciones in serie.trazas():
+        color, dash = estilos[piloto]
+        # Añade una línea al gráfico por cada piloto, ajustando el tamaño de los marcadores
+        fig.add_trace(go.Scatter(x=vueltas, y=posiciones,
+                            mode='lines+markers',
+                            name=piloto,
+                            line=dict(color=color, dash=dash),
+                            marker=dict(color=color, size=2)))  # Ajusta el tamaño aquí
+    return _layout_posiciones(fig, titulo)
+
+def construir_animacion_posiciones(serie, estilos, titulo):
+    """
+    Evolución de posiciones animada vuelta a vuelta: las líneas completas quedan
+    de fondo y cada fotograma solo mueve una traza de marcadores con la columna
+    de la vuelta correspondiente, sin recalcular datos.
+    """
+    fig = construir_figura_posiciones(serie, estilos, titulo)
+    fig.update_traces(opacity=0.25, showlegend=False)
+    colores = [estilos[piloto][0] for piloto in serie.pilotos]
+    fig.add_trace(go.Scatter(x=np.full(len(serie.pilotos), serie.vueltas[0]), y=serie.posiciones[:, 0],
+                             mode='markers+text', text=serie.pilotos, textposition='middle right',
+                             marker=dict(color=colores, size=10), showlegend=False))
+    indice = len(fig.data) - 1
+    nombres = [f'{vuelta:g}' for vuelta in serie.vueltas]
+    # Fotogramas como diccionarios: evita validar una traza de Plotly por vuelta
+    fig.frames = [dict(name=nombre, traces=[indice],
+                       data=[dict(type='scatter', x=np.full(len(serie.pilotos), vuelta), y=columna)])
+                  for nombre, vuelta, columna in zip(nombres, serie.vueltas, serie.posiciones.T)]
+
+    paso = dict(frame=dict(duration=150, redraw=False), mode='immediate', transition=dict(duration=0))
+    fig.update_layout(
+        xaxis=dict(range=[serie.vueltas.min() - 1, serie.vueltas.max() + 3]),
+        yaxis=dict(autorange=False, range=[len(serie.pilotos) + 0.5, 0.5]),
+        updatemenus=[dict(type='buttons', showactive=False, x=0, y=-0.15, xanchor='left',
+                          buttons=[dict(label='▶', method='animate', args=[None, dict(paso, fromcurrent=True)]),
+                                   dict(label='⏸', method='animate', args=[[None], paso])])],
+        sliders=[dict(x=0.1, len=0.9, y=-0.1, currentvalue=dict(prefix='Vuelta '),
+                      steps=[dict(label=nombre, method='animate', args=[[nombre], paso]) for nombre in nombres])])
+    return fig
+
+@requiere_datos('laps')
+def grafico_posiciones(session, gp_selected, year, una_traza=False):
+    serie = _series_posiciones(session)
+    registro = registro_estilos(session)
+    return construir_figura_posiciones(serie, registro.estilos_pilotos(serie.pilotos),
+                                       f'Evolución de las Posiciones - {gp_selected} {year}', una_traza=una_traza,
+                                       equipos=registro.equipos_pilotos(serie.pilotos))
+
+@requiere_datos('laps')
+def grafico_posiciones_animado(session, gp_selected, year):
+    serie = _series_posiciones(session)
+    estilos = registro_estilos(session).estilos_pilotos(serie.pilotos)
+    return construir_animacion_posiciones(serie, estilos, f'Evolución de las Posiciones - {gp_selected} {year}')
+
+def format_func(value, tick_number):
+        minutes = int(value // 60)
+        seconds = int(value % 60)
+        return f"{minutes}:{seconds:02d}"
+    
+@requiere_datos('laps')
+def grafico_tiempos_vuelta(session, year, selected_drivers):
+    fig = go.Figure()
+    # Vueltas de todos los pilotos seleccionados en una sola selección; pick_quicklaps
+    # por piloto equivale a filtrar con el 107% de la vuelta más rápida de cada uno
+    # Se leen de la tabla compacta de vueltas, con los tiempos ya en segundos
+    vueltas = vueltas_compactas(session)
+    laps = vueltas[vueltas['Driver'].isin(selected_drivers)]
+    mejor = laps.groupby('Driver', observed=True)['LapTime(s)'].transform('min')
+    laps = laps[laps['LapTime(s)'] < mejor * Laps.QUICKLAP_THRESHOLD]
+    segundos = laps['LapTime(s)']
+
+    # Con muchos puntos (p. ej. toda la parrilla) se dibuja con WebGL y los
+    # marcadores de neumático van en una traza por compuesto en lugar de una por piloto
+    Traza = clase_traza(2 * len(laps))
+    webgl = Traza is go.Scattergl
+    estilos = registro_estilos(session)
+
+    for selected_driver in selected_drivers:
+        driver_laps = laps['Driver'] == selected_driver
+        if not driver_laps.any():
+            continue
+        # Color y estilo de línea del piloto desde el registro de la sesión
+        piloto_color, dash = estilos.estilo_piloto(selected_driver)
+
+        # Añadir la línea que une todas las vueltas del piloto con color específico
+        fig.add_trace(Traza(x=laps['LapNumber'][driver_laps], y=segundos[driver_laps],
+                            mode='lines',
+                            name=f'{selected_driver} Line',
+                            line=dict(color=piloto_color, dash=dash),
+                            legendgroup=selected_driver))
+        if webgl:
+            continue
+        # Superponer marcadores coloreados por compuesto de neumático
+        for compound, group_data in laps[driver_laps].groupby('Compound', observed=True):
+            color = fastf1.plotting.COMPOUND_COLORS.get(compound, '#FFFFFF')
+            fig.add_trace(go.Scatter(x=group_data['LapNumber'], y=segundos[group_data.index],
+                                     mode='markers',
+                                     name=f'{selected_driver} {compound}',
+                                     marker=dict(color=color, size=6, line=dict(color="white", width=0.5)),
+                                     legendgroup=selected_driver))
+    if webgl:
+        for compound, group_data in laps.groupby('Compound', observed=True):
+            color = fastf1.plotting.COMPOUND_COLORS.get(compound, '#FFFFFF')
+            fig.add_trace(Traza(x=group_data['LapNumber'], y=segundos[group_data.index],
+                                mode='markers', name=compound, customdata=group_data['Driver'],
+                                hovertemplate='%{customdata} - Vuelta %{x}: %{y:.3f} s',
+                                marker=dict(color=color, size=6, line=dict(color="white", width=0.5))))
+
+    # Ticks en min:seg con un paso que depende del rango de tiempos mostrado
+    tickvals, ticktext = ticks_tiempo(segundos.min(), segundos.max())
+    # Personalizar layout del gráfico
+    fig.update_layout(title='Comparación de Tiempos de Vuelta por Piloto y Tipo de Neumático',
+                      xaxis_title='Número de Vuelta',
+                      yaxis=dict(title='Tiempo de Vuelta (min:seg)', tickvals=tickvals, ticktext=ticktext),
+                      legend_title='Piloto y Neumático',
+                      template='plotly_white')
+    return fig
+
+@requiere_datos('laps', 'telemetry')
+def grafico_velocidad_vuelta(session, pilotos, max_puntos=MAX_PUNTOS_SERIE):
+    """
+    Velocidad a lo largo de la vuelta más rápida de cada piloto. Cada serie de
+    telemetría se reduce con LTTB a max_puntos y la figura pasa a WebGL cuando
+    el total de puntos supera el umbral.
+    """
+    series = []
+    for piloto in pilotos:
+        lap = session.laps.pick_driver(piloto).pick_fastest()
+        if lap is None or pd.isna(lap['LapTime']):
+            continue
+        # Muestras de la telemetria compacta, sin reconstruir la de FastF1
+        car, tiempo = telemetria_vuelta(session, lap, 'car')
+        velocidad = car['Speed'].to_numpy()
+        series.append((piloto, *reducir_serie(distancia_vuelta(velocidad, tiempo), velocidad, max_puntos)))
+
+    Traza = clase_traza(sum(len(x) for _, x, _ in series))
+    estilos = registro_estilos(session)
+    fig = go.Figure()
+    for piloto, distancia, velocidad in series:
+        color = estilos.color_piloto(piloto)
+        fig.add_trace(Traza(x=distancia, y=velocidad, mode='lines', name=piloto, line=dict(color=color)))
+    fig.update_layout(title='Velocidad en la vuelta más rápida',
+                      xaxis_title='Distancia (m)',
+                      yaxis_title='Velocidad (km/h)',
+                      legend_title='Piloto',
+                      template='plotly_white')
+    return fig
+
+def get_best_qualifying_time(row):
+    # Esta función busca el mejor tiempo de clasificación priorizando Q3, luego Q2 y finalmente Q1.
+    for q in ['Q3', 'Q2', 'Q1']:
+        if pd.notna(row[q]):
+            return row[q]
+    return pd.NaT
+@requiere_datos('laps', 'messages')
+def grafico_clasificacion(session, year):
+    # Mejor tiempo, delta a la pole y color de equipo para toda la tabla de una vez
+    sorted_results = procesar_resultados_clasificacion(session.results, session)
+    team_colors = sorted_results['ColorEquipo'].tolist()
+    
+    # Construye el gráfico
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=sorted_results['Abbreviation'],
+        x=sorted_results['TimeDelta'],
+        orientation='h',
+        marker=dict(color=team_colors)
+    ))
+    # Personaliza el layout
+    fig.update_layout(
+        title=f"{session.event['EventName']} {session.event.year} Qualifying Comparison",
+        xaxis_title="Time Delta (s) from Pole",
+        yaxis=dict(autorange="reversed"),
+        template="plotly_white"
+    )
+    return fig
+
+@requiere_datos('laps')
+def grafico_degradacion(session):
+    """
+    Degradación (s/vuelta, corregida por combustible) de cada stint, agrupada por
+    piloto en orden de llegada y coloreada por compuesto.
+    """
+    tabla = ritmo_carrera(session)
+    orden = {abv: i for i, abv in enumerate(session.results['Abbreviation'])}
+    # Driver y Compound son categorias (vienen de la tabla compacta de vueltas)
+    pilotos = tabla['Driver'].astype(str)
+    tabla = tabla.assign(_orden=pilotos.map(orden).fillna(len(orden)))
+    tabla = tabla.sort_values(['_orden', 'Stint'], kind='stable')
+    etiquetas = pilotos[tabla.index] + ' S' + tabla['Stint'].astype(int).astype(str)
+
+    fig = go.Figure()
+    for compound, grupo in tabla.groupby('Compound', sort=False, observed=True):
+        fig.add_trace(go.Bar(x=etiquetas[grupo.index], y=grupo['Degradacion'], name=compound,
+                             marker_color=fastf1.plotting.COMPOUND_COLORS.get(compound, '#FFFFFF'),
+                             marker_line=dict(color='grey', width=0.5),
+                             customdata=grupo[['Vueltas', 'RitmoMedio', 'R2']].to_numpy(),
+                             hovertemplate='%{x}: %{y:.3f} s/vuelta<br>Vueltas: %{customdata[0]}'
+                                           '<br>Ritmo medio: %{customdata[1]:.3f} s<br>R²: %{customdata[2]:.2f}'))
+    fig.update_layout(title='Degradación por stint (corregida por combustible)',
+                      xaxis=dict(title='Piloto y stint', categoryorder='array', categoryarray=etiquetas.tolist()),
+                      yaxis_title='Degradación (s/vuelta)',
+                      legend_title='Neumático',
+                      template='plotly_white')
+    return fig
@@ -0,0 +1,35 @@
+"""
+Mapa del circuito con la numeracion de las curvas.
+"""
+import fastf1.plotting
+import matplotlib.pyplot as plt
+from modules.track_geometry import calcular_geometria, guardar_geometria
+
+fastf1.plotting.setup_mpl(mpl_timedelta_support=False, misc_mpl_mods=False)
+
+def dibujar_mapa_circuito(geometria, name):
+    # Dibuja el mapa a partir de la geometría precalculada (ver modules.track_geometry)
+    fig, ax = plt.subplots()
+    rotated_track = geometria['pista']
+    ax.plot(rotated_track[:, 0], rotated_track[:, 1])
+    for (track_x, track_y), (text_x, text_y), txt in zip(geometria['curvas_pista'], geometria['curvas_texto'],
+                                                         geometria['etiquetas']):
+        # Draw a circle next to the track.
+        ax.scatter(text_x, text_y, color='grey', s=140)
+        # Draw a line from the track to this circle.
+        ax.plot([track_x, text_x], [track_y, text_y], color='grey')
+        # Finally, print the corner number inside the circle.
+        ax.text(text_x, text_y, txt,
+                va='center_baseline', ha='center', size='small', color='white')
+    plt.title(name + ' Circuit')
+    plt.xticks([])
+    plt.yticks([])
+    plt.axis('equal')
+    return fig
+
+def mostrar_mapa_circuito(lap, pos, circuit_info, name):
+    geometria = calcular_geometria(pos, circuit_info)
+    guardar_geometria(name, geometria)
+    fig = dibujar_mapa_circuito(geometria, name)
+    plt.savefig('data/circuit_image/'+name + '.png')
+    return fig
@@ -0,0 +1,147 @@
+"""
+Distribuciones de tiempos de vuelta: violines por piloto con los puntos de cada
+vuelta (seaborn, NumPy o Plotly) y cajas por equipo desde el resumen de ritmo.
+"""
+import numpy as np
+import fastf1.plotting
+import matplotlib.pyplot as plt
+import seaborn as sns
+import plotly.graph_objects as go
+from fastf1.core import Laps
+from modules.utils import desplazamientos_enjambre
+from modules.session_manager import requiere_datos
+from modules.styles import registro_estilos
+from modules.pace_summary import resumen_sesion, estadisticas_caja
+from modules.instrumentation import tramo
+from modules.compact_session import vueltas_compactas
+
+fastf1.plotting.setup_mpl(mpl_timedelta_support=False, misc_mpl_mods=False)
+
+# Formas de dibujar los puntos de grafico_comparar_desgaste:
+# - 'swarm': sns.swarmplot (coste cuadratico en puntos por piloto).
+# - 'jitter': enjambre aproximado calculado con NumPy (utils.desplazamientos_enjambre).
+# - 'plotly': violines interactivos de Plotly con el mismo enjambre.
+RENDERIZADORES_DESGASTE = ('swarm', 'jitter', 'plotly')
+ORDEN_COMPUESTOS = ["SOFT", "MEDIUM", "HARD"]
+
+def _vueltas_distribucion(session, pilotos):
+    # Vueltas rápidas (como pick_quicklaps) de los pilotos indicados, leídas de la
+    # tabla compacta: LapTime(s) ya está en segundos y no se añade ninguna columna
+    vueltas = vueltas_compactas(session)
+    vueltas = vueltas[vueltas['Driver'].isin(pilotos)]
+    return vueltas[vueltas['LapTime(s)'] < vueltas['LapTime(s)'].min() * Laps.QUICKLAP_THRESHOLD]
+
+def _posiciones_enjambre(driver_laps, pilotos, diametro, paso):
+    # Posición x de cada vuelta: índice del piloto más el desplazamiento del enjambre
+    codigos = driver_laps['Driver'].map({abv: i for i, abv in enumerate(pilotos)}).to_numpy(dtype=float)
+    return codigos + desplazamientos_enjambre(codigos, driver_laps['LapTime(s)'].to_numpy(), diametro, paso)
+
+def _grafico_distribucion_vueltas(session, pilotos, driver_colors, titulo=None, renderizador='jitter'):
+    driver_laps = _vueltas_distribucion(session, pilotos)
+    if renderizador == 'plotly':
+        return _grafico_distribucion_plotly(driver_laps, pilotos, driver_colors, titulo)
+
+    # Creación de la figura
+    fig, ax = plt.subplots(figsize=(10, 5))
+    # Gráfico de violin para mostrar las distribuciones de los tiempos de vuelta
+    with tramo('seaborn.violinplot'):
+        sns.violinplot(data=driver_laps, x="Driver", y="LapTime(s)", hue="Driver", hue_order=pilotos,
+                       inner=None, palette=driver_colors, order=pilotos, ax=ax)
+    if renderizador == 'swarm':
+        # Gráfico de swarm para mostrar los tiempos de vuelta individuales, diferenciados por compuesto de neumático
+        with tramo('seaborn.swarmplot'):
+            sns.swarmplot(data=driver_laps, x="Driver", y="LapTime(s)",
+                          hue="Compound", palette=fastf1.plotting.COMPOUND_COLORS,
+                          hue_order=ORDEN_COMPUESTOS,
+                          order=pilotos, edgecolor='white', linewidth=0.5, size=4, ax=ax)
+    else:
+        # Mismo aspecto que el swarm: diametro del marcador (4 pt) pasado a unidades de los ejes
+        ymin, ymax = ax.get_ylim()
+        alto, ancho = ax.bbox.height * 72 / fig.dpi, ax.bbox.width * 72 / fig.dpi
+        diametro = 4 * (ymax - ymin) / alto
+        paso = 4 * len(pilotos) / ancho
+        x = _posiciones_enjambre(driver_laps, pilotos, diametro, paso)
+        colores = driver_laps['Compound'].astype(object).map(fastf1.plotting.COMPOUND_COLORS).fillna('#FFFFFF')
+        ax.scatter(x, driver_laps['LapTime(s)'], c=colores.tolist(), s=16, edgecolors='white', linewidths=0.5,
+                   zorder=3)
+        presentes = [c for c in ORDEN_COMPUESTOS if c in set(driver_laps['Compound'])]
+        ax.legend(handles=[plt.Line2D([], [], marker='o', linestyle='', markersize=4,
+                                      markerfacecolor=fastf1.plotting.COMPOUND_COLORS[c],
+                                      markeredgecolor='white', label=c) for c in presentes],
+                  title='Compound')
+    # Ajustes estéticos del gráfico
+    ax.set_xlabel("Driver")
+    ax.set_ylabel("Lap Time (s)")
+    if titulo:
+        fig.suptitle(titulo)
+    # Mejora de la estética con despine
+    sns.despine(ax=ax, left=True, bottom=True)
+    fig.tight_layout()
+    return fig
+
+def _grafico_distribucion_plotly(driver_laps, pilotos, driver_colors, titulo=None):
+    fig = go.Figure()
+    for i, abv in enumerate(pilotos):
+        tiempos = driver_laps.loc[driver_laps['Driver'] == abv, 'LapTime(s)']
+        fig.add_trace(go.Violin(x=np.full(len(tiempos), i), y=tiempos, name=abv, line_color=driver_colors[abv],
+                                fillcolor=driver_colors[abv], opacity=0.6, points=False, width=0.8,
+                                showlegend=False, hoverinfo='skip'))
+    rango = driver_laps['LapTime(s)'].max() - driver_laps['LapTime(s)'].min()
+    x = _posiciones_enjambre(driver_laps, pilotos, diametro=rango / 80, paso=0.04)
+    for compound, posiciones in driver_laps.groupby('Compound', observed=True).indices.items():
+        grupo = driver_laps.iloc[posiciones]
+        fig.add_trace(go.Scatter(x=x[posiciones], y=grupo['LapTime(s)'], mode='markers', name=compound,
+                                 customdata=grupo[['Driver', 'LapNumber']].to_numpy(),
+                                 hovertemplate='%{customdata[0]} - Vuelta %{customdata[1]}: %{y:.3f} s',
+                                 marker=dict(color=fastf1.plotting.COMPOUND_COLORS.get(compound, '#FFFFFF'),
+                                             size=5, line=dict(color='white', width=0.5))))
+    fig.update_layout(title=titulo,
+                      xaxis=dict(title='Driver', tickvals=list(range(len(pilotos))), ticktext=pilotos),
+                      yaxis_title='Lap Time (s)',
+                      legend_title='Compound',
+                      template='plotly_white')
+    return fig
+
+@requiere_datos('laps')
+def grafico_comparar_desgaste(session, year, renderizador='jitter'):
+    """
+    Distribución de los tiempos de vuelta de los pilotos en los puntos y del resto.
+
+    Parameters:
+    - renderizador: 'swarm', 'jitter' (matplotlib) o 'plotly' (devuelve figuras de Plotly).
+    """
+    if renderizador not in RENDERIZADORES_DESGASTE:
+        raise ValueError(f"renderizador debe ser uno de {RENDERIZADORES_DESGASTE}")
+    # Pilotos en orden de llegada: los que terminaron en los puntos y el resto
+    pilotos = session.results['Abbreviation'].tolist()
+    driver_colors = registro_estilos(session).colores_pilotos(pilotos)
+    fig = _grafico_distribucion_vueltas(session, pilotos[:10], driver_colors,
+                                        "Lap Time Distributions by Driver and Tyre Compound", renderizador)
+    fig2 = _grafico_distribucion_vueltas(session, pilotos[10:], driver_colors, renderizador=renderizador)
+    return fig, fig2
+
+@requiere_datos('laps')
+def grafico_vel_media_equipo(session):
+    # Cajas dibujadas con Axes.bxp a partir del resumen de ritmo de la sesión,
+    # calculado una vez (modules.pace_summary): no se recalculan los cuartiles
+    cajas = estadisticas_caja(resumen_sesion(session), 'Team')
+    team_colors_map = registro_estilos(session).colores_equipos([caja['label'] for caja in cajas])
+
+    fig, ax = plt.subplots(figsize=(15, 10))
+    artistas = ax.bxp(
+        cajas,
+        widths=0.8,
+        patch_artist=True,
+        whiskerprops=dict(color="white"),
+        boxprops=dict(edgecolor="white"),
+        medianprops=dict(color="grey"),
+        capprops=dict(color="white"),
+        flierprops=dict(marker="d", markerfacecolor="grey", markeredgecolor="grey", markersize=5),
+    )
+    for caja, datos in zip(artistas['boxes'], cajas):
+        caja.set_facecolor(team_colors_map[datos['label']])
+    plt.title("Distribución de los tiempos de vuelta por equipo")
+    plt.grid(visible=False)
+    ax.set_ylabel("LapTime (s)")
+    plt.tight_layout()
+    return fig
@@ -0,0 +1,198 @@
+"""
+Comparaciones de telemetria de clasificacion: delta entre dos pilotos sobre el
+mapa del circuito, matriz de deltas de toda la parrilla y dominancia por minisectores.
+"""
+import numpy as np
+import pandas as pd
+import fastf1
+import fastf1.plotting
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import plotly.graph_objects as go
+from matplotlib.collections import LineCollection
+from modules.session_manager import requiere_datos
+from modules.styles import registro_estilos
+from modules.telemetry_alignment import alinear_telemetria, matriz_deltas, dominancia_minisectores
+from modules.instrumentation import tramo
+from modules.compact_session import segundos
+
+fastf1.plotting.setup_mpl(mpl_timedelta_support=False, misc_mpl_mods=False)
+
+def grafico_delta_vs_distancia(comparacion):
+    # Crear la figura y el eje
+    fig, ax = plt.subplots(figsize=(15, 5))
+    # Aplicar un filtro de media móvil
+    #comparacion['DeltaSuavizado'] = (comparacion['DeltaTiempo'].dt.total_seconds()).rolling(window=5, center=True).mean()
+    # O aplicar un filtro Savitzky-Golay para suavizar los datos
+    #comparacion['DeltaSuavizado'] = savgol_filter(comparacion['DeltaTiempo'].dt.total_seconds(), 51, 3) # window_size 51, polynomial order 3
+    # Dibujar el gráfico de línea con la diferencia de tiempo
+    # Delta en segundos: DeltaTiempo(s) o, si no está, DeltaTiempo (timedelta) convertido
+    delta = segundos(comparacion, 'DeltaTiempo')
+    ax.plot(comparacion['Distance'], delta, label='Delta Tiempo')
+    # Establecer etiquetas y título
+    ax.set_xlabel('Distancia (m)')
+    ax.set_ylabel('Delta (s)')
+    ax.set_title('Delta de Tiempo a lo largo de la Vuelta')
+    maxabs = max(abs(delta.min()), abs(delta.max()))
+    ax.set_ylim(-maxabs * 1.5, maxabs * 1.5)
+    # Opcional: añadir una línea horizontal en y=0 para claridad
+    ax.axhline(0, color='black', linewidth=0.5, linestyle='--')
+    # Añadir leyenda
+    ax.legend()
+    # Añadir una rejilla
+    ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+    # Ajustar la trama y guardar o mostrar el gráfico
+    plt.tight_layout()
+    # plt.show()  # Mostrar la imagen en un entorno interactivo
+    return fig
+
+@requiere_datos('laps', 'telemetry', 'messages')
+def grafico_comparar_vueltas_en_mapa(session, piloto1, piloto2):
+    # Configurar el esquema de colores para la trama
+    colormap = mpl.cm.PiYG
+    # La telemetría de la vuelta de clasificación de cada piloto ya está alineada
+    # sobre la distancia normalizada de la vuelta de pole (se calcula una vez por sesión)
+    alineacion = alinear_telemetria(session)
+    delta = alineacion.delta(piloto1, piloto2)
+
+    comparacion = pd.DataFrame({
+        'Distance': alineacion.distancia,
+        'DeltaTiempo(s)': delta,
+    })
+    x = alineacion.serie(piloto1, 'X')              # values for x-axis
+    y = alineacion.serie(piloto1, 'Y')              # values for y-axis
+    color = delta     # value to base color gradient on
+    points = np.array([x, y]).T.reshape(-1, 1, 2)
+    segments = np.concatenate([points[:-1], points[1:]], axis=1)
+    # Formato del título con nombres de los pilotos y la sesión
+    titulo = f'Comparativa de Qualy: {piloto1} (Fucsia) vs {piloto2} (Verde)'
+    # Configuración del título del gráfico
+    fig, ax = plt.subplots(sharex=True, sharey=True, figsize=(12, 6.75))
+    fig.suptitle(titulo, size=24, y=0.97)
+    # Adjust margins and turn of axis
+    plt.subplots_adjust(left=0.1, right=0.9, top=0.9, bottom=0.12)
+    ax.axis('off')
+    
+    # After this, we plot the data itself.
+    # Create background track line
+    ax.plot(x, y,
+            color='black', linestyle='-', linewidth=16, zorder=0)
+    ax.set_aspect('equal')
+    
+    # Create a continuous norm to map from data points to colors
+    absmax = max(abs(color.min()), abs(color.max()))
+    norm = mpl.colors.TwoSlopeNorm(vmin=-absmax, vcenter=0.0, vmax=absmax)
+    #norm = mpl.colors.TwoSlopeNorm(vmin=min, vcenter=0.0, vmax=max)
+    #norm = mpl.colors.SymLogNorm(linthresh=0.05, vmin=-absmax, vmax=absmax)
+    lc = LineCollection(segments, cmap=colormap, norm=norm,
+                        linestyle='-', linewidth=5)
+    # Set the values used for colormapping
+    lc.set_array(color)
+    # Merge all line segments together
+    ax.add_collection(lc)
+    # Calcular la dirección de la flecha
+    dx = x[1] - x[0]  # Diferencia en X entre el segundo y primer punto
+    dy = y[1] - y[0]  # Diferencia en Y entre el segundo y primer punto
+    # Añadir la flecha indicando el comienzo de la vuelta
+    ax.annotate('', xy=(x[1], y[1]), xytext=(x[0], y[0]),
+                arrowprops=dict(facecolor='gold', edgecolor='gold', arrowstyle='simple', lw=5),
+                annotation_clip=False)
+    # Añadir texto explicativo para la flecha
+    # Ajusta la posición (x, y) según sea necesario para evitar la superposición con otros elementos
+    ax.text(x[0] - 300, y[0], 'Inicio de la vuelta', color='gold', ha='right', va='top')
+    
+    # Finally, we create a color bar as a legend.
+    cbaxes = fig.add_axes([0.25, 0.05, 0.5, 0.05])
+    
+    normlegend = mpl.colors.TwoSlopeNorm(vmin=-absmax, vcenter=0.0, vmax=absmax)
+    #normlegend = mpl.colors.TwoSlopeNorm(vmin=color.min(), vcenter=0.0, vmax=color.max())
+    #normlegend = mpl.colors.SymLogNorm(linthresh=0.003, vmin=-absmax, vmax=absmax)
+    legend = mpl.colorbar.ColorbarBase(cbaxes, norm=normlegend, cmap=colormap,
+                                    orientation="horizontal")
+    
+    # Añadir texto explicativo cerca de la barra de colores
+    plt.text(0.25, 0.11, piloto1 + ' por delante', transform=fig.transFigure, color='fuchsia', ha='left')
+    plt.text(0.75, 0.11, piloto2 + ' por delante', transform=fig.transFigure, color='green', ha='right')
+    
+    fig2 = grafico_delta_vs_distancia(comparacion)
+    return fig, fig2
+@requiere_datos('laps', 'telemetry', 'messages')
+def grafico_matriz_deltas(session):
+    # Delta de vuelta completa entre todos los pares de pilotos clasificados
+    alineacion = alinear_telemetria(session)
+    deltas = matriz_deltas(alineacion)[:, :, -1]
+    fig = go.Figure(go.Heatmap(
+        z=deltas,
+        x=alineacion.pilotos,
+        y=alineacion.pilotos,
+        colorscale='PiYG_r',
+        zmid=0,
+        text=np.round(deltas, 3),
+        texttemplate='%{text}',
+        hovertemplate='%{y} vs %{x}: %{z:.3f} s<extra></extra>',
+        colorbar=dict(title='Delta (s)')
+    ))
+    fig.update_layout(
+        title=f"{session.event['EventName']} {session.event.year} - Delta entre pilotos (fila - columna)",
+        yaxis=dict(autorange="reversed"),
+        template="plotly_white"
+    )
+    return fig
+
+@requiere_datos('laps', 'telemetry', 'messages')
+def grafico_dominancia_minisectores(session, n_minisectores=25):
+    # Mapa del circuito coloreado por el piloto más rápido en cada minisector
+    alineacion = alinear_telemetria(session)
+    limites, _, ganadores = dominancia_minisectores(alineacion, n_minisectores)
+    # El trazado se dibuja con las coordenadas de la vuelta de pole
+    x = alineacion.serie(alineacion.pilotos[0], 'X')
+    y = alineacion.serie(alineacion.pilotos[0], 'Y')
+
+    # Compañeros de equipo con colores distintos para poder distinguirlos en el mapa
+    colores_pilotos = registro_estilos(session).colores_pilotos(
+        [alineacion.pilotos[indice] for indice in np.unique(ganadores)], distintos=True)
+
+    fig, ax = plt.subplots(figsize=(12, 6.75))
+    ax.plot(x, y, color='black', linestyle='-', linewidth=16, zorder=0)
+    for sector, indice in enumerate(ganadores):
+        puntos = slice(limites[sector], limites[sector + 1] + 1)
+        ax.plot(x[puntos], y[puntos], color=colores_pilotos[alineacion.pilotos[indice]], linewidth=5)
+    handles = [mpl.lines.Line2D([0], [0], color=color, linewidth=5, label=piloto)
+               for piloto, color in colores_pilotos.items()]
+    ax.legend(handles=handles, loc='upper right', title='Más rápido')
+    ax.set_aspect('equal')
+    ax.axis('off')
+    fig.suptitle(f'Dominancia por minisectores ({n_minisectores})', size=20)
+    return fig
+
+def grafico_comparar_vueltas():
+    # Configurar el esquema de colores para la trama
+    # Cargar la sesión
+    session = fastf1.get_session(2023, 'Bahrain Grand Prix', 'Q')
+    session.load()
+    # Seleccionar los pilotos y obtener sus mejores vueltas de telemetría
+    piloto1 = 'HAM'
+    piloto2 = 'VER'
+    vuelta_piloto1 = session.laps.pick_driver(piloto1).pick_fastest()
+    vuelta_piloto2 = session.laps.pick_driver(piloto2).pick_fastest()
+    tel_piloto1 = vuelta_piloto1.get_telemetry().add_distance()
+    tel_piloto2 = vuelta_piloto2.get_telemetry().add_distance()
+    # Asegurar que los datos están ordenados por distancia antes de intentar cualquier operación
+    tel_piloto1 = tel_piloto1.sort_values(by='Distance')
+    tel_piloto2 = tel_piloto2.sort_values(by='Distance')
+    # Realizar una unión asof para comparar las vueltas basándose en la distancia
+    with tramo('pandas.merge_asof'):
+        comparacion = pd.merge_asof(tel_piloto1, tel_piloto2, on='Distance', suffixes=('_piloto1', '_piloto2'), direction='nearest')
+    # Calcular la diferencia de tiempo en cada punto de la vuelta
+    comparacion['DeltaTiempo'] = comparacion['Time_piloto1'] - comparacion['Time_piloto2']
+    # Visualización
+    fig, ax = plt.subplots()
+    # Trazar la diferencia de tiempo como una función de la distancia recorrida
+    ax.plot(comparacion['Distance'], comparacion['DeltaTiempo'].dt.total_seconds(), label='Diferencia de tiempo')
+    # Establecer el eje y para mostrar las diferencias de tiempo en segundos
+    ax.set_xlabel('Distancia recorrida (m)')
+    ax.set_ylabel('Diferencia de tiempo (s)')
+    # Establecer leyenda y título
+    ax.legend()
+    ax.set_title(f'Diferencia de tiempo entre {piloto1} y {piloto2}')
+    return fig
@@ -0,0 +1,142 @@
+"""
+Graficos de la temporada: evolucion del campeonato (Ergast) y tendencias de
+ritmo por equipo a lo largo de las rondas.
+"""
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.express as px
+import streamlit as st
+from modules.championship import obtener_modelo_campeonato
+from modules.styles import registro_estilos_temporada
+from modules.season_trends import obtener_tendencias, tabla_tendencia, METRICAS
+
+def grafico_evolucion_campeonato(year):
+    with st.spinner('Cargando datos del campeonato...'):
+        # Colores y estilos de la temporada, resueltos una sola vez por año
+        estilos = registro_estilos_temporada(year)
+        teams_in_session = list(estilos.equipos)
+
+        # Modelo materializado: puntos por ronda y acumulados ya calculados; solo se
+        # incorporan las rondas nuevas (los constructores se emparejan con los
+        # equipos de la sesión una única vez)
+        modelo, avisos = obtener_modelo_campeonato(year, teams_in_session)
+        for aviso in avisos:
+            st.warning(aviso)
+
+        if len(modelo.rondas):
+            # ---- Gráfico de Evolución del Campeonato de Pilotos ----
+            orden_pilotos = modelo.orden('pilotos')
+            fig_drivers = go.Figure()
+            for fila in orden_pilotos:
+                driver = modelo.pilotos[fila]
+                piloto_color, dash_style = estilos.estilo_piloto(driver)
+
+                fig_drivers.add_trace(go.Scatter(
+                    x=modelo.carreras,
+                    y=modelo.acumulado_pilotos[fila],
+                    mode='lines+markers',
+                    name=driver,
+                    line=dict(color=piloto_color, dash=dash_style)
+                ))
+
+            fig_drivers.update_layout(
+                title="Evolución del Campeonato de Pilotos",
+                xaxis_title="Carrera",
+                yaxis_title="Puntos Acumulados",
+                xaxis=dict(tickmode='linear'),
+                yaxis=dict(rangemode='tozero')
+            )
+
+            # ---- Gráfico de Evolución del Campeonato de Equipos ----
+            fig_teams = go.Figure()
+            for fila in modelo.orden('equipos'):
+                team = modelo.equipos[fila]
+                team_color = estilos.color_equipo(team)
+
+                fig_teams.add_trace(go.Scatter(
+                    x=modelo.carreras,
+                    y=modelo.acumulado_equipos[fila],
+                    mode='lines+markers',
+                    name=team,
+                    line=dict(color=team_color)
+                ))
+
+            fig_teams.update_layout(
+                title="Evolución del Campeonato de Equipos",
+                xaxis_title="Carrera",
+                yaxis_title="Puntos Acumulados",
+                xaxis=dict(tickmode='linear'),
+                yaxis=dict(rangemode='tozero')
+            )
+
+            # ---- Heatmap de Puntos de Pilotos ----
+            fig_heatmap = px.imshow(
+                pd.DataFrame(modelo.puntos_pilotos[orden_pilotos],
+                             index=[modelo.pilotos[fila] for fila in orden_pilotos],
+                             columns=modelo.carreras),
+                text_auto=True,
+                aspect='auto',
+                color_continuous_scale=[[0, 'rgb(198, 219, 239)'],
+                                        [0.25, 'rgb(107, 174, 214)'],
+                                        [0.5, 'rgb(33, 113, 181)'],
+                                        [0.75, 'rgb(8, 81, 156)'],
+                                        [1, 'rgb(8, 48, 107)']],
+                labels={'x': 'Carrera', 'y': 'Piloto', 'color': 'Puntos'}
+            )
+
+            fig_heatmap.update_xaxes(title_text='')
+            fig_heatmap.update_yaxes(title_text='')
+            fig_heatmap.update_yaxes(tickmode='linear')
+            fig_heatmap.update_yaxes(showgrid=True, gridwidth=1, gridcolor='LightGrey', showline=False, tickson='boundaries')
+            fig_heatmap.update_xaxes(showgrid=False, showline=False)
+            fig_heatmap.update_layout(plot_bgcolor='rgba(0,0,0,0)')
+            fig_heatmap.update_layout(coloraxis_showscale=False)
+            fig_heatmap.update_layout(xaxis=dict(side='top'))
+            fig_heatmap.update_layout(margin=dict(l=0, r=0, b=0, t=0))
+
+            return fig_drivers, fig_teams, fig_heatmap
+        else:
+            st.warning("No se encontraron datos suficientes para generar los gráficos.")
+            return None, None, None
+
+def grafico_tendencias_temporada(year, session_type='R', metrica='GapPct'):
+    """
+    Evolución por ronda de una métrica de ritmo de cada equipo (ver
+    modules.season_trends.METRICAS), a partir de los resúmenes por evento ya
+    guardados: solo se calculan los eventos que faltan.
+
+    Returns:
+    - fig (o None si no hay eventos resumidos) y la tabla ronda x equipo.
+    """
+    with st.spinner('Resumiendo el ritmo de los eventos de la temporada...'):
+        tendencias, errores = obtener_tendencias(year, (session_type,))
+    for gp, tipo, error in errores:
+        st.warning(f"No se ha podido resumir {gp} ({tipo}): {error}")
+    tabla = tabla_tendencia(tendencias, session_type, metrica)
+    if tabla.empty:
+        return None, tabla
+
+    estilos = registro_estilos_temporada(year)
+    rondas = tabla.index.get_level_values('Ronda')
+    eventos = tabla.index.get_level_values('Evento')
+    fig = go.Figure()
+    for team in tabla.columns:
+        fig.add_trace(go.Scatter(
+            x=rondas,
+            y=tabla[team],
+            mode='lines+markers',
+            name=team,
+            line=dict(color=estilos.color_equipo(team)),
+            customdata=eventos,
+            hovertemplate='%{customdata}: %{y:.3f}'
+        ))
+    sesion = 'Clasificación' if session_type == 'Q' else 'Carrera'
+    fig.update_layout(
+        title=f"{METRICAS[metrica]} por equipo - {sesion} {year}",
+        xaxis_title="Ronda",
+        yaxis_title=METRICAS[metrica],
+        xaxis=dict(tickmode='linear'),
+        yaxis=dict(rangemode='tozero'),
+        template='plotly_white'
+    )
+    return fig, tabla
@@ -0,0 +1,204 @@
+"""
+Ingesta por lotes: carga todas las sesiones ya disputadas de una o varias
+temporadas para llenar la cache de FastF1, con un pool de procesos de tamaño
+limitado (el parseo de FastF1 es CPU y no escala con hilos). Sirve para
+precalentar un nodo de analisis antes de un fin de semana de carrera.
+
+Cada sesion terminada se apunta en un manifiesto JSONL (una linea por intento,
+con su duracion y el error si fallo). Al volver a lanzar el comando se saltan
+las sesiones ya ingeridas; las fallidas solo se reintentan con --reintentar-fallos.
+
+Uso (desde la raiz del repositorio):
+    python -m modules.ingestion --years 2023 2024 [--workers 4] [--tipos Q R]
+        [--categorias laps messages] [--cache cache] [--manifiesto cache/ingesta.jsonl] [--reintentar-fallos]
+
+Sin red, contra una cache ya rellena (con su calendario en <cache>/calendario/):
+    python -m modules.ingestion --years 2024 --cache /ruta/a/fixture --offline
+o contra un servidor local que imite livetiming, el calendario de FastF1 y Ergast:
+    python -m modules.ingestion --years 2024 --cache /tmp/cache --url-livetiming http://127.0.0.1:8000 \\
+        --url-calendario http://127.0.0.1:8000/schedule/ --url-ergast http://127.0.0.1:8000/api/f1
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import fastf1
+import fastf1._api
+import fastf1.events
+import pandas as pd
+from modules.session_manager import CATEGORIAS, crear_sesion, asegurar_datos
+from modules.schedule_index import obtener_indice_calendario, configurar_calendario
+from modules.championship import configurar_ergast
+from modules.utils import configurar_cache
+
+MAX_PROCESOS = max(1, min(4, (os.cpu_count() or 1) - 1))
+MANIFIESTO = os.path.join('cache', 'ingesta.jsonl')
+
+# Atributo de la sesion que confirma que cada categoria se ha cargado (FastF1
+# registra el error y sigue si una categoria falla; al leerla lanza DataNotLoadedError)
+_COMPROBACIONES = {'laps': 'laps', 'telemetry': 'car_data', 'weather': 'weather_data',
+                   'messages': 'race_control_messages'}
+
+
+def configurar_origen(cache_dir, offline=False, url_livetiming=None, url_calendario=None, url_ergast=None):
+    """
+    Cache de FastF1 (y el indice del calendario dentro de ella) y, para pruebas,
+    modo sin conexion o servidores locales en lugar de los oficiales. Se ejecuta
+    en el proceso principal y al arrancar cada proceso del pool.
+    """
+    configurar_cache(cache_dir)
+    # El progreso se informa por sesion; de FastF1 solo interesan los avisos
+    fastf1.set_log_level('WARNING')
+    configurar_calendario(os.path.join(cache_dir, 'calendario'))
+    fastf1.Cache.offline_mode(offline)
+    if url_livetiming:
+        fastf1._api.base_url = fastf1._api.base_url_mirror = url_livetiming.rstrip('/')
+    if url_calendario:
+        fastf1.events._SCHEDULE_BASE_URL = url_calendario
+    if url_ergast:
+        configurar_ergast(url_ergast)
+
+
+def sesiones_temporada(year, tipos=None, ahora=None):
+    """
+    Sesiones ya disputadas de la temporada segun el indice del calendario.
+
+    Returns:
+    - Lista de (year, gp, tipo) en orden de ronda y de disputa.
+    """
+    return [(year, gp, tipo) for gp, tipo in obtener_indice_calendario(year).sesiones_disputadas(tipos, ahora)]
+
+
+def ingerir_sesion(year, gp, tipo, categorias=CATEGORIAS):
+    """
+    Carga una sesion con las categorias pedidas. Se ejecuta en un proceso del pool.
+
+    Returns:
+    - dict con year, gp, tipo, estado ('ok' o 'error'), segundos y error.
+    """
+    inicio = time.perf_counter()
+    try:
+        session = asegurar_datos(crear_sesion(year, gp, tipo), *categorias)
+        faltan = []
+        for categoria in categorias:
+            try:
+                getattr(session, _COMPROBACIONES[categoria])
+            except Exception:
+                faltan.append(categoria)
+        error = f"Sin datos de: {', '.join(faltan)}" if faltan else None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {'year': year, 'gp': gp, 'tipo': tipo, 'estado': 'error' if error else 'ok',
+            'segundos': round(time.perf_counter() - inicio, 3), 'error': error}
+
+
+def leer_manifiesto(ruta):
+    # Ultimo estado de cada sesion: (year, gp, tipo) -> registro
+    estados = {}
+    if not os.path.exists(ruta):
+        return estados
+    with open(ruta, encoding='utf-8') as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                # Linea a medio escribir si el proceso se corto
+                continue
+            estados[(registro['year'], registro['gp'], registro['tipo'])] = registro
+    return estados
+
+
+def pendientes(tareas, estados, reintentar_fallos=False):
+    hechas = {'ok', 'error'} if not reintentar_fallos else {'ok'}
+    return [tarea for tarea in tareas if estados.get(tarea, {}).get('estado') not in hechas]
+
+
+def ingerir(tareas, categorias=CATEGORIAS, max_workers=MAX_PROCESOS, manifiesto=MANIFIESTO, origen=None,
+            al_terminar=None):
+    """
+    Ingiere las tareas (year, gp, tipo) en un pool de `max_workers` procesos y
+    añade al manifiesto una linea por sesion en cuanto termina, de modo que una
+    interrupcion solo pierde las sesiones en curso.
+
+    Parameters:
+    - origen: argumentos de configurar_origen para cada proceso del pool.
+    - al_terminar: funcion llamada con cada registro (para informar del progreso).
+
+    Returns:
+    - Lista de registros, en el orden en que terminaron.
+    """
+    registros = []
+    if not tareas:
+        return registros
+    directorio = os.path.dirname(manifiesto)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=configurar_origen if origen else None,
+                             initargs=tuple(origen or ())) as pool, \
+            open(manifiesto, 'a', encoding='utf-8') as f:
+        futuros = {pool.submit(ingerir_sesion, *tarea, tuple(categorias)): tarea for tarea in tareas}
+        for futuro in as_completed(futuros):
+            try:
+                registro = futuro.result()
+            except Exception as e:
+                # El proceso del pool murio (p. ej. sin memoria)
+                year, gp, tipo = futuros[futuro]
+                registro = {'year': year, 'gp': gp, 'tipo': tipo, 'estado': 'error', 'segundos': None,
+                            'error': f"{type(e).__name__}: {e}"}
+            registro['fecha'] = pd.Timestamp.now('UTC').tz_localize(None).isoformat(timespec='seconds')
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            f.flush()
+            registros.append(registro)
+            if al_terminar is not None:
+                al_terminar(registro)
+    return registros
+
+
+def _imprimir(registro):
+    segundos = f"{registro['segundos']:.1f} s" if registro['segundos'] is not None else "-"
+    estado = registro['estado'] if registro['estado'] == 'ok' else f"error ({registro['error']})"
+    print(f"{registro['year']} {registro['gp']} {registro['tipo']}: {estado} en {segundos}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, nargs='+', required=True)
+    parser.add_argument('--tipos', nargs='+', help="Solo estos tipos de sesion (FP1, Q, S, R...); por defecto todas")
+    parser.add_argument('--categorias', nargs='+', default=list(CATEGORIAS), choices=CATEGORIAS)
+    parser.add_argument('--workers', type=int, default=MAX_PROCESOS)
+    parser.add_argument('--cache', default='cache')
+    parser.add_argument('--manifiesto', help="Por defecto <cache>/ingesta.jsonl")
+    parser.add_argument('--reintentar-fallos', action='store_true')
+    parser.add_argument('--offline', action='store_true', help="Usar solo lo que ya hay en la cache")
+    parser.add_argument('--url-livetiming')
+    parser.add_argument('--url-calendario')
+    parser.add_argument('--url-ergast')
+    args = parser.parse_args()
+
+    origen = (args.cache, args.offline, args.url_livetiming, args.url_calendario, args.url_ergast)
+    configurar_origen(*origen)
+    manifiesto = args.manifiesto or os.path.join(args.cache, 'ingesta.jsonl')
+
+    tareas = []
+    for year in args.years:
+        try:
+            tareas += sesiones_temporada(year, args.tipos)
+        except Exception as e:
+            print(f"{year}: no se ha podido obtener el calendario ({e})")
+    estados = leer_manifiesto(manifiesto)
+    por_hacer = pendientes(tareas, estados, args.reintentar_fallos)
+    print(f"{len(tareas)} sesiones disputadas, {len(tareas) - len(por_hacer)} ya en el manifiesto, "
+          f"{len(por_hacer)} por ingerir con {args.workers} procesos", flush=True)
+
+    inicio = time.perf_counter()
+    registros = ingerir(por_hacer, args.categorias, args.workers, manifiesto, origen, al_terminar=_imprimir)
+    fallos = [r for r in registros if r['estado'] != 'ok']
+    print(f"Ingeridas {len(registros) - len(fallos)} sesiones, {len(fallos)} fallos, "
+          f"{time.perf_counter() - inicio:.1f} s en total")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
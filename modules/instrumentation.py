@@ -0,0 +1,285 @@
+"""
+Instrumentacion de la app: tramos con su duracion (y, si se pide, el pico de
+memoria) alrededor de las funciones de carga de datos y de los graficos, y
+contadores de aciertos y fallos de las caches.
+
+Esta desactivada por defecto y entonces cada funcion instrumentada solo
+comprueba una variable global antes de llamar a la original. Se activa:
+- con la variable de entorno F1APP_INSTRUMENTACION=1 (o =memoria para medir
+  tambien la memoria con tracemalloc, que ralentiza todas las reservas), o
+- con activar(), p. ej. desde el panel de depuracion de la app.
+Lo activado por el entorno no se apaga con desactivar(), que vuelve a ese estado.
+
+Los tramos y contadores se exportan en JSON lines (una linea por tramo y por
+contador) con exportar_jsonl() o lineas_jsonl(). Con F1APP_INSTRUMENTACION_JSONL=<ruta>
+la app añade al archivo, al final de cada ejecucion, lo medido desde la anterior.
+
+    from modules.instrumentation import medir, tramo, contar_cache
+
+    @medir()
+    def cargar_algo(...):
+        with tramo('fastf1.load', categorias='laps'):
+            ...
+"""
+import os
+import json
+import time
+import threading
+import functools
+import itertools
+import tracemalloc
+from collections import Counter, deque
+from contextlib import nullcontext
+from datetime import datetime, timezone
+import pandas as pd
+
+# Tramos que se conservan en memoria (los mas antiguos se descartan)
+MAX_TRAMOS = 10000
+RUTA_JSONL = os.environ.get('F1APP_INSTRUMENTACION_JSONL')
+# Estado pedido por F1APP_INSTRUMENTACION, independiente de activar()/desactivar()
+_MODO_ENTORNO = os.environ.get('F1APP_INSTRUMENTACION', '').strip().lower()
+ACTIVA_POR_ENTORNO = bool(_MODO_ENTORNO) and _MODO_ENTORNO not in ('0', 'false', 'no')
+MEMORIA_POR_ENTORNO = ACTIVA_POR_ENTORNO and _MODO_ENTORNO == 'memoria'
+
+_activa = False
+_memoria = False
+_tramos = deque(maxlen=MAX_TRAMOS)
+_contadores = Counter()
+_lock = threading.Lock()
+# Numero de secuencia de cada tramo: marca hasta donde llego cada exportacion
+_secuencia = itertools.count(1)
+# Ruta -> (ultima secuencia, contadores) ya escritos por exportar_jsonl(incremental=True)
+_exportado = {}
+_lock_exportacion = threading.Lock()
+_local = threading.local()
+_NULO = nullcontext()
+
+
+def activar(memoria=False):
+    """
+    Activa los tramos y contadores. Con memoria=True se arranca tracemalloc y
+    cada tramo guarda su pico de memoria (aproximado si hay varios hilos midiendo).
+    La medida de memoria pedida por el entorno se mantiene aunque memoria=False.
+    """
+    global _activa, _memoria
+    memoria = memoria or MEMORIA_POR_ENTORNO
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not memoria and _memoria and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memoria = memoria
+    _activa = True
+
+
+def desactivar():
+    # Vuelve al estado del entorno: si F1APP_INSTRUMENTACION la activa, sigue activa
+    global _activa, _memoria
+    if ACTIVA_POR_ENTORNO:
+        activar(memoria=MEMORIA_POR_ENTORNO)
+        return
+    if _memoria and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _activa = _memoria = False
+
+
+def activa():
+    return _activa
+
+
+def midiendo_memoria():
+    return _activa and _memoria
+
+
+def _pila():
+    pila = getattr(_local, 'pila', None)
+    if pila is None:
+        pila = _local.pila = []
+    return pila
+
+
+def _mb(n):
+    return round(n / 2 ** 20, 3)
+
+
+class _Tramo:
+    __slots__ = ('nombre', 'etiquetas', 'fecha', 'inicio', 'memoria_inicial', 'pico', 'padre')
+
+    def __init__(self, nombre, etiquetas=None):
+        self.nombre = nombre
+        self.etiquetas = etiquetas
+        self.memoria_inicial = None
+
+    def __enter__(self):
+        pila = _pila()
+        self.padre = pila[-1].nombre if pila else None
+        if _memoria and tracemalloc.is_tracing():
+            # tracemalloc solo tiene un pico global: se guarda el del tramo padre
+            # antes de reiniciarlo para este
+            actual, pico = tracemalloc.get_traced_memory()
+            if pila and pila[-1].memoria_inicial is not None:
+                pila[-1].pico = max(pila[-1].pico, pico)
+            tracemalloc.reset_peak()
+            self.memoria_inicial = self.pico = actual
+        pila.append(self)
+        self.fecha = time.time()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        segundos = time.perf_counter() - self.inicio
+        pila = _pila()
+        pila.pop()
+        registro = {'tipo': 'tramo', 'secuencia': None, 'nombre': self.nombre,
+                    'fecha': datetime.fromtimestamp(self.fecha, timezone.utc).isoformat(timespec='milliseconds'),
+                    'segundos': round(segundos, 6), 'padre': self.padre, 'profundidad': len(pila),
+                    'hilo': threading.current_thread().name, 'pid': os.getpid(),
+                    'error': tipo.__name__ if tipo else None}
+        if self.memoria_inicial is not None and tracemalloc.is_tracing():
+            actual, pico = tracemalloc.get_traced_memory()
+            pico = max(self.pico, pico)
+            registro['memoria_pico_mb'] = _mb(pico - self.memoria_inicial)
+            registro['memoria_neta_mb'] = _mb(actual - self.memoria_inicial)
+            if pila and pila[-1].memoria_inicial is not None:
+                pila[-1].pico = max(pila[-1].pico, pico)
+        if self.etiquetas:
+            registro['etiquetas'] = self.etiquetas
+        with _lock:
+            registro['secuencia'] = next(_secuencia)
+            _tramos.append(registro)
+        return False
+
+
+def tramo(nombre, **etiquetas):
+    """
+    Context manager que mide un bloque de codigo. Si la instrumentacion esta
+    desactivada devuelve un contexto vacio compartido.
+    """
+    if not _activa:
+        return _NULO
+    return _Tramo(nombre, {k: str(v) for k, v in etiquetas.items()} or None)
+
+
+def medir(nombre=None):
+    """
+    Decorador que mide cada llamada a la funcion como un tramo. Por defecto el
+    tramo se llama <modulo>.<funcion>, sin el paquete modules.
+    """
+    def decorador(func):
+        etiqueta = nombre or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def envoltorio(*args, **kwargs):
+            if not _activa:
+                return func(*args, **kwargs)
+            with _Tramo(etiqueta):
+                return func(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def contar_cache(cache, acierto):
+    # Acierto o fallo de una cache: contadores <cache>.aciertos y <cache>.fallos
+    if _activa:
+        with _lock:
+            _contadores[f"{cache}.{'aciertos' if acierto else 'fallos'}"] += 1
+
+
+def tramos():
+    """
+    DataFrame con los tramos registrados, del mas antiguo al mas reciente.
+    """
+    return pd.DataFrame(list(_tramos))
+
+
+def resumen_tramos():
+    """
+    Por tramo: llamadas, tiempo total, medio y maximo, errores y, si se ha
+    medido, el mayor pico de memoria. Ordenado por tiempo total.
+    """
+    datos = tramos()
+    if datos.empty:
+        return pd.DataFrame(columns=['llamadas', 'total_s', 'media_s', 'max_s', 'errores'])
+    grupos = datos.groupby('nombre')
+    resumen = pd.DataFrame({
+        'llamadas': grupos.size(),
+        'total_s': grupos['segundos'].sum().round(4),
+        'media_s': grupos['segundos'].mean().round(4),
+        'max_s': grupos['segundos'].max().round(4),
+        'errores': grupos['error'].count(),
+    })
+    if 'memoria_pico_mb' in datos:
+        resumen['memoria_pico_mb'] = grupos['memoria_pico_mb'].max()
+    return resumen.sort_values('total_s', ascending=False)
+
+
+def contadores():
+    with _lock:
+        return dict(_contadores)
+
+
+def resumen_contadores():
+    """
+    Aciertos, fallos y tasa de aciertos de cada cache.
+    """
+    filas = {}
+    for nombre, valor in contadores().items():
+        cache, _, tipo = nombre.rpartition('.')
+        filas.setdefault(cache, {'aciertos': 0, 'fallos': 0})[tipo] = valor
+    tabla = pd.DataFrame.from_dict(filas, orient='index', columns=['aciertos', 'fallos']).fillna(0).astype(int)
+    tabla.index.name = 'cache'
+    tabla['tasa_aciertos'] = (tabla['aciertos'] / (tabla['aciertos'] + tabla['fallos'])).round(3)
+    return tabla.sort_index()
+
+
+def _lineas(registros, valores):
+    fecha = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    for registro in registros:
+        yield json.dumps(registro, ensure_ascii=False)
+    for nombre, valor in sorted(valores.items()):
+        yield json.dumps({'tipo': 'contador', 'nombre': nombre, 'valor': valor, 'fecha': fecha, 'pid': os.getpid()},
+                         ensure_ascii=False)
+
+
+def lineas_jsonl():
+    """
+    Tramos y contadores registrados como lineas JSON (sin salto de linea final).
+    """
+    return _lineas(list(_tramos), contadores())
+
+
+def exportar_jsonl(ruta, incremental=False):
+    """
+    Añade los tramos y contadores al archivo JSONL `ruta`. Con incremental=True
+    solo escribe los tramos registrados despues de la anterior exportacion a esa
+    ruta y los contadores que han cambiado desde entonces: se puede exportar
+    periodicamente sin duplicar lineas y sin vaciar lo que muestra el panel.
+
+    Returns:
+    - Numero de lineas escritas.
+    """
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with _lock_exportacion:
+        desde, previos = _exportado.get(ruta, (0, {})) if incremental else (0, {})
+        registros = [registro for registro in list(_tramos) if registro['secuencia'] > desde]
+        valores = contadores()
+        cambiados = {nombre: valor for nombre, valor in valores.items() if previos.get(nombre) != valor}
+        n = 0
+        with open(ruta, 'a', encoding='utf-8') as f:
+            for linea in _lineas(registros, cambiados):
+                f.write(linea + '\n')
+                n += 1
+        if incremental:
+            _exportado[ruta] = (max([desde] + [registro['secuencia'] for registro in registros]), valores)
+    return n
+
+
+def reiniciar():
+    _tramos.clear()
+    with _lock:
+        _contadores.clear()
+
+
+if ACTIVA_POR_ENTORNO:
+    activar(memoria=MEMORIA_POR_ENTORNO)
@@ -0,0 +1,86 @@
+import weakref
+import numpy as np
+import pandas as pd
+from fastf1.core import Laps
+from modules.instrumentation import medir, contar_cache
+from modules.compact_session import vueltas_compactas, segundos as segundos_columna
+
+# Resumen del ritmo de una sesion sobre las vueltas rapidas (pick_quicklaps):
+# cuartiles, bigotes y atipicos como los calcula un boxplot (1.5 x IQR), ritmo
+# medio y diferencia de la mediana con la mas rapida, por equipo y por piloto.
+NIVELES = ('Team', 'Driver')
+COLUMNAS_RESUMEN = ['Nivel', 'Nombre', 'Team', 'Vueltas', 'Media', 'Minimo', 'Q1', 'Mediana', 'Q3',
+                    'BigoteInf', 'BigoteSup', 'Atipicos', 'GapMediana', 'GapPct']
+RANGO_BIGOTES = 1.5
+
+_resumenes = weakref.WeakKeyDictionary()
+
+
+def _resumen_nivel(datos, nivel):
+    grupos = datos.groupby(nivel, sort=False)['Segundos']
+    tabla = grupos.quantile([0.25, 0.5, 0.75]).unstack()
+    tabla.columns = ['Q1', 'Mediana', 'Q3']
+    tabla['Vueltas'] = grupos.size()
+    tabla['Media'] = grupos.mean()
+    tabla['Minimo'] = grupos.min()
+
+    # Bigotes: el dato mas extremo de cada grupo dentro de 1.5 x IQR de la caja
+    iqr = tabla['Q3'] - tabla['Q1']
+    claves = datos[nivel]
+    dentro = datos['Segundos'].between(claves.map(tabla['Q1'] - RANGO_BIGOTES * iqr),
+                                       claves.map(tabla['Q3'] + RANGO_BIGOTES * iqr))
+    tabla['BigoteInf'] = datos['Segundos'].where(dentro).groupby(claves).min()
+    tabla['BigoteSup'] = datos['Segundos'].where(dentro).groupby(claves).max()
+    atipicos = datos.loc[~dentro].groupby(nivel)['Segundos'].agg(list)
+    tabla['Atipicos'] = [atipicos.get(nombre, []) for nombre in tabla.index]
+
+    mejor = tabla['Mediana'].min()
+    tabla['GapMediana'] = tabla['Mediana'] - mejor
+    tabla['GapPct'] = 100 * tabla['GapMediana'] / mejor
+    tabla['Team'] = datos.groupby(nivel, sort=False)['Team'].first() if nivel != 'Team' else tabla.index
+    tabla['Nivel'] = nivel
+    tabla = tabla.rename_axis('Nombre').reset_index().sort_values('Mediana', kind='stable')
+    return tabla[COLUMNAS_RESUMEN]
+
+
+@medir()
+def resumen_ritmo(laps, umbral=None):
+    """
+    Resumen del ritmo por equipo y por piloto de unas vueltas (Laps de FastF1 o
+    un DataFrame con Driver, Team y LapTime, p. ej. leido del almacen columnar, o
+    la tabla compacta de modules.compact_session con LapTime(s)).
+
+    Returns:
+    - DataFrame con COLUMNAS_RESUMEN, una fila por equipo (Nivel 'Team') y por
+      piloto (Nivel 'Driver'), cada nivel ordenado de menor a mayor mediana.
+    """
+    umbral = umbral or Laps.QUICKLAP_THRESHOLD
+    segundos = segundos_columna(laps, 'LapTime')
+    rapidas = segundos < segundos.min() * umbral
+    datos = pd.DataFrame({'Team': laps['Team'][rapidas].astype(str), 'Driver': laps['Driver'][rapidas].astype(str),
+                          'Segundos': segundos[rapidas]})
+    if datos.empty:
+        return pd.DataFrame(columns=COLUMNAS_RESUMEN)
+    return pd.concat([_resumen_nivel(datos, nivel) for nivel in NIVELES], ignore_index=True)
+
+
+def resumen_sesion(session):
+    """
+    resumen_ritmo de las vueltas de la sesion, calculado una vez por sesion.
+    """
+    contar_cache('resumen_ritmo', session in _resumenes)
+    if session not in _resumenes:
+        _resumenes[session] = resumen_ritmo(vueltas_compactas(session))
+    return _resumenes[session]
+
+
+def estadisticas_caja(resumen, nivel='Team'):
+    """
+    Filas de un nivel del resumen en el formato de Axes.bxp, en orden de mediana.
+    """
+    filas = resumen[resumen['Nivel'] == nivel]
+    return [{'label': nombre, 'q1': q1, 'med': mediana, 'q3': q3, 'whislo': inf, 'whishi': sup,
+             'mean': media, 'fliers': np.asarray(atipicos, dtype=float)}
+            for nombre, q1, mediana, q3, inf, sup, media, atipicos
+            in zip(filas['Nombre'], filas['Q1'], filas['Mediana'], filas['Q3'], filas['BigoteInf'],
+                   filas['BigoteSup'], filas['Media'], filas['Atipicos'])]
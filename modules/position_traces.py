@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+
+class SeriesPosiciones:
+    """
+    Posicion de cada piloto en cada vuelta, calculada en una sola pasada sobre
+    la tabla de vueltas.
+
+    - pilotos: abreviaturas en el orden pedido (por defecto el de la tabla).
+    - vueltas: numeros de vuelta presentes en la sesion, forma (L,).
+    - posiciones: array float de forma (pilotos, L) con NaN donde no hay dato.
+    """
+
+    def __init__(self, pilotos, vueltas, posiciones):
+        self.pilotos = list(pilotos)
+        self.vueltas = vueltas
+        self.posiciones = posiciones
+
+    @classmethod
+    def desde_vueltas(cls, laps, orden=None):
+        """
+        Parameters:
+        - laps: Tabla de vueltas con Driver, LapNumber y Position.
+        - orden: Abreviaturas de los pilotos en el orden deseado (opcional). Los
+          pilotos sin vueltas se omiten.
+        """
+        datos = laps[['Driver', 'LapNumber', 'Position']].dropna(subset=['LapNumber'])
+        codigos, pilotos = pd.factorize(datos['Driver'])
+        vueltas, columnas = np.unique(datos['LapNumber'].to_numpy(dtype=float), return_inverse=True)
+        posiciones = np.full((len(pilotos), len(vueltas)), np.nan)
+        posiciones[codigos, columnas] = datos['Position'].to_numpy(dtype=float)
+        pilotos = list(pilotos)
+        if orden is not None:
+            indices = {piloto: i for i, piloto in enumerate(pilotos)}
+            filas = [indices[p] for p in orden if p in indices]
+            pilotos = [pilotos[i] for i in filas]
+            posiciones = posiciones[filas]
+        return cls(pilotos, vueltas, posiciones)
+
+    def trazas(self):
+        # (piloto, vueltas, posiciones) de cada piloto sin las vueltas vacias
+        for piloto, fila in zip(self.pilotos, self.posiciones):
+            validas = ~np.isnan(fila)
+            yield piloto, self.vueltas[validas], fila[validas]
+
+    def arrays_concatenados(self, filas=None):
+        """
+        Todas las series (o las de los indices de `filas`) en un unico par de
+        arrays separados por NaN (un hueco entre pilotos), listos para una sola traza.
+
+        Returns:
+        - x, y: arrays de forma (pilotos * (L + 1),).
+        - pilotos: piloto de cada punto (None en los separadores).
+        """
+        filas = np.arange(len(self.pilotos)) if filas is None else np.asarray(filas, dtype=int)
+        n, l = len(filas), len(self.vueltas)
+        x = np.empty((n, l + 1))
+        y = np.empty((n, l + 1))
+        x[:, :l] = self.vueltas
+        x[:, l] = np.nan
+        y[:, :l] = self.posiciones[filas]
+        y[:, l] = np.nan
+        pilotos = np.empty((n, l + 1), dtype=object)
+        pilotos[:, :l] = np.asarray(self.pilotos, dtype=object)[filas, None]
+        pilotos[:, l] = None
+        return x.ravel(), y.ravel(), pilotos.ravel()
@@ -0,0 +1,200 @@
+"""
+Precarga en segundo plano de las sesiones que el usuario va a abrir a
+continuacion (clasificacion y carrera del evento elegido) y precalentamiento por
+lotes de la cache de FastF1 para temporadas completas.
+
+Precalentamiento (desde la raiz del repositorio, por ejemplo de noche):
+    python -m modules.prefetch --years 2024 [--tipos Q R] [--workers 2] [--categorias laps messages]
+"""
+import argparse
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+import pandas as pd
+from modules.session_manager import CATEGORIAS, cargar_sesion
+from modules.schedule_index import obtener_indice_calendario
+from modules.utils import configurar_cache
+from modules.instrumentation import contar_cache
+
+MAX_PRECARGAS_CONCURRENTES = 2
+# Mismas categorias que carga cargar_datos_de_sesion al abrir un analisis
+CATEGORIAS_PRECARGA = ('laps', 'messages')
+# Etiqueta del calendario -> tipo de sesion que se precarga
+SESIONES_PRECARGA = (('Qualy', 'Q'), ('Carrera', 'R'))
+# Segundos sin programar precargas tras los que se olvida a un usuario
+TTL_PROPIETARIO_S = 15 * 60
+
+
+class ProgramadorPrecarga:
+    """
+    Pool de hilos que carga sesiones antes de que se pidan. Cada tarea se
+    identifica por (year, gp, tipo) y guarda los propietarios (usuarios) que la
+    quieren: cuando un usuario cambia de evento se retira de sus tareas
+    anteriores y las que se quedan sin propietario se cancelan (si aun no han
+    empezado) o se descartan al terminar.
+
+    Una tarea terminada se descarta en cuanto se recoge su sesion (resultado),
+    y los usuarios que no programan nada en `ttl` segundos (pestaña cerrada) se
+    retiran de sus tareas: el programador no mantiene sesiones vivas por su cuenta.
+    """
+
+    def __init__(self, max_workers=MAX_PRECARGAS_CONCURRENTES, categorias=CATEGORIAS_PRECARGA,
+                 ttl=TTL_PROPIETARIO_S):
+        self.categorias = tuple(categorias)
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='precarga')
+        self._tareas = {}
+        self._por_propietario = {}
+        self._vistos = {}
+        self._lock = threading.Lock()
+
+    def _cargar(self, clave):
+        year, gp, tipo = clave
+        return cargar_sesion(year, gp, tipo, categorias=self.categorias, desde_almacen=True)
+
+    def programar(self, propietario, claves):
+        """
+        Sustituye las precargas de `propietario` por las de `claves`.
+        """
+        claves = set(claves)
+        with self._lock:
+            ahora = time.monotonic()
+            self._expirar(ahora)
+            self._vistos[propietario] = ahora
+            anteriores = self._por_propietario.get(propietario, set())
+            for clave in anteriores - claves:
+                self._soltar(clave, propietario)
+            for clave in claves - anteriores:
+                tarea = self._tareas.get(clave)
+                if tarea is None:
+                    futuro = self._pool.submit(self._cargar, clave)
+                    tarea = self._tareas[clave] = (futuro, set())
+                tarea[1].add(propietario)
+            self._por_propietario[propietario] = claves
+
+    def _expirar(self, ahora):
+        # Retira a los usuarios sin actividad (p. ej. pestaña cerrada) de sus tareas
+        for propietario, visto in list(self._vistos.items()):
+            if ahora - visto > self.ttl:
+                for clave in self._por_propietario.pop(propietario, ()):
+                    self._soltar(clave, propietario)
+                del self._vistos[propietario]
+
+    def _soltar(self, clave, propietario):
+        tarea = self._tareas.get(clave)
+        if tarea is None:
+            return
+        futuro, propietarios = tarea
+        propietarios.discard(propietario)
+        if not propietarios:
+            # Una carga ya en curso no se puede interrumpir: termina y se descarta
+            futuro.cancel()
+            del self._tareas[clave]
+
+    def resultado(self, clave, timeout=None):
+        """
+        Sesion precargada para `clave`, esperando si su carga esta en curso. Una
+        vez terminada la tarea se descarta: quien la recoge (cargar_datos_de_sesion)
+        guarda la sesion en su propia cache, acotada.
+
+        Returns:
+        - La sesion, o None si no se habia programado, se cancelo o fallo.
+        """
+        with self._lock:
+            tarea = self._tareas.get(clave)
+        if tarea is None:
+            return None
+        try:
+            return tarea[0].result(timeout=timeout)
+        except CancelledError:
+            return None
+        except Exception:
+            # El hilo principal reintentara la carga y mostrara el error si se repite
+            return None
+        finally:
+            if tarea[0].done():
+                with self._lock:
+                    # Los propietarios la conservan en sus claves: no se vuelve a programar
+                    if self._tareas.get(clave) is tarea:
+                        del self._tareas[clave]
+
+    def pendientes(self):
+        with self._lock:
+            return {clave: ('en curso' if futuro.running() else 'terminada' if futuro.done() else 'en cola')
+                    for clave, (futuro, _) in self._tareas.items()}
+
+
+_programador = None
+_programador_lock = threading.Lock()
+
+
+def programador():
+    global _programador
+    with _programador_lock:
+        if _programador is None:
+            _programador = ProgramadorPrecarga()
+        return _programador
+
+
+def sesiones_disputadas(fechas, ahora=None):
+    # Tipos de sesion (Q, R) del evento que ya se han disputado segun el calendario
+    ahora = ahora if ahora is not None else pd.Timestamp.now('UTC').tz_localize(None)
+    fechas = fechas or {}
+    return [tipo for etiqueta, tipo in SESIONES_PRECARGA if etiqueta in fechas and fechas[etiqueta] <= ahora]
+
+
+def precargar_evento(propietario, year, gp, fechas):
+    """
+    Programa la carga en segundo plano de la clasificacion y la carrera del
+    evento (solo las ya disputadas) y cancela las del evento anterior del usuario.
+    """
+    programador().programar(propietario, [(year, gp, tipo) for tipo in sesiones_disputadas(fechas)])
+
+
+def sesion_precargada(year, gp, tipo):
+    session = programador().resultado((year, gp, tipo))
+    contar_cache('precarga', session is not None)
+    return session
+
+
+def precalentar_temporada(year, tipos=('Q', 'R'), categorias=CATEGORIAS, max_workers=MAX_PRECARGAS_CONCURRENTES):
+    """
+    Carga todas las sesiones ya disputadas de la temporada para llenar la cache
+    de FastF1 (cache/) y el almacen columnar.
+
+    Returns:
+    - Lista de (gp, tipo, segundos, error o None).
+    """
+    trabajos = obtener_indice_calendario(year).sesiones_disputadas(tipos)
+
+    def cargar(trabajo):
+        gp, tipo = trabajo
+        inicio = time.perf_counter()
+        try:
+            cargar_sesion(year, gp, tipo, categorias=categorias)
+            error = None
+        except Exception as e:
+            error = str(e)
+        return gp, tipo, time.perf_counter() - inicio, error
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(cargar, trabajos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, nargs='+', required=True)
+    parser.add_argument('--tipos', nargs='+', default=['Q', 'R'], help="Tipos de sesion (Q, R, S, FP1...)")
+    parser.add_argument('--categorias', nargs='+', default=list(CATEGORIAS), choices=CATEGORIAS)
+    parser.add_argument('--workers', type=int, default=MAX_PRECARGAS_CONCURRENTES)
+    args = parser.parse_args()
+
+    configurar_cache('cache')
+    for year in args.years:
+        for gp, tipo, segundos, error in precalentar_temporada(year, args.tipos, args.categorias, args.workers):
+            estado = f"error ({error})" if error else "ok"
+            print(f"{year} {gp} {tipo}: {estado} en {segundos:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
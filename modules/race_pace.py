@@ -0,0 +1,111 @@
+import weakref
+import numpy as np
+from modules.session_manager import requiere_datos
+from modules.instrumentation import medir, contar_cache
+from modules.compact_session import vueltas_compactas, segundos as segundos_columna
+
+# Efecto del combustible en el tiempo de vuelta: segundos por vuelta de combustible
+# que queda a bordo (~0.03 s/vuelta con ~1.7 kg por vuelta)
+CORRECCION_COMBUSTIBLE = 0.03
+# Un stint necesita al menos este numero de vueltas validas para ajustar su pendiente
+MIN_VUELTAS_STINT = 5
+UMBRAL_VUELTAS_RAPIDAS = 1.07
+
+_tablas = weakref.WeakKeyDictionary()
+
+
+def vueltas_ritmo(laps, correccion_combustible=CORRECCION_COMBUSTIBLE):
+    """
+    Vueltas representativas del ritmo de carrera con el tiempo corregido por
+    combustible, a partir de session.laps o de su tabla compacta.
+
+    Se descartan las vueltas de entrada y salida de boxes, las que no son con
+    bandera verde, las que no tienen vida de neumatico, stint o compuesto y las
+    mas lentas que el 107% de la vuelta mas rapida de la sesion.
+
+    Returns:
+    - DataFrame con Driver, Team, Stint, Compound, LapNumber, TyreLife,
+      LapTimeSeconds y TiempoCorregido (s).
+    """
+    segundos = segundos_columna(laps, 'LapTime')
+    validas = (segundos.notna() & laps['TyreLife'].notna() & laps['Stint'].notna()
+               & laps['Driver'].notna() & laps['Compound'].notna()
+               & segundos_columna(laps, 'PitInTime').isna() & segundos_columna(laps, 'PitOutTime').isna()
+               & (laps['TrackStatus'] == '1')
+               & (segundos < segundos.min() * UMBRAL_VUELTAS_RAPIDAS))
+    # Sin corregir, el coche mas ligero al final enmascara la degradacion
+    vueltas_restantes = laps['LapNumber'].max() - laps['LapNumber'][validas]
+    vueltas = laps.loc[validas, ['Driver', 'Team', 'Stint', 'Compound', 'LapNumber', 'TyreLife']].assign(
+        LapTimeSeconds=segundos[validas],
+        TiempoCorregido=segundos[validas] - correccion_combustible * vueltas_restantes)
+    return vueltas.reset_index(drop=True)
+
+
+@medir()
+def ajustar_stints(vueltas, min_vueltas=MIN_VUELTAS_STINT):
+    """
+    Ajusta por minimos cuadrados TiempoCorregido = base + degradacion * TyreLife
+    para todos los (piloto, stint, compuesto) a la vez: las sumas de cada grupo
+    se acumulan con np.bincount, sin bucles por piloto.
+
+    Returns:
+    - DataFrame con una fila por stint: Driver, Team, Stint, Compound, Vueltas,
+      VueltaInicio, VueltaFin, VidaInicial, RitmoMedio (s), Degradacion (s/vuelta),
+      TiempoBase (s con neumatico nuevo) y R2.
+    """
+    claves = ['Driver', 'Stint', 'Compound']
+    # Las vueltas sin clave no tienen grupo (ngroup() las marcaria con NaN)
+    vueltas = vueltas.dropna(subset=claves)
+    grupos = vueltas.groupby(claves, sort=True, observed=True)
+    codigos = grupos.ngroup().to_numpy()
+    n_grupos = grupos.ngroups
+    x = vueltas['TyreLife'].to_numpy(dtype=float)
+    y = vueltas['TiempoCorregido'].to_numpy(dtype=float)
+
+    def suma(valores):
+        return np.bincount(codigos, weights=valores, minlength=n_grupos)
+
+    n = np.bincount(codigos, minlength=n_grupos).astype(float)
+    sx, sy, sxx, sxy, syy = suma(x), suma(y), suma(x * x), suma(x * y), suma(y * y)
+    var_x = n * sxx - sx ** 2
+    var_y = n * syy - sy ** 2
+    cov = n * sxy - sx * sy
+    with np.errstate(divide='ignore', invalid='ignore'):
+        degradacion = np.where(var_x > 0, cov / var_x, np.nan)
+        base = (sy - degradacion * sx) / n
+        r2 = np.where((var_x > 0) & (var_y > 0), cov ** 2 / (var_x * var_y), np.nan)
+
+    tabla = grupos.agg(Team=('Team', 'first'), Vueltas=('LapNumber', 'size'),
+                       VueltaInicio=('LapNumber', 'min'), VueltaFin=('LapNumber', 'max'),
+                       VidaInicial=('TyreLife', 'min'), RitmoMedio=('TiempoCorregido', 'mean'))
+    tabla['Degradacion'] = degradacion
+    tabla['TiempoBase'] = base
+    tabla['R2'] = r2
+    tabla = tabla.reset_index()
+    tabla = tabla[tabla['Vueltas'] >= min_vueltas].reset_index(drop=True)
+    columnas = ['Driver', 'Team', 'Stint', 'Compound', 'Vueltas', 'VueltaInicio', 'VueltaFin', 'VidaInicial',
+                'RitmoMedio', 'Degradacion', 'TiempoBase', 'R2']
+    return tabla[columnas]
+
+
+@requiere_datos('laps')
+def ritmo_carrera(session):
+    """
+    Tabla de stints de la sesion (ver ajustar_stints), calculada una vez por sesion.
+    """
+    contar_cache('ritmo_carrera', session in _tablas)
+    if session not in _tablas:
+        _tablas[session] = ajustar_stints(vueltas_ritmo(vueltas_compactas(session)))
+    return _tablas[session]
+
+
+def resumen_compuestos(tabla):
+    """
+    Degradacion media de cada compuesto ponderada por las vueltas de cada stint.
+    """
+    pesos = tabla['Vueltas'] * tabla['Degradacion'].notna()
+    resumen = tabla.assign(_pond=tabla['Degradacion'].fillna(0) * pesos, _pesos=pesos)
+    resumen = resumen.groupby('Compound', observed=True).agg(Stints=('Driver', 'size'), Vueltas=('Vueltas', 'sum'),
+                                                             _pond=('_pond', 'sum'), _pesos=('_pesos', 'sum'))
+    resumen['Degradacion'] = resumen['_pond'] / resumen['_pesos'].replace(0, np.nan)
+    return resumen.drop(columns=['_pond', '_pesos']).sort_values('Degradacion')
@@ -0,0 +1,126 @@
+import io
+import os
+import threading
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from fastf1.core import Session
+from modules.instrumentation import medir, tramo, contar_cache
+
+# Memoria maxima (MB) que puede ocupar la cache de imagenes PNG por proceso
+MEMORIA_MAXIMA_BYTES = int(os.environ.get('F1APP_RENDER_CACHE_MB', 64)) * 1024 * 1024
+# Mismos parametros que usa st.pyplot al codificar una figura
+DPI_PNG = 200
+
+
+class CacheImagenes:
+    """
+    Cache LRU de imagenes ya codificadas (bytes PNG) con un limite de memoria.
+    """
+
+    def __init__(self, memoria_maxima=MEMORIA_MAXIMA_BYTES):
+        self.memoria_maxima = memoria_maxima
+        self.memoria = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _tamano(valor):
+        return sum(len(png) for png in valor) if isinstance(valor, tuple) else len(valor)
+
+    def obtener(self, clave):
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                contar_cache('png', True)
+                return self._entradas[clave]
+            self.fallos += 1
+            contar_cache('png', False)
+            return None
+
+    def guardar(self, clave, valor):
+        tamano = self._tamano(valor)
+        if tamano > self.memoria_maxima:
+            return
+        with self._lock:
+            if clave in self._entradas:
+                self.memoria -= self._tamano(self._entradas.pop(clave))
+            self._entradas[clave] = valor
+            self.memoria += tamano
+            # Expulsa las entradas menos usadas hasta volver a estar bajo el limite
+            while self.memoria > self.memoria_maxima:
+                _, expulsada = self._entradas.popitem(last=False)
+                self.memoria -= self._tamano(expulsada)
+
+    def vaciar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.memoria = 0
+
+    def estadisticas(self):
+        return {'entradas': len(self._entradas), 'memoria_bytes': self.memoria,
+                'aciertos': self.aciertos, 'fallos': self.fallos}
+
+
+_cache = CacheImagenes()
+
+
+def _clave_argumento(arg):
+    # Convierte los argumentos de un grafico en una clave hashable y estable
+    if isinstance(arg, Session):
+        return ('session', arg.event.year, arg.event['EventName'], arg.name)
+    if isinstance(arg, np.ndarray):
+        return ('ndarray', arg.shape, str(arg.dtype), hashlib.sha1(np.ascontiguousarray(arg).tobytes()).hexdigest())
+    if isinstance(arg, dict):
+        return ('dict',) + tuple((k, _clave_argumento(v)) for k, v in sorted(arg.items()))
+    if isinstance(arg, (list, tuple)):
+        return ('seq',) + tuple(_clave_argumento(v) for v in arg)
+    # Cualquier otro argumento tiene que ser hashable (str, int, float...)
+    hash(arg)
+    return arg
+
+
+def figura_a_png(fig, dpi=DPI_PNG):
+    """
+    Codifica una figura de matplotlib como PNG y la cierra.
+    """
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    try:
+        with tramo('render_cache.savefig'):
+            fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+@medir()
+def renderizar_png(func, *args, **kwargs):
+    """
+    Ejecuta una funcion que devuelve una figura (o una tupla de figuras) de
+    matplotlib y devuelve sus PNG, reutilizando el resultado si ya se habia
+    generado con los mismos argumentos.
+
+    Returns:
+    - bytes PNG, o una tupla de bytes si la funcion devuelve varias figuras.
+    """
+    clave = (func.__module__, func.__qualname__,
+             _clave_argumento(args), _clave_argumento(kwargs))
+    imagen = _cache.obtener(clave)
+    if imagen is not None:
+        return imagen
+    resultado = func(*args, **kwargs)
+    if isinstance(resultado, tuple):
+        imagen = tuple(figura_a_png(fig) for fig in resultado)
+    else:
+        imagen = figura_a_png(resultado)
+    _cache.guardar(clave, imagen)
+    return imagen
+
+
+def estadisticas_cache():
+    return _cache.estadisticas()
@@ -0,0 +1,36 @@
+from modules.styles import registro_estilos
+
+
+def mejores_tiempos_clasificacion(results):
+    """
+    Mejor tiempo de clasificacion de cada piloto priorizando Q3, luego Q2 y
+    finalmente Q1 (version vectorizada de get_best_qualifying_time).
+    """
+    return results['Q3'].fillna(results['Q2']).fillna(results['Q1'])
+
+
+def procesar_resultados_clasificacion(results, session):
+    """
+    Procesa una tabla de resultados de clasificacion completa de una vez.
+
+    Parameters:
+    - results: session.results de una clasificacion.
+    - session: Sesion de FastF1 (para resolver los colores de equipo).
+
+    Returns:
+    - DataFrame ordenado de la pole al ultimo con las columnas añadidas
+      BestQualifyingTime, TimeDelta (s respecto a la pole) y ColorEquipo.
+    """
+    procesados = results.copy()
+    procesados['BestQualifyingTime'] = mejores_tiempos_clasificacion(procesados)
+    procesados = procesados.dropna(subset=['BestQualifyingTime'])
+    procesados = procesados.sort_values(by='BestQualifyingTime').reset_index(drop=True)
+    if procesados.empty:
+        procesados['TimeDelta'] = []
+        procesados['ColorEquipo'] = []
+        return procesados
+    pole_time = procesados['BestQualifyingTime'].iloc[0]
+    procesados['TimeDelta'] = (procesados['BestQualifyingTime'] - pole_time).dt.total_seconds()
+    colores = registro_estilos(session).colores_equipos(procesados['TeamName'].unique())
+    procesados['ColorEquipo'] = procesados['TeamName'].map(colores)
+    return procesados
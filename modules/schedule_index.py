@@ -0,0 +1,229 @@
+"""
+Indice del calendario por temporada: cada evento con su formato, ubicacion y las
+fechas (UTC) de sus sesiones en una sola tabla compacta, guardada en
+cache/calendario/<year>.parquet. Las temporadas pasadas no se vuelven a pedir;
+la temporada actual se refresca como mucho cada F1APP_CALENDARIO_TTL_HORAS.
+
+La tabla guarda tambien lo necesario para reconstruir el Event de FastF1 de
+cada evento (IndiceCalendario.evento), de modo que crear una sesion no necesita
+descargar ni parsear el calendario, ni siquiera sin conexion.
+"""
+import os
+import time
+import threading
+from datetime import datetime
+import pandas as pd
+from fastf1 import get_event_schedule
+from fastf1.events import Event
+from modules.instrumentation import tramo, contar_cache
+
+DIRECTORIO_CALENDARIO = os.path.join('cache', 'calendario')
+TTL_TEMPORADA_ACTUAL = float(os.environ.get('F1APP_CALENDARIO_TTL_HORAS', 6)) * 3600
+
+# Sesiones que se ofrecen para cada formato de evento, en el orden en que se disputan:
+# (etiqueta mostrada en la app, identificador de sesion de FastF1)
+SESIONES_POR_FORMATO = {
+    'conventional': (('FP1', 'FP1'), ('FP2', 'FP2'), ('FP3', 'FP3'), ('Qualy', 'Q'), ('Carrera', 'R')),
+    'sprint': (('FP1', 'FP1'), ('Qualy', 'Q'), ('FP2', 'FP2'), ('Sprint', 'S'), ('Carrera', 'R')),
+    'sprint_shootout': (('FP1', 'FP1'), ('Qualy', 'Q'), ('Sprint Shootout', 'SS'), ('Sprint', 'S'),
+                        ('Carrera', 'R')),
+    'sprint_qualifying': (('FP1', 'FP1'), ('Sprint Qualy', 'SQ'), ('Sprint', 'S'), ('Qualy', 'Q'),
+                          ('Carrera', 'R')),
+}
+COLUMNAS = ['EventName', 'RoundNumber', 'Location', 'Country', 'EventFormat', 'OfficialEventName', 'EventDate',
+            'F1ApiSupport', 'Orden', 'Sesion', 'NombreSesion', 'FechaLocal', 'FechaUtc']
+
+_lock = threading.Lock()
+
+
+def configurar_calendario(directorio):
+    # Directorio del indice por defecto (p. ej. dentro de otra cache de FastF1)
+    global DIRECTORIO_CALENDARIO
+    DIRECTORIO_CALENDARIO = directorio
+
+
+def _ruta(year, directorio):
+    return os.path.join(directorio, f'{year}.parquet')
+
+
+def _es_temporada_actual(year):
+    return year >= datetime.now().year
+
+
+def tabla_calendario(schedule):
+    """
+    Convierte un EventSchedule de FastF1 en la tabla del indice: una fila por
+    (evento, sesion). Los eventos con un formato desconocido quedan con una sola
+    fila sin sesion.
+    """
+    filas = []
+    for i in range(len(schedule)):
+        event = schedule.iloc[i]
+        base = [event['EventName'], int(event['RoundNumber']), event['Location'], event['Country'],
+                event['EventFormat'], event['OfficialEventName'], event['EventDate'], bool(event['F1ApiSupport'])]
+        sesiones = SESIONES_POR_FORMATO.get(event['EventFormat'])
+        if sesiones is None:
+            filas.append(base + [-1, None, None, None, pd.NaT])
+            continue
+        for orden, (etiqueta, identificador) in enumerate(sesiones):
+            try:
+                nombre = event.get_session_name(identificador)
+                fecha = event.get_session_date(identificador, utc=True)
+            except ValueError:
+                nombre, fecha = None, pd.NaT
+            try:
+                local = event.get_session_date(identificador)
+            except ValueError:
+                local = pd.NaT
+            # Cada evento tiene su huso horario: la fecha local se guarda como texto ISO
+            filas.append(base + [orden, etiqueta, nombre, None if pd.isnull(local) else local.isoformat(), fecha])
+    tabla = pd.DataFrame(filas, columns=COLUMNAS)
+    tabla['FechaUtc'] = pd.to_datetime(tabla['FechaUtc'])
+    tabla['EventDate'] = pd.to_datetime(tabla['EventDate'])
+    for columna in ('EventName', 'Location', 'Country', 'EventFormat', 'Sesion'):
+        tabla[columna] = tabla[columna].astype('category')
+    return tabla
+
+
+class IndiceCalendario:
+    """
+    Calendario de una temporada ya resuelto en diccionarios: seleccionar un
+    evento no vuelve a tocar FastF1.
+
+    - nombres: nombres de los eventos en orden de ronda.
+    - eventos: DataFrame con una fila por evento (ronda, ubicacion y formato).
+    """
+
+    def __init__(self, tabla, year=None):
+        self.tabla = tabla
+        self.year = year
+        self.eventos = (tabla.drop_duplicates('EventName')
+                        .sort_values('RoundNumber', kind='stable')
+                        [['EventName', 'RoundNumber', 'Location', 'Country', 'EventFormat']]
+                        .reset_index(drop=True))
+        self.nombres = self.eventos['EventName'].astype(str).tolist()
+        self._ubicaciones = {}
+        self._formatos = {}
+        for nombre, ubicacion, pais, formato in zip(self.nombres, self.eventos['Location'],
+                                                    self.eventos['Country'], self.eventos['EventFormat']):
+            self._ubicaciones[nombre] = f"{ubicacion}, {pais}"
+            self._formatos[nombre] = formato
+        self._fechas = {}
+        sesiones = tabla[tabla['Orden'] >= 0].sort_values(['RoundNumber', 'Orden'], kind='stable')
+        for nombre, etiqueta, fecha in zip(sesiones['EventName'], sesiones['Sesion'], sesiones['FechaUtc']):
+            self._fechas.setdefault(nombre, {})[etiqueta] = fecha
+
+    def ubicacion(self, gp):
+        # "Ciudad, País", el formato que espera la geocodificacion
+        return self._ubicaciones[gp]
+
+    def formato(self, gp):
+        return self._formatos[gp]
+
+    def fechas(self, gp):
+        """
+        Fechas UTC de las sesiones del evento, {etiqueta: Timestamp} en orden de
+        disputa, o None si el formato del evento no es conocido.
+        """
+        fechas = self._fechas.get(gp)
+        return dict(fechas) if fechas is not None else None
+
+    def sesiones_disputadas(self, tipos=None, ahora=None):
+        """
+        Sesiones de la temporada que ya se han disputado segun su fecha UTC.
+
+        Parameters:
+        - tipos: identificadores de FastF1 (Q, R, FP1...) a incluir; por defecto todos.
+        - ahora: instante de referencia, UTC sin zona horaria; por defecto el actual.
+
+        Returns:
+        - Lista de (gp, tipo) en orden de ronda y de disputa.
+        """
+        ahora = ahora if ahora is not None else pd.Timestamp.now('UTC').tz_localize(None)
+        sesiones = []
+        for gp in self.nombres:
+            identificadores = dict(SESIONES_POR_FORMATO.get(self._formatos[gp], ()))
+            for etiqueta, fecha in self._fechas.get(gp, {}).items():
+                tipo = identificadores[etiqueta]
+                if fecha <= ahora and (tipos is None or tipo in tipos):
+                    sesiones.append((gp, tipo))
+        return sesiones
+
+    def evento(self, gp):
+        """
+        Event de FastF1 del evento reconstruido desde la tabla, equivalente al de
+        get_event_schedule. Devuelve None si el evento no esta en el indice o su
+        formato no es conocido.
+        """
+        filas = self.tabla[(self.tabla['EventName'] == gp) & (self.tabla['Orden'] >= 0)]
+        if filas.empty:
+            return None
+        primera = filas.iloc[0]
+        datos = {columna: primera[columna] for columna in ('RoundNumber', 'Country', 'Location', 'OfficialEventName',
+                                                           'EventDate', 'EventName', 'EventFormat', 'F1ApiSupport')}
+        datos['RoundNumber'] = int(datos['RoundNumber'])
+        datos['F1ApiSupport'] = bool(datos['F1ApiSupport'])
+        filas = filas[filas['NombreSesion'].notna()].sort_values('Orden')
+        for n in range(1, 6):
+            datos[f'Session{n}'], datos[f'Session{n}Date'], datos[f'Session{n}DateUtc'] = '', pd.NaT, pd.NaT
+        for n, (nombre, local, fecha) in enumerate(zip(filas['NombreSesion'], filas['FechaLocal'],
+                                                       filas['FechaUtc']), start=1):
+            datos[f'Session{n}'] = nombre
+            datos[f'Session{n}Date'] = pd.Timestamp(local) if local else pd.NaT
+            datos[f'Session{n}DateUtc'] = fecha
+        return Event(datos, year=self.year or datos['EventDate'].year)
+
+
+def _leer(year, directorio):
+    ruta = _ruta(year, directorio)
+    if not os.path.exists(ruta):
+        return None, None
+    tabla = pd.read_parquet(ruta)
+    if not set(COLUMNAS) <= set(tabla.columns):
+        # Archivo de una version anterior del indice: se vuelve a generar
+        return None, None
+    return tabla, os.path.getmtime(ruta)
+
+
+def _guardar(year, tabla, directorio):
+    os.makedirs(directorio, exist_ok=True)
+    ruta = _ruta(year, directorio)
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    tabla.to_parquet(tmp, index=False)
+    os.replace(tmp, ruta)
+
+
+_indices = {}
+
+
+def obtener_indice_calendario(year, directorio=None):
+    """
+    Devuelve el IndiceCalendario de la temporada. Se construye una vez por
+    proceso a partir del archivo guardado y solo se pide de nuevo el calendario
+    a FastF1 si no existe o, en la temporada actual, si ha caducado.
+    """
+    directorio = directorio or DIRECTORIO_CALENDARIO
+    ahora = time.time()
+    entrada = _indices.get((year, directorio))
+    if entrada is not None and (not _es_temporada_actual(year) or ahora - entrada[0] < TTL_TEMPORADA_ACTUAL):
+        contar_cache('calendario', True)
+        return entrada[1]
+    contar_cache('calendario', False)
+
+    with _lock:
+        tabla, modificado = _leer(year, directorio)
+        caducado = tabla is None or (_es_temporada_actual(year) and ahora - modificado >= TTL_TEMPORADA_ACTUAL)
+        if caducado:
+            try:
+                with tramo('fastf1.get_event_schedule', year=year):
+                    tabla = tabla_calendario(get_event_schedule(year, include_testing=False))
+                _guardar(year, tabla, directorio)
+                modificado = ahora
+            except Exception:
+                # Sin red se sigue usando el calendario guardado hasta el siguiente TTL
+                if tabla is None:
+                    raise
+                modificado = ahora
+        indice = IndiceCalendario(tabla, year)
+        _indices[(year, directorio)] = (modificado, indice)
+    return indice
@@ -0,0 +1,257 @@
+"""
+Tendencias de ritmo de una temporada: para cada evento disputado se resume una
+vez el ritmo por equipo de la clasificacion y de la carrera (mediana de las
+vueltas rapidas, mejor tiempo y diferencias con el mejor) y se guarda en
+cache/tendencias/<year>.parquet en cuanto termina cada evento. Las consultas
+siguientes solo leen ese archivo. Los eventos que fallan se anotan en
+cache/tendencias/<year>_errores.json y no se reintentan hasta pasado
+REINTENTO_ERRORES_S.
+
+Los eventos se resumen en paralelo en procesos separados (un pool creado por
+modules.season_trends_worker) a partir del almacen columnar
+(modules.session_store); los que aun no estan almacenados se cargan con FastF1
+desde su cache.
+
+Uso (desde la raiz del repositorio, para calcularlas fuera de la app):
+    python -m modules.season_trends --years 2024 [--tipos Q R] [--workers 4] [--reintentar]
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+import pandas as pd
+from modules import session_store
+from modules.session_manager import cargar_sesion
+from modules.schedule_index import obtener_indice_calendario
+from modules.results_processing import mejores_tiempos_clasificacion
+from modules.utils import configurar_cache
+from modules.instrumentation import medir
+
+DIRECTORIO_TENDENCIAS = os.path.join('cache', 'tendencias')
+MAX_PROCESOS = max(1, min(4, (os.cpu_count() or 1) - 1))
+COLUMNAS = ['Ronda', 'Evento', 'Sesion', 'Team', 'Vueltas', 'Mediana', 'GapMediana', 'GapPct',
+            'MejorTiempo', 'GapMejor', 'GapMejorPct']
+# Metricas que se pueden representar con grafico_tendencias_temporada
+METRICAS = {
+    'GapPct': 'Diferencia de la mediana con el más rápido (%)',
+    'GapMediana': 'Diferencia de la mediana con el más rápido (s)',
+    'GapMejorPct': 'Diferencia del mejor tiempo con el mejor (%)',
+    'GapMejor': 'Diferencia del mejor tiempo con el mejor (s)',
+}
+
+# Segundos durante los que no se vuelve a intentar resumir un evento que ha fallado
+REINTENTO_ERRORES_S = 60 * 60
+
+# Protege los archivos de la temporada y _en_curso; no se mantiene mientras se
+# resumen los eventos, para no bloquear a otros usuarios
+_lock = threading.Lock()
+# (year, ronda, tipo) que esta resumiendo alguna llamada de este proceso
+_en_curso = set()
+
+
+def _ruta(year, directorio):
+    return os.path.join(directorio, f'{year}.parquet')
+
+
+def _ruta_errores(year, directorio):
+    return os.path.join(directorio, f'{year}_errores.json')
+
+
+def _leer_errores(year, directorio):
+    # "ronda_tipo" -> {'gp', 'ronda', 'tipo', 'error', 'fecha' (epoch)}
+    ruta = _ruta_errores(year, directorio)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _escribir_errores(errores, year, directorio):
+    ruta = _ruta_errores(year, directorio)
+    os.makedirs(directorio, exist_ok=True)
+    tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(errores, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, ruta)
+
+
+def _escribir_atomico(df, ruta):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, ruta)
+
+
+def _resumir_eventos(year, pendientes, max_workers, cache_dir):
+    """
+    Resume los eventos en paralelo en un pool de procesos (spawn) que crea un
+    proceso anfitrion aparte, modules.season_trends_worker: un pool creado en
+    este proceso volveria a ejecutar en cada proceso nuevo el __main__, que
+    dentro de Streamlit es el script de la app.
+
+    Yields:
+    - (gp, ronda, tipo, resumen o None, error o None) en el orden en que terminan.
+    """
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [raiz, os.environ.get('PYTHONPATH')])))
+    peticion = {'year': year, 'pendientes': [list(p) for p in pendientes], 'max_workers': max_workers,
+                'cache_dir': cache_dir}
+    restantes = {(ronda, tipo): gp for gp, ronda, tipo in pendientes}
+    with subprocess.Popen([sys.executable, '-m', 'modules.season_trends_worker'], stdin=subprocess.PIPE,
+                          stdout=subprocess.PIPE, encoding='utf-8', env=entorno) as proceso:
+        proceso.stdin.write(json.dumps(peticion, ensure_ascii=False))
+        proceso.stdin.close()
+        for linea in proceso.stdout:
+            registro = json.loads(linea)
+            restantes.pop((registro['ronda'], registro['tipo']), None)
+            resumen = registro['resumen']
+            if resumen is not None:
+                resumen = pd.read_json(io.StringIO(resumen), orient='split')
+            yield registro['gp'], registro['ronda'], registro['tipo'], resumen, registro['error']
+    # El proceso anfitrion murio (p. ej. sin memoria) antes de resumir estos eventos
+    for (ronda, tipo), gp in restantes.items():
+        yield gp, ronda, tipo, None, f"El proceso de resumen termino con codigo {proceso.returncode}"
+
+
+def resumen_evento(year, gp, ronda, session_type):
+    """
+    Ritmo por equipo de una sesion: mediana de las vueltas rapidas (del resumen
+    de modules.pace_summary) y mejor tiempo (en clasificacion el mejor de Q1-Q3,
+    en carrera la vuelta rapida), con sus diferencias respecto al mejor equipo.
+    """
+    if not session_store.sesion_almacenada(year, gp, session_type):
+        cargar_sesion(year, gp, session_type)
+    ritmo = session_store.leer_tabla(year, gp, session_type, 'ritmo')
+    equipos = ritmo.loc[ritmo['Nivel'] == 'Team', ['Team', 'Vueltas', 'Mediana', 'GapMediana', 'GapPct', 'Minimo']]
+    equipos = equipos.reset_index(drop=True)
+    if session_type == 'Q':
+        results = session_store.leer_tabla(year, gp, session_type, 'results', ['TeamName', 'Q1', 'Q2', 'Q3'])
+        mejores = mejores_tiempos_clasificacion(results).dt.total_seconds().groupby(results['TeamName']).min()
+        equipos['MejorTiempo'] = equipos['Team'].map(mejores)
+    else:
+        equipos['MejorTiempo'] = equipos['Minimo']
+    equipos['GapMejor'] = equipos['MejorTiempo'] - equipos['MejorTiempo'].min()
+    equipos['GapMejorPct'] = 100 * equipos['GapMejor'] / equipos['MejorTiempo'].min()
+    equipos['Ronda'] = ronda
+    equipos['Evento'] = gp
+    equipos['Sesion'] = session_type
+    return equipos[COLUMNAS]
+
+
+def eventos_disputados(year, tipos=('Q', 'R'), ahora=None):
+    # (gp, ronda, tipo) de las sesiones de la temporada que ya se han disputado
+    calendario = obtener_indice_calendario(year)
+    rondas = dict(zip(calendario.eventos['EventName'].astype(str), calendario.eventos['RoundNumber']))
+    return [(gp, int(rondas[gp]), tipo) for gp, tipo in calendario.sesiones_disputadas(tipos, ahora)]
+
+
+def leer_tendencias(year, directorio=DIRECTORIO_TENDENCIAS):
+    ruta = _ruta(year, directorio)
+    return pd.read_parquet(ruta) if os.path.exists(ruta) else pd.DataFrame(columns=COLUMNAS)
+
+
+@medir()
+def obtener_tendencias(year, tipos=('Q', 'R'), max_workers=MAX_PROCESOS, cache_dir='cache',
+                       directorio=DIRECTORIO_TENDENCIAS, al_terminar=None, reintento_errores=REINTENTO_ERRORES_S):
+    """
+    Resumenes por equipo de todas las sesiones disputadas de la temporada,
+    calculando en paralelo solo los eventos que aun no estan guardados. Cada
+    evento se añade al archivo en cuanto termina.
+
+    Parameters:
+    - tipos: Sesiones que se resumen ('Q', 'R').
+    - max_workers: Numero maximo de procesos.
+    - cache_dir: Cache de FastF1 que usan los procesos para las sesiones no almacenadas.
+    - al_terminar: funcion llamada con (gp, tipo, segundos, error o None) por evento.
+    - reintento_errores: Segundos tras los que se reintenta un evento que ha fallado.
+
+    Returns:
+    - tendencias: DataFrame con COLUMNAS, ordenado por sesion, ronda y mediana.
+    - errores: Lista de (gp, tipo, error) de los eventos que no se han podido
+      resumir (en esta llamada o en una anterior aun sin reintentar).
+    """
+    ahora = time.time()
+    with _lock:
+        tendencias = leer_tendencias(year, directorio)
+        hechos = set(zip(tendencias['Ronda'], tendencias['Sesion']))
+        recientes = {clave: e for clave, e in _leer_errores(year, directorio).items()
+                     if ahora - e['fecha'] < reintento_errores}
+        # Los eventos que ya resume otra llamada (otro usuario) no se vuelven a lanzar
+        pendientes = [(gp, ronda, tipo) for gp, ronda, tipo in eventos_disputados(year, tipos)
+                      if (ronda, tipo) not in hechos and f'{ronda}_{tipo}' not in recientes
+                      and (year, ronda, tipo) not in _en_curso]
+        _en_curso.update((year, ronda, tipo) for _, ronda, tipo in pendientes)
+    errores = [(e['gp'], e['tipo'], e['error']) for e in recientes.values() if e['tipo'] in tipos]
+    try:
+        if pendientes:
+            inicio = time.perf_counter()
+            for gp, ronda, tipo, resumen, error in _resumir_eventos(year, pendientes, max_workers, cache_dir):
+                if error is not None:
+                    errores.append((gp, tipo, error))
+                # Se relee el archivo: otras llamadas pueden haber añadido eventos
+                with _lock:
+                    fallidos = _leer_errores(year, directorio)
+                    if error is None:
+                        tendencias = leer_tendencias(year, directorio)
+                        partes = [resumen] if tendencias.empty else [tendencias, resumen]
+                        _escribir_atomico(pd.concat(partes, ignore_index=True), _ruta(year, directorio))
+                        if fallidos.pop(f'{ronda}_{tipo}', None) is not None:
+                            _escribir_errores(fallidos, year, directorio)
+                    else:
+                        fallidos[f'{ronda}_{tipo}'] = {'gp': gp, 'ronda': ronda, 'tipo': tipo, 'error': error,
+                                                       'fecha': time.time()}
+                        _escribir_errores(fallidos, year, directorio)
+                    _en_curso.discard((year, ronda, tipo))
+                if al_terminar is not None:
+                    al_terminar(gp, tipo, time.perf_counter() - inicio, error)
+    finally:
+        with _lock:
+            _en_curso.difference_update((year, ronda, tipo) for _, ronda, tipo in pendientes)
+    with _lock:
+        tendencias = leer_tendencias(year, directorio)
+    tendencias = tendencias[tendencias['Sesion'].isin(tipos)]
+    return tendencias.sort_values(['Sesion', 'Ronda', 'Mediana'], kind='stable').reset_index(drop=True), errores
+
+
+def tabla_tendencia(tendencias, session_type='R', metrica='GapPct'):
+    """
+    Tabla ronda x equipo de una metrica, p. ej. la diferencia de la mediana de
+    clasificacion con el mejor equipo a lo largo de la temporada.
+    """
+    datos = tendencias[tendencias['Sesion'] == session_type]
+    tabla = datos.pivot_table(index=['Ronda', 'Evento'], columns='Team', values=metrica, observed=True)
+    # Equipos de menor a mayor valor medio en la temporada
+    return tabla[tabla.mean().sort_values().index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, nargs='+', required=True)
+    parser.add_argument('--tipos', nargs='+', default=['Q', 'R'], choices=['Q', 'R'])
+    parser.add_argument('--workers', type=int, default=MAX_PROCESOS)
+    parser.add_argument('--reintentar', action='store_true',
+                        help="Reintentar ya los eventos que fallaron (sin esperar REINTENTO_ERRORES_S)")
+    args = parser.parse_args()
+
+    configurar_cache('cache')
+    for year in args.years:
+        inicio = time.perf_counter()
+
+        def informar(gp, tipo, segundos, error):
+            print(f"{year} {gp} {tipo}: {'error (' + error + ')' if error else 'ok'} a los {segundos:.1f} s",
+                  flush=True)
+
+        tendencias, errores = obtener_tendencias(year, args.tipos, args.workers, al_terminar=informar,
+                                                 reintento_errores=0 if args.reintentar else REINTENTO_ERRORES_S)
+        print(f"{year}: {tendencias[['Ronda', 'Sesion']].drop_duplicates().shape[0]} sesiones resumidas, "
+              f"{len(errores)} errores, {time.perf_counter() - inicio:.1f} s")
+        for tipo in args.tipos:
+            print(tabla_tendencia(tendencias, tipo).round(2).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Proceso anfitrion del pool de modules.season_trends.
+
+Con spawn cada proceso nuevo vuelve a ejecutar el __main__ del proceso que crea
+el pool; dentro de Streamlit es el script de la app. Por eso la app no crea el
+pool: lanza este modulo con `python -m modules.season_trends_worker`, que crea
+el pool siendo el __main__ (y los procesos del pool lo importan sin ejecutar nada).
+
+Lee de la entrada estandar un JSON con year, pendientes [(gp, ronda, tipo)],
+max_workers y cache_dir, y escribe en la salida estandar una linea JSON por
+evento en cuanto termina: gp, ronda, tipo, resumen (DataFrame en formato
+'split') y error.
+"""
+import os
+import sys
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from modules.season_trends import resumen_evento
+from modules.utils import configurar_cache
+
+
+def main():
+    peticion = json.load(sys.stdin)
+    # Los resultados van por la salida original; lo que impriman este proceso y
+    # los del pool (que la heredan) se desvia a stderr para no mezclarse
+    salida = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    year, pendientes = peticion['year'], peticion['pendientes']
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(peticion['max_workers'], len(pendientes)), mp_context=contexto,
+                             initializer=configurar_cache, initargs=(peticion['cache_dir'],)) as pool:
+        futuros = {pool.submit(resumen_evento, year, gp, ronda, tipo): (gp, ronda, tipo)
+                   for gp, ronda, tipo in pendientes}
+        for futuro in as_completed(futuros):
+            gp, ronda, tipo = futuros[futuro]
+            try:
+                resumen, error = futuro.result().to_json(orient='split', index=False), None
+            except Exception as e:
+                resumen, error = None, f"{type(e).__name__}: {e}"
+            salida.write(json.dumps({'gp': gp, 'ronda': ronda, 'tipo': tipo, 'resumen': resumen, 'error': error},
+                                    ensure_ascii=False) + '\n')
+            salida.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+import time
+import threading
+import weakref
+import functools
+from collections import Counter, defaultdict
+import pandas as pd
+from fastf1 import get_session
+from modules import session_store, shared_telemetry
+from modules.compact_session import compactar_telemetria
+from modules.schedule_index import obtener_indice_calendario
+from modules.instrumentation import medir, tramo
+
+# Categorias de datos que FastF1 puede cargar de una sesion
+CATEGORIAS = ('laps', 'telemetry', 'weather', 'messages')
+# La telemetria necesita las vueltas ya cargadas (FastF1 añade LapStartDate a las vueltas)
+_DEPENDENCIAS = {'telemetry': ('laps',)}
+
+# Cargadores incrementales para una sesion que ya tiene las vueltas cargadas:
+# metodos privados de Session (FastF1 3.4, ver requirements.txt). Si la version
+# instalada no tiene alguno se recurre a Session.load (ver _carga_incremental)
+_CARGADORES = {
+    'telemetry': '_load_telemetry',
+    'weather': '_load_weather_data',
+    'messages': '_load_race_control_messages',
+}
+# Tras cargar los mensajes: marcan vueltas anuladas y calculan los resultados de clasificacion
+_TRAS_MENSAJES = ('_set_laps_deleted_from_rcm', '_calculate_quali_like_session_results')
+
+
+class _EstadoCarga:
+    def __init__(self, clave=None):
+        self.categorias = set()
+        self.clave = clave
+        self.lock = threading.Lock()
+
+
+_estados = weakref.WeakKeyDictionary()
+_estados_lock = threading.Lock()
+
+# Contadores globales del proceso: peticiones por categoria, parseos reales,
+# parseos redundantes (categoria ya cargada que se vuelve a procesar), cargas
+# desde el almacen columnar (sin FastF1) y tiempo
+_peticiones = Counter()
+_parseos = Counter()
+_parseos_redundantes = Counter()
+_desde_almacen = Counter()
+_segundos = defaultdict(float)
+
+
+def _estado(session, clave=None):
+    with _estados_lock:
+        estado = _estados.get(session)
+        if estado is None:
+            estado = _EstadoCarga(clave)
+            _estados[session] = estado
+        elif clave is not None and estado.clave is None:
+            estado.clave = clave
+        return estado
+
+
+def categorias_cargadas(session):
+    estado = _estados.get(session)
+    return frozenset(estado.categorias) if estado else frozenset()
+
+
+def _carga_incremental(session, categorias):
+    # La sesion tiene los metodos privados que cargan `categorias` por separado
+    metodos = [_CARGADORES[categoria] for categoria in categorias]
+    if 'messages' in categorias:
+        metodos.extend(_TRAS_MENSAJES)
+    return all(callable(getattr(session, metodo, None)) for metodo in metodos)
+
+
+def asegurar_datos(session, *categorias):
+    """
+    Carga en la sesion solo las categorias de datos que aun no esten cargadas.
+
+    Parameters:
+    - session: Sesion de FastF1.
+    - categorias: Cualquier combinacion de 'laps', 'telemetry', 'weather', 'messages'.
+
+    Returns:
+    - session: La misma sesion, con las categorias pedidas disponibles.
+    """
+    pedidas = set(categorias)
+    desconocidas = pedidas - set(CATEGORIAS)
+    if desconocidas:
+        raise ValueError(f"Categorias desconocidas: {sorted(desconocidas)}. Opciones: {CATEGORIAS}")
+    for categoria in categorias:
+        pedidas.update(_DEPENDENCIAS.get(categoria, ()))
+
+    estado = _estado(session)
+    with estado.lock:
+        _peticiones.update(pedidas)
+        faltan = pedidas - estado.categorias
+        if not faltan:
+            return session
+
+        inicio = time.perf_counter()
+        # Con el almacen compartido la telemetria no la procesa FastF1 en cada
+        # proceso: se abre del almacen (o la carga y escribe un solo proceso)
+        compartida = estado.clave is not None and shared_telemetry.ACTIVO
+        if (not estado.categorias or 'laps' in faltan
+                or not _carga_incremental(session, faltan - {'telemetry'} if compartida else faltan)):
+            # Primera carga (o faltan las vueltas, o esta version de FastF1 no
+            # permite cargar lo que falta por separado): una sola llamada a load()
+            # con todo lo necesario. Lo que ya estuviera cargado se vuelve a procesar.
+            todas = estado.categorias | faltan
+            de_fastf1 = todas - {'telemetry'} if compartida else todas
+            with tramo('fastf1.load', categorias=','.join(sorted(de_fastf1))):
+                session.load(laps='laps' in de_fastf1, telemetry='telemetry' in de_fastf1,
+                             weather='weather' in de_fastf1, messages='messages' in de_fastf1)
+            _parseos_redundantes.update(estado.categorias & de_fastf1)
+            procesadas = todas
+        else:
+            de_fastf1 = faltan - {'telemetry'} if compartida else faltan
+            if 'telemetry' in de_fastf1 and estado.clave is not None:
+                # Telemetria ya guardada en el almacen columnar: se lee de el
+                with tramo('almacen.telemetry'):
+                    if session_store.abrir_telemetria(session, *estado.clave):
+                        de_fastf1 = de_fastf1 - {'telemetry'}
+                        _desde_almacen['telemetry'] += 1
+            for categoria in CATEGORIAS:
+                if categoria in de_fastf1:
+                    with tramo(f'fastf1.{categoria}'):
+                        getattr(session, _CARGADORES[categoria])()
+            if 'messages' in faltan:
+                for metodo in _TRAS_MENSAJES:
+                    getattr(session, metodo)()
+            procesadas = faltan
+        if compartida and 'telemetry' in procesadas:
+            if shared_telemetry.cargar_telemetria(session, *estado.clave):
+                de_fastf1 = de_fastf1 | {'telemetry'}
+        duracion = time.perf_counter() - inicio
+
+        _parseos.update(de_fastf1)
+        for categoria in procesadas:
+            _segundos[categoria] += duracion / len(procesadas)
+        estado.categorias |= procesadas
+
+        if 'telemetry' in procesadas:
+            # La telemetria de FastF1 (float64, timedelta, object) se sustituye por
+            # la compacta antes de guardarla: ocupa varias veces menos en memoria
+            compactar_telemetria(session)
+        # Solo se reescriben en el almacen las tablas que cambian con lo cargado
+        tablas = {tabla for categoria in procesadas for tabla in session_store.TABLAS_POR_CATEGORIA[categoria]}
+        if estado.clave is not None and tablas:
+            session_store.guardar_sesion(session, *estado.clave, tablas=tablas)
+    return session
+
+
+@medir()
+def crear_sesion(year, gp, session_type):
+    """
+    Sesion de FastF1 sin cargar. Si el evento esta en el indice del calendario se
+    crea desde el (sin pedir el calendario a FastF1, tambien sin conexion);
+    si no, con fastf1.get_session.
+    """
+    try:
+        evento = obtener_indice_calendario(year).evento(gp)
+    except Exception:
+        evento = None
+    if evento is None:
+        return get_session(year, gp, session_type)
+    return evento.get_session(session_type)
+
+
+@medir()
+def cargar_sesion(year, gp, session_type, categorias=('laps', 'messages'), desde_almacen=False):
+    """
+    Crea la sesion de FastF1, carga las categorias pedidas y la publica en el
+    almacen columnar.
+
+    Con desde_almacen=True, si la sesion ya esta en el almacen sus vueltas,
+    resultados y mensajes se leen de el (session_store.abrir_sesion) en lugar de
+    cargarlos con FastF1; solo se cargan las categorias que el almacen no tenga.
+    La sesion abierta asi no tiene session_info, track_status ni session_status.
+    """
+    session = crear_sesion(year, gp, session_type)
+    estado = _estado(session, clave=(year, gp, session_type))
+    if desde_almacen:
+        with estado.lock:
+            with tramo('almacen.abrir_sesion'):
+                abiertas = session_store.abrir_sesion(session, year, gp, session_type)
+            _desde_almacen.update(abiertas)
+            estado.categorias |= abiertas
+    return asegurar_datos(session, *categorias)
+
+
+def requiere_datos(*categorias):
+    """
+    Decorador para funciones cuyo primer argumento es una sesion: declara las
+    categorias de datos que necesitan y las carga de forma incremental.
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def envoltorio(session, *args, **kwargs):
+            asegurar_datos(session, *categorias)
+            return func(session, *args, **kwargs)
+        envoltorio.categorias_requeridas = categorias
+        return envoltorio
+    return decorador
+
+
+def informe_carga():
+    """
+    Devuelve un DataFrame con, por categoria, las peticiones recibidas, los
+    parseos reales, los parseos redundantes, las cargas desde el almacen
+    columnar y el tiempo total de parseo.
+    """
+    return pd.DataFrame({
+        'peticiones': [_peticiones[c] for c in CATEGORIAS],
+        'parseos': [_parseos[c] for c in CATEGORIAS],
+        'parseos_redundantes': [_parseos_redundantes[c] for c in CATEGORIAS],
+        'desde_almacen': [_desde_almacen[c] for c in CATEGORIAS],
+        'segundos': [round(_segundos[c], 3) for c in CATEGORIAS],
+    }, index=pd.Index(CATEGORIAS, name='categoria'))
+
+
+def reiniciar_informe():
+    for contador in (_peticiones, _parseos, _parseos_redundantes, _desde_almacen, _segundos):
+        contador.clear()
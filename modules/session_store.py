@@ -0,0 +1,276 @@
+import os
+import json
+import re
+import pandas as pd
+from fastf1.core import Laps, SessionResults
+from modules.pace_summary import resumen_ritmo, resumen_sesion
+from modules.compact_session import TIPOS_TELEMETRIA, TelemetriaCompacta, compactar_telemetria
+from modules.instrumentation import medir
+
+# Almacen columnar de sesiones: cada sesion se guarda como ficheros Parquet
+# independientes (vueltas, resultados, mensajes de carrera y telemetria compacta
+# por piloto) para poder leer solo las tablas o columnas que hagan falta. Las
+# vistas que no necesitan la sesion leen las tablas (listas de pilotos de la app
+# con data_loading.cargar_tabla_sesion, tendencias de temporada) y abrir_sesion
+# rellena con ellas una Session de FastF1 sin Session.load, asi que en un proceso
+# nuevo los graficos de una sesion ya guardada no vuelven a parsear los datos de
+# FastF1; su telemetria se lee del almacen cuando un grafico la pide
+# (abrir_telemetria). El estado de pista y de la sesion y el tiempo no se guardan.
+DIRECTORIO_ALMACEN = os.path.join('cache', 'columnar')
+
+# 'ritmo' es el resumen de ritmo por equipo y piloto (modules.pace_summary) y
+# 'messages' los mensajes de direccion de carrera
+TABLAS = ('laps', 'results', 'ritmo', 'messages')
+# Tablas del almacen que cambian al cargar cada categoria de datos de FastF1: los
+# mensajes de carrera marcan vueltas anuladas y completan los resultados, y el
+# tiempo no se almacena
+TABLAS_POR_CATEGORIA = {
+    'laps': ('laps', 'results', 'ritmo'),
+    'messages': TABLAS,
+    'telemetry': ('telemetry',),
+    'weather': (),
+}
+
+
+def _normalizar_nombre(nombre):
+    return re.sub(r'[^0-9a-zA-Z]+', '_', str(nombre)).strip('_')
+
+
+def ruta_sesion(year, gp, session_type, directorio=DIRECTORIO_ALMACEN):
+    return os.path.join(directorio, str(year), _normalizar_nombre(gp), str(session_type))
+
+
+def _escribir_atomico(df, ruta):
+    # Se escribe en un fichero temporal y se renombra para que otro proceso
+    # nunca lea un Parquet a medio escribir
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, ruta)
+
+
+def sesion_almacenada(year, gp, session_type, directorio=DIRECTORIO_ALMACEN):
+    return os.path.exists(os.path.join(ruta_sesion(year, gp, session_type, directorio), 'meta.json'))
+
+
+@medir()
+def guardar_sesion(session, year, gp, session_type, directorio=DIRECTORIO_ALMACEN, tablas=None):
+    """
+    Persiste las vueltas, los resultados y los mensajes y la telemetria (si estan
+    cargados) de una sesion de FastF1 en formato Parquet.
+
+    Parameters:
+    - session: Sesion de FastF1 ya cargada.
+    - year, gp, session_type: Clave de la sesion en el almacen.
+    - tablas: Solo estas tablas (de TABLAS o 'telemetry'), p. ej. las que cambian al
+      cargar una categoria (TABLAS_POR_CATEGORIA). Por defecto, y siempre que la
+      sesion aun no este almacenada, todas.
+
+    Returns:
+    - ruta: Directorio donde se ha guardado la sesion.
+    """
+    ruta = ruta_sesion(year, gp, session_type, directorio)
+    os.makedirs(os.path.join(ruta, 'telemetry'), exist_ok=True)
+    anterior = leer_metadatos(year, gp, session_type, directorio) if sesion_almacenada(
+        year, gp, session_type, directorio) else None
+    if anterior is None:
+        tablas = None
+
+    def escribir(tabla):
+        return tablas is None or tabla in tablas
+
+    if escribir('laps'):
+        _escribir_atomico(pd.DataFrame(session.laps), os.path.join(ruta, 'laps.parquet'))
+    if escribir('results'):
+        _escribir_atomico(pd.DataFrame(session.results), os.path.join(ruta, 'results.parquet'))
+    if escribir('ritmo'):
+        _escribir_atomico(resumen_sesion(session), os.path.join(ruta, 'ritmo.parquet'))
+    mensajes = hasattr(session, '_race_control_messages')
+    if escribir('messages') and mensajes:
+        _escribir_atomico(pd.DataFrame(session.race_control_messages), os.path.join(ruta, 'messages.parquet'))
+    if escribir('laps'):
+        # Categorias de FastF1 cuyo efecto recogen las vueltas y los resultados guardados
+        categorias = ['laps', 'messages'] if mensajes else ['laps']
+    else:
+        categorias = anterior.get('categorias', [])
+
+    if escribir('results'):
+        pilotos = {}
+        for _, fila in session.results.iterrows():
+            pilotos[fila['Abbreviation']] = str(fila['DriverNumber'])
+    else:
+        pilotos = anterior['pilotos']
+
+    # La telemetria que ya esta en el almacen (guardada por este u otro proceso)
+    # no se reescribe cada vez que se carga otra categoria de la sesion
+    guardada = set(anterior['telemetria']) if anterior else set()
+    telemetria = []
+    tipos_telemetria = dict(anterior.get('tipos_telemetria', {})) if anterior else {}
+    if escribir('telemetry') and not set(TIPOS_TELEMETRIA) <= guardada:
+        # Se escriben las tablas compactas (modules.compact_session) y los tipos
+        # originales de cada piloto: nunca se reconstruye la Telemetry de FastF1
+        compactar_telemetria(session)
+    for tipo, atributo in TIPOS_TELEMETRIA.items():
+        datos = getattr(session, atributo, None)
+        if tipo in guardada:
+            telemetria.append(tipo)
+        elif datos and escribir('telemetry'):
+            for numero in datos:
+                _escribir_atomico(datos.tabla(numero), os.path.join(ruta, 'telemetry', f'{tipo}_{numero}.parquet'))
+            tipos_telemetria[tipo] = {numero: {columna: str(dtype) for columna, dtype in
+                                               datos.tipos_originales(numero).items()} for numero in datos}
+            telemetria.append(tipo)
+
+    def previo(clave):
+        return anterior.get(clave) if anterior else None
+
+    inicio = getattr(session, '_session_start_time', None)
+    t0 = getattr(session, '_t0_date', None)
+    total_vueltas = getattr(session, '_total_laps', None)
+    meta = {
+        'year': year,
+        'gp': gp,
+        'session_type': session_type,
+        'event_name': session.event['EventName'],
+        'round': int(session.event['RoundNumber']),
+        'session_name': session.name,
+        'pilotos': pilotos,
+        'categorias': categorias,
+        'telemetria': telemetria,
+        'tipos_telemetria': tipos_telemetria,
+        # Lo que Session.load fija en la sesion ademas de las tablas
+        'session_start_time': str(inicio) if inicio is not None else previo('session_start_time'),
+        'total_laps': int(total_vueltas) if total_vueltas is not None else previo('total_laps'),
+        't0_date': pd.Timestamp(t0).isoformat() if t0 is not None else previo('t0_date'),
+    }
+    # meta.json se escribe el ultimo: su presencia indica que la sesion esta completa
+    tmp = os.path.join(ruta, f'meta.json.{os.getpid()}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(ruta, 'meta.json'))
+    return ruta
+
+
+def leer_metadatos(year, gp, session_type, directorio=DIRECTORIO_ALMACEN):
+    with open(os.path.join(ruta_sesion(year, gp, session_type, directorio), 'meta.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+@medir()
+def abrir_sesion(session, year, gp, session_type, directorio=DIRECTORIO_ALMACEN):
+    """
+    Rellena una sesion de FastF1 sin cargar con las vueltas, los resultados y los
+    mensajes de carrera del almacen, como los deja Session.load, sin volver a
+    parsear los datos de FastF1. La telemetria se abre aparte (abrir_telemetria).
+
+    Returns:
+    - Categorias de datos ('laps', 'messages') que quedan cargadas en la sesion;
+      vacio si la sesion no esta en el almacen o se guardo sin ellas.
+    """
+    if not sesion_almacenada(year, gp, session_type, directorio):
+        return set()
+    meta = leer_metadatos(year, gp, session_type, directorio)
+    categorias = set(meta.get('categorias', ()))
+    if 'laps' not in categorias:
+        return set()
+    ruta = ruta_sesion(year, gp, session_type, directorio)
+    results = pd.read_parquet(os.path.join(ruta, 'results.parquet'))
+    # FastF1 indexa los resultados por numero de piloto
+    results.index = results['DriverNumber'].to_numpy()
+    session._results = SessionResults(results)
+    session._laps = Laps(pd.read_parquet(os.path.join(ruta, 'laps.parquet')), session=session)
+    if meta.get('session_start_time') is not None:
+        session._session_start_time = pd.Timedelta(meta['session_start_time'])
+    session._total_laps = meta.get('total_laps')
+    if 'messages' in categorias:
+        session._race_control_messages = pd.read_parquet(os.path.join(ruta, 'messages.parquet'))
+    return categorias
+
+
+@medir()
+def abrir_telemetria(session, year, gp, session_type, directorio=DIRECTORIO_ALMACEN):
+    """
+    Pone en la sesion la telemetria compacta del almacen (TelemetriaCompacta) y,
+    como FastF1 al cargarla, fija t0_date y añade LapStartDate a las vueltas.
+
+    Returns:
+    - False si el almacen no tiene la telemetria de la sesion (o se guardo sin
+      los tipos originales de cada piloto).
+    """
+    if not sesion_almacenada(year, gp, session_type, directorio):
+        return False
+    meta = leer_metadatos(year, gp, session_type, directorio)
+    tipos = meta.get('tipos_telemetria', {})
+    if not meta['telemetria'] or not set(meta['telemetria']) <= set(tipos):
+        return False
+    if meta.get('t0_date') is not None:
+        session._t0_date = pd.Timestamp(meta['t0_date'])
+        if hasattr(session, '_laps'):
+            session._laps['LapStartDate'] = session._laps['LapStartTime'] + session._t0_date
+    ruta = os.path.join(ruta_sesion(year, gp, session_type, directorio), 'telemetry')
+    for tipo, atributo in TIPOS_TELEMETRIA.items():
+        if tipo not in meta['telemetria']:
+            setattr(session, atributo, {})
+            continue
+        tablas = {numero: pd.read_parquet(os.path.join(ruta, f'{tipo}_{numero}.parquet')) for numero in tipos[tipo]}
+        originales = {numero: {columna: pd.api.types.pandas_dtype(tipo_original)
+                               for columna, tipo_original in columnas.items()}
+                      for numero, columnas in tipos[tipo].items()}
+        setattr(session, atributo, TelemetriaCompacta.desde_tablas(session, tablas, originales))
+    return True
+
+
+@medir()
+def leer_tabla(year, gp, session_type, tabla, columnas=None, directorio=DIRECTORIO_ALMACEN):
+    """
+    Lee una tabla ('laps', 'results', 'ritmo' o 'messages') del almacen, opcionalmente solo algunas columnas.
+    """
+    if tabla not in TABLAS:
+        raise ValueError(f"Tabla desconocida: {tabla}. Opciones: {TABLAS}")
+    ruta = os.path.join(ruta_sesion(year, gp, session_type, directorio), f'{tabla}.parquet')
+    if tabla == 'ritmo' and not os.path.exists(ruta):
+        # Sesion guardada antes de existir el resumen: se calcula desde tres columnas de las vueltas
+        resumen = resumen_ritmo(leer_tabla(year, gp, session_type, 'laps', ['Driver', 'Team', 'LapTime'],
+                                           directorio))
+        return resumen[columnas] if columnas else resumen
+    return pd.read_parquet(ruta, columns=columnas)
+
+
+@medir()
+def leer_telemetria(year, gp, session_type, piloto, tipo='car', columnas=None, directorio=DIRECTORIO_ALMACEN):
+    """
+    Lee la tabla compacta de telemetria de un piloto (por abreviatura o numero)
+    del almacen: los tiempos en segundos en las columnas '<nombre>(s)' (ver
+    modules.compact_session).
+    """
+    if tipo not in TIPOS_TELEMETRIA:
+        raise ValueError(f"Tipo de telemetria desconocido: {tipo}. Opciones: {tuple(TIPOS_TELEMETRIA)}")
+    meta = leer_metadatos(year, gp, session_type, directorio)
+    numero = meta['pilotos'].get(piloto, str(piloto))
+    ruta = os.path.join(ruta_sesion(year, gp, session_type, directorio), 'telemetry', f'{tipo}_{numero}.parquet')
+    return pd.read_parquet(ruta, columns=columnas)
+
+
+@medir()
+def ritmo_temporada(year, session_type='R', nivel='Team', directorio=DIRECTORIO_ALMACEN):
+    """
+    Resumen de ritmo (ver modules.pace_summary) de todas las sesiones de la
+    temporada ya guardadas en el almacen, sin cargar sus vueltas.
+
+    Returns:
+    - DataFrame con Ronda, Evento y las columnas del resumen del nivel pedido
+      ('Team' o 'Driver'), ordenado por ronda y mediana.
+    """
+    tablas = []
+    directorio_year = os.path.join(directorio, str(year))
+    for gp in sorted(os.listdir(directorio_year)) if os.path.isdir(directorio_year) else []:
+        if not sesion_almacenada(year, gp, session_type, directorio):
+            continue
+        meta = leer_metadatos(year, gp, session_type, directorio)
+        resumen = leer_tabla(year, gp, session_type, 'ritmo', directorio=directorio)
+        resumen = resumen[resumen['Nivel'] == nivel].drop(columns=['Nivel', 'Atipicos'])
+        tablas.append(resumen.assign(Ronda=meta.get('round'), Evento=meta['event_name']))
+    if not tablas:
+        return pd.DataFrame()
+    temporada = pd.concat(tablas, ignore_index=True)
+    columnas = ['Ronda', 'Evento'] + [c for c in temporada.columns if c not in ('Ronda', 'Evento')]
+    return temporada.sort_values(['Ronda', 'Mediana'], kind='stable')[columnas].reset_index(drop=True)
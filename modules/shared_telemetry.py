@@ -0,0 +1,158 @@
+"""
+Almacen de telemetria compartido por los procesos de la app de una maquina.
+
+La telemetria compacta de una sesion (modules.compact_session) se escribe una
+sola vez en cache/telemetria_compartida/<year>/<gp>/<sesion>/ como arrays .npy,
+un archivo por columna con todos los pilotos seguidos, y cada proceso la abre
+con np.load(mmap_mode='r'): las tablas de cada piloto son vistas de esos
+arrays, asi que todos los procesos de Streamlit comparten las mismas paginas
+de la cache del sistema operativo sin copiarlas, y una sesion que ya ha cargado
+un proceso esta disponible al instante en los demas.
+
+Un cerrojo de fichero por sesion hace que solo un proceso cargue la telemetria
+con FastF1 y la escriba; los demas esperan y la abren. La sesion se escribe en
+un directorio temporal que se renombra al terminar, asi que nunca se abre a
+medias. Se desactiva con F1APP_TELEMETRIA_COMPARTIDA=0.
+"""
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from modules.session_store import ruta_sesion
+from modules.compact_session import TIPOS_TELEMETRIA, TelemetriaCompacta, compactar_telemetria
+from modules.instrumentation import medir, tramo, contar_cache
+from modules.utils import cerrojo_archivo
+
+DIRECTORIO_COMPARTIDO = os.path.join('cache', 'telemetria_compartida')
+ACTIVO = os.environ.get('F1APP_TELEMETRIA_COMPARTIDA', '1').strip().lower() not in ('0', 'false', 'no')
+
+
+def ruta_telemetria(year, gp, session_type, directorio=DIRECTORIO_COMPARTIDO):
+    return ruta_sesion(year, gp, session_type, directorio)
+
+
+def telemetria_guardada(year, gp, session_type, directorio=DIRECTORIO_COMPARTIDO):
+    # meta.json se escribe dentro del directorio temporal antes de renombrarlo
+    return os.path.exists(os.path.join(ruta_telemetria(year, gp, session_type, directorio), 'meta.json'))
+
+
+@medir()
+def escribir_telemetria(session, year, gp, session_type, directorio=DIRECTORIO_COMPARTIDO):
+    """
+    Escribe la telemetria compacta de la sesion en el almacen compartido.
+
+    Returns:
+    - ruta: Directorio de la sesion, o None si la sesion no tiene telemetria.
+    """
+    compactar_telemetria(session)
+    telemetria = {tipo: getattr(session, atributo, None) for tipo, atributo in TIPOS_TELEMETRIA.items()}
+    telemetria = {tipo: datos for tipo, datos in telemetria.items() if datos}
+    if not telemetria:
+        return None
+
+    ruta = ruta_telemetria(year, gp, session_type, directorio)
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    t0 = getattr(session, '_t0_date', None)
+    meta = {'t0_date': None if t0 is None else pd.Timestamp(t0).isoformat(), 'telemetria': {}}
+    for tipo, datos in telemetria.items():
+        os.makedirs(os.path.join(tmp, tipo))
+        pilotos = list(datos)
+        tablas = [datos.tabla(numero) for numero in pilotos]
+        limites = np.cumsum([0] + [len(tabla) for tabla in tablas]).tolist()
+        # Columnas presentes en la tabla de todos los pilotos
+        columnas = [c for c in tablas[0].columns if all(c in tabla for tabla in tablas)]
+        info_columnas = {}
+        for columna in columnas:
+            series = [tabla[columna] for tabla in tablas]
+            if isinstance(series[0].dtype, pd.CategoricalDtype):
+                # Categorias comunes a todos los pilotos y codigos de cada muestra
+                categorias = sorted(set().union(*(serie.cat.categories for serie in series)))
+                valores = np.concatenate([pd.Categorical(serie, categories=categorias).codes for serie in series])
+                info_columnas[columna] = {'categorias': categorias}
+            else:
+                valores = np.concatenate([serie.to_numpy() for serie in series])
+                if valores.dtype == object:
+                    raise TypeError(f"La columna {columna} no se puede compartir (dtype object)")
+                info_columnas[columna] = {}
+            np.save(os.path.join(tmp, tipo, f'{columna}.npy'), valores)
+        meta['telemetria'][tipo] = {
+            'pilotos': {numero: limites[i:i + 2] for i, numero in enumerate(pilotos)},
+            'columnas': info_columnas,
+            'tipos': {numero: {c: str(t) for c, t in datos.tipos_originales(numero).items()} for numero in pilotos},
+        }
+    with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    os.replace(tmp, ruta)
+    return ruta
+
+
+@medir()
+def abrir_telemetria(session, year, gp, session_type, directorio=DIRECTORIO_COMPARTIDO):
+    """
+    Pone en la sesion la telemetria del almacen compartido, proyectada en
+    memoria (solo lectura) y sin copiarla, como TelemetriaCompacta. Igual que
+    FastF1 al cargarla, fija session.t0_date y añade LapStartDate a las vueltas.
+    """
+    ruta = ruta_telemetria(year, gp, session_type, directorio)
+    with open(os.path.join(ruta, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta['t0_date'] is not None:
+        session._t0_date = pd.Timestamp(meta['t0_date'])
+        if hasattr(session, '_laps'):
+            session._laps['LapStartDate'] = session._laps['LapStartTime'] + session._t0_date
+
+    for tipo, atributo in TIPOS_TELEMETRIA.items():
+        info = meta['telemetria'].get(tipo)
+        if info is None:
+            setattr(session, atributo, {})
+            continue
+        arrays = {columna: np.load(os.path.join(ruta, tipo, f'{columna}.npy'), mmap_mode='r')
+                  for columna in info['columnas']}
+        tablas = {}
+        for numero, (desde, hasta) in info['pilotos'].items():
+            columnas = {}
+            for columna, extra in info['columnas'].items():
+                valores = arrays[columna][desde:hasta]
+                if 'categorias' in extra:
+                    valores = pd.Categorical.from_codes(valores, categories=extra['categorias'])
+                columnas[columna] = valores
+            tablas[numero] = pd.DataFrame(columnas, copy=False)
+        tipos = {numero: {columna: pd.api.types.pandas_dtype(tipo_original) for columna, tipo_original in tipos.items()}
+                 for numero, tipos in info['tipos'].items()}
+        setattr(session, atributo, TelemetriaCompacta.desde_tablas(session, tablas, tipos))
+    return session
+
+
+@medir()
+def cargar_telemetria(session, year, gp, session_type, directorio=DIRECTORIO_COMPARTIDO):
+    """
+    Carga la telemetria de la sesion desde el almacen compartido. Si aun no
+    esta, la carga este proceso con FastF1 (solo uno por maquina a la vez) y
+    la escribe para los demas.
+
+    Returns:
+    - True si este proceso ha tenido que cargar la telemetria con FastF1.
+    """
+    guardada = telemetria_guardada(year, gp, session_type, directorio)
+    contar_cache('telemetria_compartida', guardada)
+    cargada = False
+    if not guardada:
+        ruta = ruta_telemetria(year, gp, session_type, directorio)
+        with cerrojo_archivo(f'{ruta}.lock'):
+            # Otro proceso puede haberla escrito mientras se esperaba el cerrojo
+            if not telemetria_guardada(year, gp, session_type, directorio):
+                with tramo('fastf1.telemetry'):
+                    if callable(getattr(session, '_load_telemetry', None)):
+                        session._load_telemetry()
+                    else:
+                        # Version de FastF1 sin el cargador privado (ver session_manager._CARGADORES)
+                        session.load(laps=False, telemetry=True, weather=False, messages=False)
+                cargada = True
+                if escribir_telemetria(session, year, gp, session_type, directorio) is None:
+                    # Sin telemetria (FastF1 solo avisa): no se guarda para reintentarlo
+                    return cargada
+    abrir_telemetria(session, year, gp, session_type, directorio)
+    return cargada
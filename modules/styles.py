@@ -0,0 +1,158 @@
+import difflib
+import colorsys
+import threading
+import weakref
+import fastf1
+from fastf1 import plotting
+import matplotlib
+from matplotlib.colors import to_hex
+from modules.instrumentation import contar_cache
+
+# Estilo de linea (Plotly) segun el orden del piloto dentro de su equipo
+ESTILOS_LINEA = ('solid', 'dash', 'dot', 'dashdot')
+# Paleta tab20 de matplotlib (la misma que sns.color_palette("tab20"), sin importar seaborn)
+_PALETA_FALLBACK = [to_hex(color) for color in matplotlib.colormaps['tab20'].colors]
+# Paso de tono de los colores generados cuando se agota la paleta (razon aurea:
+# cada tono nuevo cae lejos de los anteriores)
+_PASO_TONO = 0.618033988749895
+
+_lock = threading.Lock()
+# Un registro por sesion, que se libera con ella; y uno por temporada
+_registros = weakref.WeakKeyDictionary()
+_registros_temporada = {}
+
+
+class RegistroEstilos:
+    """
+    Colores y estilos de linea de una sesion, resueltos una sola vez.
+
+    - pilotos: abreviatura -> (color, dash). El primer piloto de cada equipo
+      lleva linea continua y el segundo discontinua.
+    - equipos: nombre del equipo -> color.
+    - equipo_piloto: abreviatura -> nombre del equipo (solo los pilotos de la sesion).
+
+    Los pilotos y equipos que FastF1 no conoce reciben el siguiente color libre
+    de la paleta tab20 (un conjunto de colores usados evita recorrer los ya
+    asignados) y, agotada la paleta, un color nuevo de otro tono.
+    """
+
+    def __init__(self, session=None):
+        self.pilotos = {}
+        self.equipos = {}
+        self.equipo_piloto = {}
+        # Color propio de cada piloto cuando comparte el de su compañero (colores_pilotos)
+        self._alternativos = {}
+        self._usados = set()
+        self._siguiente_fallback = 0
+        self._equipos_sesion = []
+        if session is not None:
+            self._cargar(session)
+
+    def _cargar(self, session):
+        try:
+            colores = plotting.get_driver_color_mapping(session)
+            equipos = plotting.list_team_names(session)
+        except Exception:
+            # Sin datos de pilotos de la sesion: todo se resuelve con la paleta de reserva
+            return
+        for equipo in equipos:
+            color = plotting.get_team_color(equipo, session, exact_match=True)
+            if not color or color == 'none':
+                continue
+            self.equipos[equipo] = color
+            self._equipos_sesion.append(equipo)
+            for orden, abv in enumerate(plotting.get_driver_abbreviations_by_team(equipo, session, exact_match=True)):
+                self.pilotos[abv] = (colores.get(abv, self.equipos[equipo]),
+                                     ESTILOS_LINEA[min(orden, len(ESTILOS_LINEA) - 1)])
+                self.equipo_piloto[abv] = equipo
+        self._usados.update(self.equipos.values())
+
+    def _color_fallback(self):
+        # Siguiente color de la paleta que no este en uso y, agotada la paleta,
+        # tonos generados que tampoco repiten ninguno de los usados
+        while True:
+            n = self._siguiente_fallback
+            self._siguiente_fallback += 1
+            if n < len(_PALETA_FALLBACK):
+                color = _PALETA_FALLBACK[n]
+            else:
+                color = to_hex(colorsys.hls_to_rgb((n - len(_PALETA_FALLBACK)) * _PASO_TONO % 1, 0.5, 0.7))
+            if color not in self._usados:
+                self._usados.add(color)
+                return color
+
+    def estilo_piloto(self, abv):
+        if abv not in self.pilotos:
+            self.pilotos[abv] = (self._color_fallback(), ESTILOS_LINEA[0])
+        return self.pilotos[abv]
+
+    def color_piloto(self, abv):
+        return self.estilo_piloto(abv)[0]
+
+    def color_equipo(self, equipo):
+        if equipo not in self.equipos:
+            # Nombres de equipo de otras fuentes (Ergast): primero un nombre de la sesion
+            # contenido en el otro ("Alpine" en "Alpine F1 Team") y si no, el mas parecido
+            nombre = str(equipo).lower()
+            contenidos = [e for e in self._equipos_sesion if e.lower() in nombre or nombre in e.lower()]
+            coincidencia = (sorted(contenidos, key=len, reverse=True)[:1]
+                            or difflib.get_close_matches(str(equipo), self._equipos_sesion, n=1, cutoff=0.6))
+            self.equipos[equipo] = self.equipos[coincidencia[0]] if coincidencia else self._color_fallback()
+        return self.equipos[equipo]
+
+    def estilos_pilotos(self, pilotos):
+        return {abv: self.estilo_piloto(abv) for abv in pilotos}
+
+    def equipos_pilotos(self, pilotos):
+        # Equipo de cada piloto, o None si la sesion no lo conoce
+        return {abv: self.equipo_piloto.get(abv) for abv in pilotos}
+
+    def colores_pilotos(self, pilotos, distintos=False):
+        """
+        Diccionario piloto -> color. Con distintos=True los compañeros de equipo
+        no comparten color: el segundo recibe uno de la paleta de reserva, elegido
+        una sola vez por piloto para que no cambie entre graficos.
+        """
+        colores = {}
+        vistos = set()
+        for abv in pilotos:
+            color = self.color_piloto(abv)
+            if distintos and color in vistos:
+                if abv not in self._alternativos:
+                    self._alternativos[abv] = self._color_fallback()
+                color = self._alternativos[abv]
+            vistos.add(color)
+            colores[abv] = color
+        return colores
+
+    def colores_equipos(self, equipos):
+        return {equipo: self.color_equipo(equipo) for equipo in equipos}
+
+
+def registro_estilos(session):
+    """
+    Devuelve el RegistroEstilos de la sesion, creado una vez por sesion y
+    compartido por todos los graficos; se libera con la sesion.
+    """
+    with _lock:
+        contar_cache('estilos', session in _registros)
+        if session not in _registros:
+            _registros[session] = RegistroEstilos(session)
+        return _registros[session]
+
+
+def registro_estilos_temporada(year):
+    # Estilos de la temporada a partir de su primera carrera (pilotos y equipos titulares)
+    with _lock:
+        if year in _registros_temporada:
+            return _registros_temporada[year]
+    try:
+        registro = RegistroEstilos(fastf1.get_session(year, 1, 'R'))
+    except Exception:
+        registro = RegistroEstilos()
+    if not registro.equipos:
+        # Sin datos de la sesion (p. ej. sin conexion): la paleta de reserva solo
+        # sirve para esta llamada y en la siguiente se vuelve a intentar
+        return registro
+    with _lock:
+        return _registros_temporada.setdefault(year, registro)
@@ -0,0 +1,161 @@
+import weakref
+import numpy as np
+from fastf1.core import DataNotLoadedError
+from modules.session_manager import requiere_datos
+from modules.instrumentation import medir, contar_cache
+from modules.results_processing import mejores_tiempos_clasificacion
+from modules.compact_session import telemetria_vuelta, distancia_vuelta
+
+# Canales que se guardan por muestra. Time es el tiempo (s) desde el inicio de la vuelta.
+CANALES = ('Time', 'X', 'Y', 'Speed')
+N_MUESTRAS = 1000
+
+_alineaciones = weakref.WeakKeyDictionary()
+
+
+class AlineacionTelemetria:
+    """
+    Telemetria de la vuelta de clasificacion de cada piloto remuestreada sobre
+    una rejilla comun de distancia (normalizada a la longitud de la vuelta de pole).
+
+    - pilotos: abreviaturas ordenadas de la pole al ultimo clasificado.
+    - distancia: rejilla de distancia (m), forma (muestras,).
+    - datos: array float32 de forma (pilotos, muestras, canales).
+    - tiempos: mejor tiempo de clasificacion de cada piloto (s).
+    - omitidos: piloto clasificado que no esta en la alineacion -> motivo.
+    """
+
+    def __init__(self, pilotos, distancia, datos, tiempos, omitidos=None):
+        self.pilotos = list(pilotos)
+        self.indice = {piloto: i for i, piloto in enumerate(self.pilotos)}
+        self.distancia = distancia
+        self.datos = datos
+        self.tiempos = tiempos
+        self.omitidos = dict(omitidos or {})
+
+    def _posicion(self, piloto):
+        try:
+            return self.indice[piloto]
+        except KeyError:
+            motivo = f" ({self.omitidos[piloto]})" if piloto in self.omitidos else ""
+            raise ValueError(f"No hay telemetria de clasificacion alineada para {piloto}{motivo}") from None
+
+    def canal(self, nombre):
+        return self.datos[:, :, CANALES.index(nombre)]
+
+    def serie(self, piloto, nombre):
+        return self.datos[self._posicion(piloto), :, CANALES.index(nombre)]
+
+    def delta(self, piloto1, piloto2):
+        # Positivo cuando piloto1 va por detras de piloto2 en ese punto de la vuelta
+        tiempo = self.canal('Time')
+        return tiempo[self._posicion(piloto1)] - tiempo[self._posicion(piloto2)]
+
+
+def _telemetria_vuelta(session, lap):
+    # Muestras de car y pos data de la vuelta leidas de la telemetria compacta,
+    # sin reconstruirla: distancia integrada de la velocidad (como add_distance())
+    # y coordenadas interpoladas por tiempo
+    car, t_car = telemetria_vuelta(session, lap, 'car')
+    pos, t_pos = telemetria_vuelta(session, lap, 'pos')
+    if len(t_car) < 2 or not len(t_pos):
+        # Vuelta sin muestras suficientes de car o pos data
+        return None
+    velocidad = car['Speed'].to_numpy(dtype=float)
+    return {
+        'Distance': distancia_vuelta(velocidad, t_car),
+        'Time': t_car,
+        'X': np.interp(t_car, t_pos, pos['X'].to_numpy(dtype=float)),
+        'Y': np.interp(t_car, t_pos, pos['Y'].to_numpy(dtype=float)),
+        'Speed': velocidad,
+    }
+
+
+@medir()
+@requiere_datos('laps', 'telemetry', 'messages')
+def alinear_telemetria(session, n_muestras=N_MUESTRAS):
+    """
+    Calcula (una sola vez por sesion) la alineacion de las vueltas de
+    clasificacion de todos los pilotos clasificados.
+
+    Parameters:
+    - session: Sesion de clasificacion de FastF1.
+    - n_muestras: Numero de puntos de la rejilla de distancia.
+
+    Returns:
+    - AlineacionTelemetria
+    """
+    por_sesion = _alineaciones.setdefault(session, {})
+    contar_cache('alineacion_telemetria', n_muestras in por_sesion)
+    if n_muestras in por_sesion:
+        return por_sesion[n_muestras]
+
+    results = session.results.copy()
+    results['BestQualifyingTime'] = mejores_tiempos_clasificacion(results)
+    results = results.dropna(subset=['BestQualifyingTime']).sort_values(by='BestQualifyingTime')
+
+    pilotos, tiempos, telemetrias, omitidos = [], [], [], {}
+    for _, fila in results.iterrows():
+        vueltas = session.laps.pick_drivers(fila['Abbreviation'])
+        vueltas = vueltas[vueltas['LapTime'] == fila['BestQualifyingTime']]
+        if vueltas.empty:
+            omitidos[fila['Abbreviation']] = "sin la vuelta de su mejor tiempo"
+            continue
+        try:
+            tel = _telemetria_vuelta(session, vueltas.iloc[0])
+        except (KeyError, DataNotLoadedError):
+            # FastF1 no tiene car o pos data del piloto: queda fuera de la alineacion
+            omitidos[fila['Abbreviation']] = "sin telemetria"
+            continue
+        if tel is None:
+            omitidos[fila['Abbreviation']] = "telemetria incompleta"
+            continue
+        pilotos.append(fila['Abbreviation'])
+        tiempos.append(fila['BestQualifyingTime'].total_seconds())
+        telemetrias.append(tel)
+
+    if not telemetrias:
+        raise ValueError("No hay telemetria de clasificacion disponible para esta sesion")
+
+    # Se estiran o contraen las distancias para que coincidan con la vuelta de pole
+    distancia_pole = telemetrias[0]['Distance'].max()
+    distancia = np.linspace(0, distancia_pole, n_muestras)
+    datos = np.empty((len(telemetrias), n_muestras, len(CANALES)), dtype=np.float32)
+    for i, tel in enumerate(telemetrias):
+        escala = distancia_pole / tel['Distance'].max()
+        distancia_piloto = tel['Distance'] * escala
+        for c, canal in enumerate(CANALES):
+            datos[i, :, c] = np.interp(distancia, distancia_piloto, tel[canal])
+
+    alineacion = AlineacionTelemetria(pilotos, distancia, datos, np.array(tiempos), omitidos)
+    por_sesion[n_muestras] = alineacion
+    return alineacion
+
+
+def matriz_deltas(alineacion):
+    """
+    Deltas de tiempo de todos los pares de pilotos en cada punto de la rejilla.
+
+    Returns:
+    - Array de forma (pilotos, pilotos, muestras): [i, j, k] es el tiempo que
+      el piloto i pierde (positivo) o gana (negativo) frente a j hasta la muestra k.
+    """
+    tiempo = alineacion.canal('Time')
+    return tiempo[:, None, :] - tiempo[None, :, :]
+
+
+def dominancia_minisectores(alineacion, n_minisectores=25):
+    """
+    Divide la vuelta en minisectores de igual distancia y calcula quien es el
+    mas rapido en cada uno.
+
+    Returns:
+    - limites: indices de la rejilla donde empieza y acaba cada minisector, (n_minisectores + 1,).
+    - tiempos_sector: tiempo de cada piloto en cada minisector (s), (pilotos, n_minisectores).
+    - ganadores: indice del piloto mas rapido en cada minisector, (n_minisectores,).
+    """
+    tiempo = alineacion.canal('Time')
+    limites = np.linspace(0, tiempo.shape[1] - 1, n_minisectores + 1).round().astype(int)
+    tiempos_sector = tiempo[:, limites[1:]] - tiempo[:, limites[:-1]]
+    ganadores = np.argmin(tiempos_sector, axis=0)
+    return limites, tiempos_sector, ganadores
@@ -0,0 +1,111 @@
+"""
+Cache de geometria de circuitos: trazado ya rotado y anotaciones de curvas como
+arrays compactos (.npz) por circuito, para dibujar el mapa sin cargar telemetria.
+
+Precalculo por lotes (desde la raiz del repositorio):
+    python -m modules.track_geometry --years 2024 2023 2022 [--forzar]
+"""
+import os
+import argparse
+import functools
+import numpy as np
+from fastf1 import get_event_schedule
+from modules.session_manager import cargar_sesion
+from modules.utils import configurar_cache, rotate
+from modules.instrumentation import medir
+from modules.compact_session import telemetria_vuelta
+
+DIRECTORIO_GEOMETRIA = os.path.join('data', 'circuit_geometry')
+
+
+def _ruta(gp, directorio=DIRECTORIO_GEOMETRIA):
+    return os.path.join(directorio, f'{gp}.npz')
+
+
+def calcular_geometria(pos, circuit_info):
+    """
+    Calcula el trazado rotado y la posicion de las etiquetas de las curvas.
+
+    Parameters:
+    - pos: Datos de posicion (X, Y) de una vuelta.
+    - circuit_info: Resultado de session.get_circuit_info().
+
+    Returns:
+    - dict con 'pista' (n, 2), 'curvas_pista' (k, 2), 'curvas_texto' (k, 2) y 'etiquetas' (k,).
+    """
+    # Get an array of shape [n, 2] where n is the number of points and the second
+    # axis is x and y.
+    track = pos.loc[:, ('X', 'Y')].to_numpy()
+    # Convert the rotation angle from degrees to radian.
+    track_angle = circuit_info.rotation / 180 * np.pi
+    rotated_track = rotate(track, angle=track_angle)
+
+    offset_vector = [500, 0]  # offset length is chosen arbitrarily to 'look good'
+    corners = circuit_info.corners
+    esquinas = corners[['X', 'Y']].to_numpy(dtype=float)
+    angulos = corners['Angle'].to_numpy(dtype=float) / 180 * np.pi
+    # Rotate the offset vector so that it points sideways from the track (one per corner)
+    offsets = np.stack([offset_vector[0] * np.cos(angulos) - offset_vector[1] * np.sin(angulos),
+                        offset_vector[0] * np.sin(angulos) + offset_vector[1] * np.cos(angulos)], axis=1)
+    etiquetas = [f"{numero}{letra}" for numero, letra in zip(corners['Number'], corners['Letter'])]
+    return {
+        'pista': rotated_track.astype(np.float32),
+        'curvas_pista': rotate(esquinas, angle=track_angle).astype(np.float32),
+        'curvas_texto': rotate(esquinas + offsets, angle=track_angle).astype(np.float32),
+        'etiquetas': np.array(etiquetas, dtype=str),
+    }
+
+
+def guardar_geometria(gp, geometria, directorio=DIRECTORIO_GEOMETRIA):
+    os.makedirs(directorio, exist_ok=True)
+    ruta = _ruta(gp, directorio)
+    tmp = f"{ruta}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp, **geometria)
+    os.replace(tmp, ruta)
+    cargar_geometria.cache_clear()
+    return ruta
+
+
+@functools.lru_cache(maxsize=64)
+def cargar_geometria(gp, directorio=DIRECTORIO_GEOMETRIA):
+    """
+    Devuelve la geometria precalculada del circuito o None si no existe.
+    """
+    ruta = _ruta(gp, directorio)
+    if not os.path.exists(ruta):
+        return None
+    with np.load(ruta) as datos:
+        return {clave: datos[clave] for clave in datos.files}
+
+
+@medir()
+def construir_geometria(year, gp, directorio=DIRECTORIO_GEOMETRIA):
+    # Unico punto donde se carga telemetria: solo durante el precalculo
+    session = cargar_sesion(year, gp, 'R', categorias=('laps', 'telemetry'))
+    lap = session.laps.pick_fastest()
+    pos, _ = telemetria_vuelta(session, lap, 'pos')
+    geometria = calcular_geometria(pos, session.get_circuit_info())
+    return guardar_geometria(session.event['EventName'], geometria, directorio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, nargs='+', required=True,
+                        help="Temporadas a recorrer, de la mas reciente a la mas antigua")
+    parser.add_argument('--forzar', action='store_true', help="Recalcular aunque ya exista la geometria")
+    args = parser.parse_args()
+
+    configurar_cache('cache')
+    for year in args.years:
+        schedule = get_event_schedule(year, include_testing=False)
+        for gp in schedule['EventName']:
+            if not args.forzar and os.path.exists(_ruta(gp)):
+                continue
+            try:
+                print(f"{year} {gp}: {construir_geometria(year, gp)}")
+            except Exception as e:
+                print(f"{year} {gp}: no se pudo calcular la geometria ({e})")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,172 @@
 import os
+from contextlib import contextmanager
 import fastf1
-from fastf1 import plotting
 import numpy as np
+import plotly.graph_objects as go
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 
 def configurar_cache(cache_dir):
     if not os.path.exists(cache_dir):
         os.makedirs(cache_dir)
     fastf1.Cache.enable_cache(cache_dir)
-    
+
+
+@contextmanager
+def cerrojo_archivo(ruta):
+    # Cerrojo exclusivo entre procesos (y entre hilos, cada uno con su descriptor);
+    # el sistema lo libera si el proceso muere
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK se rinde tras 10 s: se sigue esperando
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
 def rotate(xy, *, angle):
     rot_mat = np.array([[np.cos(angle), np.sin(angle)],
                         [-np.sin(angle), np.cos(angle)]])
     return np.matmul(xy, rot_mat)
 
 
+
+
+# Por encima de este numero de puntos por figura se dibuja con WebGL (Scattergl)
+UMBRAL_WEBGL = 1000
+# Numero maximo de puntos que se envian al navegador por serie larga (telemetria)
+MAX_PUNTOS_SERIE = 1500
+# Pasos "redondos" (s) candidatos para los ticks de tiempo
+_PASOS_TICKS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 15, 30, 60, 120, 300, 600)
+
+
+def clase_traza(n_puntos, umbral=UMBRAL_WEBGL):
+    # go.Scattergl para figuras con muchos puntos, go.Scatter (SVG) para el resto
+    return go.Scattergl if n_puntos > umbral else go.Scatter
+
+
+def lttb(x, y, n_puntos=MAX_PUNTOS_SERIE):
+    """
+    Reduce una serie a n_puntos con Largest-Triangle-Three-Buckets, que conserva
+    la forma visual (picos y valles) mejor que un submuestreo uniforme.
+
+    Returns:
+    - Indices (ordenados) de los puntos seleccionados.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_puntos >= n or n_puntos < 3:
+        return np.arange(n)
+    # Limites de los cubos intermedios (el primer y el ultimo punto se conservan)
+    limites = np.linspace(1, n - 1, n_puntos - 1).astype(int)
+    indices = np.empty(n_puntos, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    # Punto medio de cada cubo, para el vertice del triangulo del cubo siguiente
+    medias_x = np.add.reduceat(x[1:n - 1], limites[:-1] - 1) / np.diff(limites)
+    medias_y = np.add.reduceat(y[1:n - 1], limites[:-1] - 1) / np.diff(limites)
+    medias_x = np.append(medias_x[1:], x[-1])
+    medias_y = np.append(medias_y[1:], y[-1])
+    anterior = 0
+    for i in range(n_puntos - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        cx, cy = x[inicio:fin], y[inicio:fin]
+        # Area (doble) del triangulo punto anterior - candidato - media del cubo siguiente
+        areas = np.abs((x[anterior] - medias_x[i]) * (cy - y[anterior])
+                       - (x[anterior] - cx) * (medias_y[i] - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+
+def reducir_serie(x, y, n_puntos=MAX_PUNTOS_SERIE):
+    # Descarta NaN y aplica LTTB solo si la serie supera n_puntos
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[validos], y[validos]
+    indices = lttb(x, y, n_puntos)
+    return x[indices], y[indices]
+
+
+def formatear_tiempo(segundos):
+    minutos = int(segundos // 60)
+    resto = segundos - 60 * minutos
+    return f"{minutos}:{resto:04.1f}" if resto % 1 else f"{minutos}:{int(resto):02d}"
+
+
+def ticks_tiempo(minimo, maximo, max_ticks=8):
+    """
+    Ticks en formato min:seg para un eje de tiempos (s), con el paso redondo mas
+    pequeño que deja como mucho max_ticks etiquetas en el rango de los datos.
+    """
+    if not np.isfinite(minimo) or not np.isfinite(maximo):
+        return [], []
+    rango = max(maximo - minimo, 1e-9)
+    # Entre minimo y maximo caben floor(rango / paso) + 1 ticks
+    paso = next((p for p in _PASOS_TICKS if rango / p <= max_ticks - 1), _PASOS_TICKS[-1])
+    tickvals = np.arange(np.floor(minimo / paso) * paso, maximo + paso, paso)
+    tickvals = np.round(tickvals, 3)
+    return tickvals, [formatear_tiempo(val) for val in tickvals]
+
+
+def desplazamientos_enjambre(categorias, valores, diametro, paso, ancho_max=0.4):
+    """
+    Desplazamiento horizontal de cada punto para un diagrama de enjambre
+    aproximado, calculado de una vez con NumPy (sin el coste cuadratico de
+    sns.swarmplot): los puntos de una misma categoria cuyos valores caen en la
+    misma franja de altura `diametro` se reparten a izquierda y derecha en pasos
+    de `paso`, comprimiendo la fila si supera `ancho_max`.
+
+    Parameters:
+    - categorias: Codigo entero de la categoria de cada punto.
+    - valores: Valor (eje y) de cada punto.
+    - diametro: Tamaño del marcador en unidades del eje y.
+    - paso: Separacion horizontal entre puntos en unidades del eje x.
+
+    Returns:
+    - Array con el desplazamiento x de cada punto respecto al centro de su categoria.
+    """
+    categorias = np.asarray(categorias)
+    valores = np.asarray(valores, dtype=float)
+    n = len(valores)
+    if n == 0:
+        return np.zeros(0)
+    franjas = np.floor(valores / diametro).astype(np.int64)
+    orden = np.lexsort((valores, franjas, categorias))
+    nuevo_grupo = np.r_[True, (np.diff(categorias[orden]) != 0) | (np.diff(franjas[orden]) != 0)]
+    inicios = np.flatnonzero(nuevo_grupo)
+    tamanos = np.diff(np.r_[inicios, n])
+    rango = np.arange(n) - np.repeat(inicios, tamanos)
+    # 0, +1, -1, +2, -2... centrado cuando el grupo tiene un numero par de puntos
+    signo = np.where(rango % 2 == 1, 1.0, -1.0)
+    desplazamiento = signo * ((rango + 1) // 2) * paso
+    desplazamiento -= np.repeat(np.where(tamanos % 2 == 0, paso / 2, 0.0), tamanos)
+    # Comprime las filas demasiado anchas para que no invadan la categoria vecina
+    maximo = np.maximum.reduceat(np.abs(desplazamiento), inicios)
+    escala = np.minimum(1.0, ancho_max / np.maximum(maximo, 1e-12))
+    desplazamiento *= np.repeat(escala, tamanos)
+    resultado = np.empty(n)
+    resultado[orden] = desplazamiento
+    return resultado
@@ -0,0 +1,18 @@
+import warnings
+import pytest
+import fastf1
+from benchmarks.bench_offline import Contexto, preparar_base
+from modules.utils import configurar_cache
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    # Directorio de trabajo con la cache de Bahrein 2024 del repositorio, sin conexion
+    preparar_base(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    configurar_cache('cache')
+    fastf1.Cache.offline_mode(True)
+    fastf1.set_log_level('ERROR')
+    warnings.filterwarnings('ignore')
+    yield Contexto()
+    fastf1.Cache.offline_mode(False)
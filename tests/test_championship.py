@@ -0,0 +1,152 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+import fastf1
+import fastf1.ergast.interface
+from modules import championship
+
+YEAR = 2024
+CARRERAS = {1: 'Bahrain', 2: 'Saudi Arabian', 3: 'Australian'}
+# Puntos de cada ronda: (piloto, constructor, puntos)
+RESULTADOS = {
+    1: [('VER', 'Red Bull', 25), ('LEC', 'Ferrari', 18)],
+    2: [('LEC', 'Ferrari', 25), ('VER', 'Red Bull', 18)],
+    3: [('VER', 'Red Bull', 25), ('LEC', 'Ferrari', 18)],
+}
+
+
+def _carrera(ronda):
+    return {'season': str(YEAR), 'round': str(ronda), 'raceName': f'{CARRERAS[ronda]} Grand Prix',
+            'date': f'{YEAR}-03-0{ronda}', 'time': '15:00:00Z',
+            'Circuit': {'circuitId': f'c{ronda}', 'circuitName': f'Circuito {ronda}',
+                        'Location': {'lat': '0', 'long': '0', 'locality': 'X', 'country': 'Y'}}}
+
+
+def _resultado(posicion, piloto, constructor, puntos):
+    return {'number': str(posicion), 'position': str(posicion), 'positionText': str(posicion),
+            'points': str(puntos), 'grid': str(posicion), 'laps': '57', 'status': 'Finished',
+            'Driver': {'driverId': piloto.lower(), 'code': piloto, 'givenName': piloto, 'familyName': piloto},
+            'Constructor': {'constructorId': constructor.lower(), 'name': constructor}}
+
+
+class ErgastLocal:
+    """
+    Servidor HTTP local que responde como Ergast (solo calendario, resultados y
+    sprints) para una temporada. Las rondas de `fallidas` devuelven un error 500.
+    """
+
+    def __init__(self):
+        self.fallidas = set()
+        self.peticiones = []
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                ruta = self.path.split('?')[0]
+                servidor.peticiones.append(ruta)
+                cuerpo = servidor.responder(ruta.removeprefix('/api/f1/').removesuffix('.json').split('/'))
+                if cuerpo is None:
+                    self.send_error(500)
+                    return
+                datos = json.dumps({'MRData': {'limit': '30', 'offset': '0', 'total': '1', **cuerpo}}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def log_message(self, *args):
+                pass
+
+        self.http = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+        self.url = f'http://127.0.0.1:{self.http.server_port}/api/f1'
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+
+    def responder(self, partes):
+        if partes == [str(YEAR), 'races']:
+            return {'RaceTable': {'season': str(YEAR), 'Races': [_carrera(r) for r in CARRERAS]}}
+        year, ronda, tabla = partes
+        ronda = int(ronda)
+        if tabla == 'sprint':
+            return {'RaceTable': {'season': year, 'round': str(ronda), 'Races': []}}
+        if ronda in self.fallidas:
+            return None
+        resultados = [_resultado(i + 1, *fila) for i, fila in enumerate(RESULTADOS[ronda])]
+        return {'RaceTable': {'season': year, 'round': str(ronda),
+                              'Races': [{**_carrera(ronda), 'Results': resultados}]}}
+
+
+@pytest.fixture
+def ergast(tmp_path):
+    servidor = ErgastLocal()
+    url_original = fastf1.ergast.interface.BASE_URL
+    fastf1.Cache.set_disabled()
+    championship.configurar_ergast(servidor.url)
+    championship._modelos.clear()
+    yield servidor, str(tmp_path)
+    championship._modelos.clear()
+    fastf1.Cache.set_enabled()
+    fastf1.ergast.interface.BASE_URL = url_original
+    servidor.http.shutdown()
+
+
+def test_resultados_desde_servidor_local(ergast):
+    servidor, directorio = ergast
+    carreras, resultados, avisos = championship.obtener_resultados_campeonato(YEAR, directorio=directorio)
+    assert carreras['round'].tolist() == [1, 2, 3]
+    assert sorted(resultados['round'].unique()) == [1, 2, 3]
+    assert avisos == []
+    assert resultados.groupby('driverCode')['points'].sum().to_dict() == {'LEC': 61, 'VER': 68}
+
+    # Las rondas guardadas no se vuelven a pedir
+    servidor.peticiones.clear()
+    championship.obtener_resultados_campeonato(YEAR, directorio=directorio)
+    assert servidor.peticiones == []
+
+
+def test_ronda_fallida_no_descarta_las_demas(ergast):
+    servidor, directorio = ergast
+    servidor.fallidas.add(2)
+    _, resultados, avisos = championship.obtener_resultados_campeonato(YEAR, directorio=directorio)
+    assert sorted(resultados['round'].unique()) == [1, 3]
+    assert len(avisos) == 1 and 'ronda 2' in avisos[0]
+    modelo, _ = championship.obtener_modelo_campeonato(YEAR, directorio=directorio)
+    assert modelo.rondas.tolist() == [1, 3]
+
+    # La ronda que fallo llega despues que la 3 y se coloca en su sitio
+    servidor.fallidas.clear()
+    _, resultados, avisos = championship.obtener_resultados_campeonato(YEAR, directorio=directorio)
+    assert sorted(resultados['round'].unique()) == [1, 2, 3]
+    assert avisos == []
+    modelo, _ = championship.obtener_modelo_campeonato(YEAR, directorio=directorio)
+    assert modelo.rondas.tolist() == [1, 2, 3]
+    assert modelo.carreras == ['Bahrain', 'Saudi Arabian', 'Australian']
+    assert modelo.clasificacion_tras_ronda(2).to_dict() == {'LEC': 43, 'VER': 43}
+    assert modelo.clasificacion_tras_ronda(3).to_dict() == {'VER': 68, 'LEC': 61}
+
+
+def test_ergast_se_consulta_sin_el_cerrojo(ergast, monkeypatch):
+    _, directorio = ergast
+    original = championship._resultados_ronda_o_error
+    con_cerrojo = []
+
+    def consultar(year, ronda, race):
+        con_cerrojo.append(championship._lock.locked())
+        return original(year, ronda, race)
+
+    monkeypatch.setattr(championship, '_resultados_ronda_o_error', consultar)
+    championship.obtener_resultados_campeonato(YEAR, directorio=directorio)
+    assert con_cerrojo == [False] * 3
+
+
+def test_llamadas_simultaneas_no_duplican_rondas(ergast):
+    _, directorio = ergast
+    hilos = [threading.Thread(target=championship.obtener_resultados_campeonato, args=(YEAR,),
+                              kwargs={'directorio': directorio}) for _ in range(3)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    _, resultados, _ = championship.obtener_resultados_campeonato(YEAR, directorio=directorio)
+    assert resultados.groupby('round').size().to_dict() == {1: 2, 2: 2, 3: 2}
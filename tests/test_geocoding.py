@@ -0,0 +1,91 @@
+import os
+import json
+import pytest
+import requests
+from modules import geocoding
+
+CIRCUITOS = os.path.abspath(geocoding.ARCHIVO_CIRCUITOS)
+
+
+class _Respuesta:
+    status_code = 200
+
+    def __init__(self, resultados):
+        self.resultados = resultados
+
+    def json(self):
+        return self.resultados
+
+
+@pytest.fixture
+def peticiones(tmp_path, monkeypatch):
+    # Cache persistente vacia en tmp_path y requests.get simulado: cada llamada
+    # devuelve (o lanza) el siguiente elemento de `respuestas`
+    monkeypatch.chdir(tmp_path)
+    geocoding.cargar_indice.cache_clear()
+    geocoding._cache_disco.cache_clear()
+    llamadas, respuestas = [], []
+
+    def get(url, params=None, **kwargs):
+        llamadas.append(params['q'])
+        respuesta = respuestas.pop(0)
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return _Respuesta(respuesta)
+
+    monkeypatch.setattr(geocoding.requests, 'get', get)
+    yield llamadas, respuestas
+    geocoding.cargar_indice.cache_clear()
+    geocoding._cache_disco.cache_clear()
+
+
+def _en_disco():
+    with open(geocoding.ARCHIVO_CACHE_GEOCODIFICACION, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_ubicacion_del_indice_sin_red(peticiones):
+    llamadas, _ = peticiones
+    coordenadas = geocoding.obtener_coordenadas_circuito('Monza, Italy', 'Italian Grand Prix', CIRCUITOS)
+    assert coordenadas == (45.6156, 9.28111)
+    assert llamadas == []
+    assert geocoding.cargar_indice(CIRCUITOS).por_evento['Italian Grand Prix'] == coordenadas
+
+
+def test_sin_resultado_usa_el_pais_sin_memorizarlo(peticiones):
+    llamadas, respuestas = peticiones
+    respuestas.append([])
+    coordenadas = geocoding.obtener_coordenadas_circuito('Nowhere, Italy', 'Evento', CIRCUITOS)
+    assert coordenadas == (45.6156, 9.28111)
+    indice = geocoding.cargar_indice(CIRCUITOS)
+    assert indice.por_ubicacion == {} and indice.por_evento == {}
+    # La respuesta sin resultados de Nominatim si se guarda: no se vuelve a preguntar
+    assert _en_disco() == {'Nowhere, Italy': None}
+    assert geocoding.obtener_coordenadas_circuito('Nowhere, Italy', 'Evento', CIRCUITOS) == coordenadas
+    assert llamadas == ['Nowhere, Italy']
+
+
+def test_timeout_no_se_guarda_y_se_reintenta(peticiones):
+    llamadas, respuestas = peticiones
+    respuestas += [requests.Timeout(), [{'lat': '1.5', 'lon': '2.5'}]]
+    assert geocoding.obtener_coordenadas_circuito('Nowhere, Italy', 'Evento', CIRCUITOS) == (45.6156, 9.28111)
+    assert not os.path.exists(geocoding.ARCHIVO_CACHE_GEOCODIFICACION)
+
+    assert geocoding.obtener_coordenadas_circuito('Nowhere, Italy', 'Evento', CIRCUITOS) == ('1.5', '2.5')
+    assert llamadas == ['Nowhere, Italy'] * 2
+    assert geocoding.cargar_indice(CIRCUITOS).por_evento['Evento'] == ('1.5', '2.5')
+
+
+def test_guardar_mezcla_lo_escrito_por_otro_proceso(peticiones):
+    llamadas, respuestas = peticiones
+    respuestas += [[{'lat': '1', 'lon': '2'}]]
+    assert geocoding.obtener_coordenadas_osm('a') == ('1', '2')
+    # Otro proceso añade una consulta al archivo despues de que este lo leyera
+    with open(geocoding.ARCHIVO_CACHE_GEOCODIFICACION, 'w', encoding='utf-8') as f:
+        json.dump({'a': ['1', '2'], 'b': ['3', '4']}, f)
+    assert geocoding.obtener_coordenadas_osm('b') == ('3', '4')
+
+    respuestas += [[{'lat': '5', 'lon': '6'}]]
+    assert geocoding.obtener_coordenadas_osm('c') == ('5', '6')
+    assert _en_disco() == {'a': ['1', '2'], 'b': ['3', '4'], 'c': ['5', '6']}
+    assert llamadas == ['a', 'c']
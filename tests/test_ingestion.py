@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+import pytest
+import pandas as pd
+from modules import ingestion
+from modules.ingestion import leer_manifiesto
+
+GP = 'Bahrain Grand Prix'
+
+
+def _lanzar(monkeypatch, *argumentos):
+    monkeypatch.setattr(sys, 'argv', ['ingestion', '--years', '2024', '--cache', os.path.abspath('cache'),
+                                      '--offline', '--workers', '1', '--categorias', 'laps', 'messages',
+                                      *argumentos])
+    with pytest.raises(SystemExit) as salida:
+        ingestion.main()
+    return salida.value.code
+
+
+def _lineas(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f]
+
+
+def test_ingesta_sin_conexion_y_reanudacion(offline, monkeypatch):
+    manifiesto = os.path.join('cache', 'ingesta.jsonl')
+    assert _lanzar(monkeypatch, '--tipos', 'Q', 'R') == 0
+
+    estados = leer_manifiesto(manifiesto)
+    assert set(estados) == {(2024, GP, 'Q'), (2024, GP, 'R')}
+    assert all(registro['estado'] == 'ok' and registro['error'] is None for registro in estados.values())
+
+    # Al relanzar, las sesiones ya ingeridas no se vuelven a cargar
+    assert _lanzar(monkeypatch, '--tipos', 'Q', 'R') == 0
+    assert len(_lineas(manifiesto)) == 2
+
+
+def test_fallos_solo_se_reintentan_si_se_pide(offline, monkeypatch):
+    manifiesto = os.path.join('cache', 'ingesta.jsonl')
+    # La FP1 no esta en la cache del repositorio: sin conexion falla
+    assert _lanzar(monkeypatch, '--tipos', 'FP1') == 1
+    assert leer_manifiesto(manifiesto)[(2024, GP, 'FP1')]['estado'] == 'error'
+
+    assert _lanzar(monkeypatch, '--tipos', 'FP1') == 0
+    assert len(_lineas(manifiesto)) == 1
+    assert _lanzar(monkeypatch, '--tipos', 'FP1', '--reintentar-fallos') == 1
+    assert len(_lineas(manifiesto)) == 2
+
+
+def test_sesiones_temporada_solo_las_disputadas(offline):
+    # Entre la clasificacion (16:00 UTC del 1 de marzo) y la carrera
+    ahora = pd.Timestamp('2024-03-02 12:00')
+    assert ingestion.sesiones_temporada(2024, ahora=ahora) == [(2024, GP, 'FP1'), (2024, GP, 'FP2'),
+                                                                (2024, GP, 'FP3'), (2024, GP, 'Q')]
+    assert ingestion.sesiones_temporada(2024, tipos=('Q', 'R'), ahora=ahora) == [(2024, GP, 'Q')]
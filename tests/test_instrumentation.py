@@ -0,0 +1,40 @@
+import json
+import pytest
+from modules import instrumentation
+
+
+@pytest.fixture
+def activa():
+    instrumentation.reiniciar()
+    instrumentation.activar()
+    yield
+    instrumentation.desactivar()
+    instrumentation.reiniciar()
+
+
+def _leer(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f]
+
+
+def test_exportacion_incremental_no_vacia_ni_duplica(activa, tmp_path):
+    ruta = str(tmp_path / 'medidas.jsonl')
+    with instrumentation.tramo('a'):
+        pass
+    instrumentation.contar_cache('sesiones', True)
+    assert instrumentation.exportar_jsonl(ruta, incremental=True) == 2
+
+    # Sin nada nuevo no se escribe nada, y lo medido sigue disponible para el panel
+    assert instrumentation.exportar_jsonl(ruta, incremental=True) == 0
+    assert instrumentation.tramos()['nombre'].tolist() == ['a']
+    assert instrumentation.contadores() == {'sesiones.aciertos': 1}
+
+    with instrumentation.tramo('b'):
+        pass
+    instrumentation.contar_cache('sesiones', False)
+    assert instrumentation.exportar_jsonl(ruta, incremental=True) == 2
+    lineas = _leer(ruta)
+    assert [linea['nombre'] for linea in lineas if linea['tipo'] == 'tramo'] == ['a', 'b']
+    assert [(linea['nombre'], linea['valor']) for linea in lineas if linea['tipo'] == 'contador'] == \
+        [('sesiones.aciertos', 1), ('sesiones.fallos', 1)]
+    assert len(instrumentation.tramos()) == 2
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from modules.position_traces import SeriesPosiciones
+from modules.graficos_carrera import construir_figura_posiciones
+
+ESTILOS = {'VER': ('#3671C6', 'solid'), 'PER': ('#3671C6', 'dash'), 'LEC': ('#E8002D', 'solid')}
+EQUIPOS = {'VER': 'Red Bull Racing', 'PER': 'Red Bull Racing', 'LEC': 'Ferrari'}
+
+
+def _serie():
+    laps = pd.DataFrame({'Driver': ['VER', 'PER', 'LEC'] * 3,
+                         'LapNumber': np.repeat([1.0, 2.0, 3.0], 3),
+                         'Position': [1.0, 3.0, 2.0, 1.0, 2.0, 3.0, 2.0, 3.0, 1.0]})
+    return SeriesPosiciones.desde_vueltas(laps, ['VER', 'PER', 'LEC'])
+
+
+def test_arrays_concatenados_de_un_subconjunto():
+    x, y, pilotos = _serie().arrays_concatenados([0, 2])
+    assert np.array_equal(y, [1, 1, 2, np.nan, 2, 3, 1, np.nan], equal_nan=True)
+    assert np.isnan(x[3]) and x[:3].tolist() == [1, 2, 3]
+    assert list(pilotos) == ['VER'] * 3 + [None] + ['LEC'] * 3 + [None]
+
+
+def test_webgl_una_traza_por_equipo_con_sus_colores():
+    fig = construir_figura_posiciones(_serie(), ESTILOS, 'Posiciones', una_traza=True, equipos=EQUIPOS)
+    assert [traza.type for traza in fig.data] == ['scattergl', 'scattergl']
+    red_bull, ferrari = fig.data
+    assert red_bull.name == 'VER / PER' and red_bull.line.color == '#3671C6'
+    assert ferrari.name == 'LEC' and ferrari.line.color == '#E8002D'
+    # Los compañeros se distinguen por el simbolo del marcador
+    simbolos = dict(zip(red_bull.customdata, red_bull.marker.symbol))
+    assert simbolos['VER'] != simbolos['PER']
+
+
+def test_webgl_agrupa_por_equipo_y_no_por_color():
+    # Dos equipos con el mismo color y un piloto sin equipo conocido
+    estilos = {'VER': ('#3671C6', 'solid'), 'PER': ('#3671C6', 'dash'), 'LEC': ('#3671C6', 'solid')}
+    equipos = {'VER': 'Red Bull Racing', 'PER': 'Red Bull Racing', 'LEC': 'Williams'}
+    fig = construir_figura_posiciones(_serie(), estilos, 'Posiciones', una_traza=True, equipos=equipos)
+    assert [traza.name for traza in fig.data] == ['VER / PER', 'LEC']
+
+    fig = construir_figura_posiciones(_serie(), estilos, 'Posiciones', una_traza=True,
+                                      equipos={'VER': 'Red Bull Racing', 'PER': 'Red Bull Racing'})
+    assert [traza.name for traza in fig.data] == ['VER / PER', 'LEC']
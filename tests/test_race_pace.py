@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from modules.race_pace import vueltas_ritmo, ajustar_stints
+
+
+def _vueltas(compuesto_segundo_stint):
+    # Dos stints de 6 vueltas de un piloto; el segundo con el compuesto dado
+    n = 12
+    return pd.DataFrame({
+        'Driver': ['VER'] * n, 'Team': ['Red Bull Racing'] * n,
+        'Stint': [1.0] * 6 + [2.0] * 6,
+        'Compound': ['SOFT'] * 6 + [compuesto_segundo_stint] * 6,
+        'LapNumber': np.arange(1, n + 1, dtype=float),
+        'TyreLife': np.r_[np.arange(1, 7), np.arange(1, 7)].astype(float),
+        'LapTime': pd.to_timedelta(np.r_[90 + 0.1 * np.arange(6), 91 + 0.1 * np.arange(6)], unit='s'),
+        'PitInTime': pd.to_timedelta([pd.NaT] * n), 'PitOutTime': pd.to_timedelta([pd.NaT] * n), 'TrackStatus': '1',
+    })
+
+
+def test_ajustar_stints():
+    tabla = ajustar_stints(vueltas_ritmo(_vueltas('HARD')))
+    assert tabla['Compound'].tolist() == ['SOFT', 'HARD']
+    assert tabla['Vueltas'].tolist() == [6, 6]
+    # 0.1 s/vuelta de degradacion mas la correccion de combustible
+    assert np.allclose(tabla['Degradacion'], 0.13)
+
+
+def test_ajustar_stints_sin_compuesto():
+    vueltas = _vueltas(np.nan)
+    assert len(vueltas_ritmo(vueltas)) == 6
+    # Tambien con vueltas sin compuesto que no han pasado por vueltas_ritmo
+    for tabla in (ajustar_stints(vueltas_ritmo(vueltas)),
+                  ajustar_stints(vueltas.assign(TiempoCorregido=vueltas['LapTime'].dt.total_seconds()))):
+        assert tabla['Compound'].tolist() == ['SOFT']
+        assert tabla['Stint'].tolist() == [1.0]
@@ -0,0 +1,78 @@
+import numpy as np
+import matplotlib.pyplot as plt
+import pytest
+from modules import render_cache
+from modules.render_cache import CacheImagenes, renderizar_png, _clave_argumento
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = CacheImagenes()
+    monkeypatch.setattr(render_cache, '_cache', cache)
+    return cache
+
+
+def test_lru_expulsa_lo_menos_usado_al_pasar_el_limite():
+    cache = CacheImagenes(memoria_maxima=10)
+    cache.guardar('a', b'1234')
+    cache.guardar('b', b'1234')
+    assert cache.obtener('a') == b'1234'
+    cache.guardar('c', b'1234')
+    # 'b' era la menos usada: 'a' se acaba de leer
+    assert cache.obtener('b') is None
+    assert cache.obtener('a') is not None and cache.obtener('c') is not None
+    assert cache.memoria == 8
+
+    # Las tuplas de PNG cuentan con la suma de sus tamaños
+    cache.guardar('d', (b'12', b'345'))
+    assert cache.memoria <= 10 and cache.obtener('d') == (b'12', b'345')
+    # Una imagen mayor que el limite no se guarda ni expulsa nada
+    cache.guardar('e', b'x' * 11)
+    assert cache.obtener('e') is None and cache.obtener('d') is not None
+
+
+def test_clave_de_arrays_por_contenido():
+    a = np.arange(6, dtype=float)
+    assert _clave_argumento(a) == _clave_argumento(a.copy())
+    assert _clave_argumento(a) != _clave_argumento(a.reshape(2, 3))
+    assert _clave_argumento(a) != _clave_argumento(a.astype('float32'))
+    b = a.copy()
+    b[3] = -1
+    assert _clave_argumento(a) != _clave_argumento(b)
+    # Vistas no contiguas con el mismo contenido dan la misma clave
+    assert _clave_argumento(np.arange(12.0)[::2]) == _clave_argumento(np.arange(0.0, 12.0, 2))
+    assert _clave_argumento({'y': a, 'x': [1, 2]}) == _clave_argumento({'x': [1, 2], 'y': a.copy()})
+
+
+def test_figuras_cerradas_y_png_reutilizado(cache):
+    llamadas = []
+
+    def grafico(valores, titulo=''):
+        llamadas.append(titulo)
+        fig, ax = plt.subplots()
+        ax.plot(valores)
+        ax.set_title(titulo)
+        return fig, plt.figure()
+
+    abiertas = len(plt.get_fignums())
+    imagen = renderizar_png(grafico, np.arange(5.0), titulo='a')
+    assert len(plt.get_fignums()) == abiertas
+    assert isinstance(imagen, tuple) and all(png.startswith(b'\x89PNG') for png in imagen)
+
+    assert renderizar_png(grafico, np.arange(5.0), titulo='a') is imagen
+    renderizar_png(grafico, np.arange(5.0), titulo='b')
+    assert llamadas == ['a', 'b']
+    assert cache.estadisticas()['aciertos'] == 1 and cache.estadisticas()['entradas'] == 2
+    assert len(plt.get_fignums()) == abiertas
+
+
+def test_figura_cerrada_aunque_falle_la_codificacion(monkeypatch):
+    fig = plt.figure()
+
+    def falla(*args, **kwargs):
+        raise RuntimeError('savefig')
+
+    monkeypatch.setattr(fig, 'savefig', falla)
+    with pytest.raises(RuntimeError):
+        render_cache.figura_a_png(fig)
+    assert not plt.fignum_exists(fig.number)
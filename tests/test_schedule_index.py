@@ -0,0 +1,84 @@
+import os
+import pandas as pd
+import pytest
+from fastf1.events import EventSchedule
+from benchmarks.bench_offline import _evento
+from modules import schedule_index
+from modules.schedule_index import IndiceCalendario, tabla_calendario, obtener_indice_calendario
+
+GP = 'Bahrain Grand Prix'
+
+
+def _calendario(**cambios):
+    evento = _evento()
+    datos = pd.DataFrame([{**evento.to_dict(), **cambios}])
+    return EventSchedule(datos, year=2024)
+
+
+@pytest.fixture
+def peticiones(tmp_path, monkeypatch):
+    # get_event_schedule simulado que cuenta las veces que se pide cada temporada
+    llamadas = []
+
+    def get_event_schedule(year, include_testing=True):
+        llamadas.append(year)
+        return _calendario()
+
+    monkeypatch.setattr(schedule_index, 'get_event_schedule', get_event_schedule)
+    monkeypatch.setattr(schedule_index, '_indices', {})
+    monkeypatch.setattr(schedule_index, '_es_temporada_actual', lambda year: year >= 2024)
+    # TTL nulo: la temporada actual caduca en cada llamada
+    monkeypatch.setattr(schedule_index, 'TTL_TEMPORADA_ACTUAL', 0)
+    return llamadas, str(tmp_path)
+
+
+def test_solo_se_refresca_la_temporada_actual(peticiones, monkeypatch):
+    llamadas, directorio = peticiones
+    for _ in range(2):
+        obtener_indice_calendario(2023, directorio)
+        obtener_indice_calendario(2024, directorio)
+    assert llamadas == [2023, 2024, 2024]
+
+    # En otro proceso (sin indices en memoria) la temporada pasada se lee del archivo
+    monkeypatch.setattr(schedule_index, '_indices', {})
+    obtener_indice_calendario(2023, directorio)
+    assert llamadas == [2023, 2024, 2024]
+    assert os.path.exists(os.path.join(directorio, '2023.parquet'))
+
+
+def test_sin_red_se_sigue_usando_el_archivo(peticiones, monkeypatch):
+    llamadas, directorio = peticiones
+    indice = obtener_indice_calendario(2024, directorio)
+
+    def sin_red(year, include_testing=True):
+        raise ConnectionError('sin red')
+
+    monkeypatch.setattr(schedule_index, 'get_event_schedule', sin_red)
+    monkeypatch.setattr(schedule_index, '_indices', {})
+    assert obtener_indice_calendario(2024, directorio).nombres == indice.nombres == [GP]
+    with pytest.raises(ConnectionError):
+        obtener_indice_calendario(2025, directorio)
+
+
+def test_evento_igual_al_de_fastf1():
+    calendario = _calendario()
+    original = calendario.get_event_by_name(GP)
+    evento = IndiceCalendario(tabla_calendario(calendario), 2024).evento(GP)
+    assert evento.year == original.year
+    for columna, valor in original.items():
+        assert evento[columna] == valor or (pd.isnull(evento[columna]) and pd.isnull(valor)), columna
+    for sesion in ('FP1', 'Q', 'R'):
+        assert evento.get_session_name(sesion) == original.get_session_name(sesion)
+        assert evento.get_session_date(sesion, utc=True) == original.get_session_date(sesion, utc=True)
+        assert evento.get_session_date(sesion) == original.get_session_date(sesion)
+
+
+def test_formato_desconocido():
+    tabla = tabla_calendario(_calendario(EventFormat='formato_nuevo'))
+    assert tabla['Orden'].tolist() == [-1]
+    indice = IndiceCalendario(tabla, 2024)
+    assert indice.nombres == [GP]
+    assert indice.formato(GP) == 'formato_nuevo'
+    assert indice.fechas(GP) is None
+    assert indice.evento(GP) is None
+    assert indice.sesiones_disputadas() == []
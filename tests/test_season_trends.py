@@ -0,0 +1,23 @@
+import os
+import sys
+import types
+from modules import season_trends
+
+
+def test_pool_no_ejecuta_el_script_principal(offline, tmp_path, monkeypatch):
+    # Como dentro de Streamlit: el __main__ es un script sin `if __name__ == '__main__'`
+    script = tmp_path / 'app.py'
+    script.write_text("open('script_ejecutado', 'w').close()\n")
+    principal = types.ModuleType('__main__')
+    principal.__file__ = str(script)
+    monkeypatch.setitem(sys.modules, '__main__', principal)
+
+    terminados = []
+    tendencias, errores = season_trends.obtener_tendencias(
+        2024, ('Q', 'R'), max_workers=2, al_terminar=lambda gp, tipo, segundos, error: terminados.append((tipo, error)))
+    assert not os.path.exists('script_ejecutado')
+    assert sys.modules['__main__'] is principal
+    assert errores == []
+    assert sorted(terminados) == [('Q', None), ('R', None)]
+    assert tendencias.groupby('Sesion').size().to_dict() == {'Q': 10, 'R': 10}
+    assert list(tendencias.columns) == season_trends.COLUMNAS
@@ -0,0 +1,40 @@
+from benchmarks.bench_offline import YEAR, GP
+from modules import session_manager
+from modules.session_manager import cargar_sesion, asegurar_datos, requiere_datos, informe_carga
+
+
+@requiere_datos('laps', 'messages')
+def _grafico(session):
+    return len(session.laps)
+
+
+def test_sin_parseos_repetidos_entre_ejecuciones(offline):
+    session_manager.reiniciar_informe()
+    session = cargar_sesion(YEAR, GP, 'Q', desde_almacen=True)
+    parseos = informe_carga()['parseos'].copy()
+    assert parseos[['laps', 'messages']].tolist() == [1, 1]
+
+    # Cada ejecucion de la app vuelve a pedir los datos de la misma sesion
+    for _ in range(2):
+        asegurar_datos(session, 'laps', 'messages')
+        _grafico(session)
+    # Y un proceso nuevo abre la sesion del almacen
+    cargar_sesion(YEAR, GP, 'Q', desde_almacen=True)
+
+    informe = informe_carga()
+    assert informe['parseos'].equals(parseos)
+    assert informe['parseos_redundantes'].sum() == 0
+    assert informe.loc['laps', 'peticiones'] == 6
+
+
+def test_sin_cargador_privado_se_usa_session_load(offline, monkeypatch):
+    session = cargar_sesion(YEAR, GP, 'Q', categorias=('laps',))
+    # Como una version de FastF1 en la que el cargador privado tiene otro nombre
+    monkeypatch.setitem(session_manager._CARGADORES, 'messages', '_cargador_inexistente')
+    session_manager.reiniciar_informe()
+
+    asegurar_datos(session, 'messages')
+    assert not session.race_control_messages.empty
+    assert session_manager.categorias_cargadas(session) == {'laps', 'messages'}
+    # Session.load vuelve a procesar las vueltas
+    assert informe_carga().loc['laps', 'parseos_redundantes'] == 1
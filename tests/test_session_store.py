@@ -0,0 +1,104 @@
+import os
+import pandas as pd
+import pytest
+import fastf1.core
+from benchmarks.bench_offline import YEAR, GP, _telemetria_sintetica
+from modules import session_store, session_manager, shared_telemetry
+from modules.session_manager import crear_sesion, cargar_sesion, asegurar_datos
+
+ALMACEN = 'almacen'
+
+
+@pytest.fixture
+def escrituras(monkeypatch):
+    # Nombre de cada fichero del almacen en el orden en que se publica
+    nombres = []
+    replace = os.replace
+
+    def registrar(origen, destino):
+        nombres.append(os.path.relpath(destino, session_store.ruta_sesion(YEAR, GP, 'Q', ALMACEN)))
+        replace(origen, destino)
+    monkeypatch.setattr(session_store.os, 'replace', registrar)
+    return nombres
+
+
+def test_guardar_y_leer(offline, escrituras):
+    session = offline.sesion('Q', telemetria=True)
+    session_store.guardar_sesion(session, YEAR, GP, 'Q', directorio=ALMACEN)
+
+    assert escrituras[-1] == 'meta.json'
+    assert {'laps.parquet', 'results.parquet', 'ritmo.parquet', 'messages.parquet'} <= set(escrituras)
+    meta = session_store.leer_metadatos(YEAR, GP, 'Q', directorio=ALMACEN)
+    assert meta['categorias'] == ['laps', 'messages']
+    assert meta['pilotos']['VER'] == '1'
+    assert sorted(meta['telemetria']) == ['car', 'pos']
+
+    pilotos = session_store.leer_tabla(YEAR, GP, 'Q', 'laps', ['Driver'], directorio=ALMACEN)
+    assert list(pilotos.columns) == ['Driver'] and len(pilotos) == len(session.laps)
+    results = session_store.leer_tabla(YEAR, GP, 'Q', 'results', directorio=ALMACEN)
+    pd.testing.assert_frame_equal(results, pd.DataFrame(session.results).reset_index(drop=True))
+
+
+def test_telemetria_guardada_desde_las_tablas_compactas(offline):
+    session = offline.sesion('R', telemetria=True)
+    session_store.guardar_sesion(session, YEAR, GP, 'R', directorio=ALMACEN)
+
+    numero = session.results.set_index('Abbreviation').loc['VER', 'DriverNumber']
+    tabla = session_store.leer_telemetria(YEAR, GP, 'R', 'VER', directorio=ALMACEN)
+    pd.testing.assert_frame_equal(tabla, session.car_data.tabla(numero), check_categorical=False)
+    meta = session_store.leer_metadatos(YEAR, GP, 'R', directorio=ALMACEN)
+    assert sorted(meta['telemetria']) == ['car', 'pos']
+    assert meta['tipos_telemetria']['car'][numero]['Speed'] == 'float64'
+
+
+def test_reescritura_parcial_por_categoria(offline, escrituras):
+    session = offline.sesion('Q')
+    session_store.guardar_sesion(session, YEAR, GP, 'Q', directorio=ALMACEN)
+    escrituras.clear()
+
+    # Al cargar la telemetria solo se escriben sus ficheros (y meta.json, el ultimo)
+    _telemetria_sintetica(session)
+    session_store.guardar_sesion(session, YEAR, GP, 'Q', directorio=ALMACEN,
+                                 tablas=session_store.TABLAS_POR_CATEGORIA['telemetry'])
+    assert escrituras[-1] == 'meta.json'
+    assert all(nombre.startswith('telemetry') for nombre in escrituras[:-1]) and len(escrituras) > 1
+    meta = session_store.leer_metadatos(YEAR, GP, 'Q', directorio=ALMACEN)
+    assert meta['categorias'] == ['laps', 'messages'] and sorted(meta['telemetria']) == ['car', 'pos']
+
+    # Los mensajes reescriben las tablas de la sesion pero no la telemetria ya guardada
+    escrituras.clear()
+    session_store.guardar_sesion(session, YEAR, GP, 'Q', directorio=ALMACEN,
+                                 tablas=session_store.TABLAS_POR_CATEGORIA['messages'])
+    assert sorted(escrituras) == ['laps.parquet', 'messages.parquet', 'meta.json', 'results.parquet',
+                                  'ritmo.parquet']
+
+
+def test_sesion_abierta_del_almacen_sin_session_load(offline, monkeypatch):
+    cargada = offline.sesion('Q', telemetria=True)
+    session_store.guardar_sesion(cargada, YEAR, GP, 'Q')
+
+    def sin_load(*args, **kwargs):
+        raise AssertionError("Session.load no deberia llamarse")
+    monkeypatch.setattr(fastf1.core.Session, 'load', sin_load)
+    monkeypatch.setattr(shared_telemetry, 'ACTIVO', False)
+    session_manager.reiniciar_informe()
+
+    session = cargar_sesion(YEAR, GP, 'Q', desde_almacen=True)
+    pd.testing.assert_frame_equal(pd.DataFrame(session.laps), pd.DataFrame(cargada.laps))
+    pd.testing.assert_frame_equal(pd.DataFrame(session.results), pd.DataFrame(cargada.results))
+    pd.testing.assert_frame_equal(session.race_control_messages, cargada.race_control_messages)
+    assert session.session_start_time == cargada.session_start_time
+
+    asegurar_datos(session, 'telemetry')
+    numero = cargada.drivers[0]
+    pd.testing.assert_frame_equal(session.car_data[numero], cargada.car_data[numero])
+    informe = session_manager.informe_carga()
+    assert informe['parseos'].sum() == 0
+    assert informe.loc[['laps', 'messages', 'telemetry'], 'desde_almacen'].tolist() == [1, 1, 1]
+
+
+def test_sesion_sin_almacenar_se_carga_con_fastf1(offline):
+    session = cargar_sesion(YEAR, GP, 'Q', desde_almacen=True)
+    assert session_manager.categorias_cargadas(session) == {'laps', 'messages'}
+    assert session_store.sesion_almacenada(YEAR, GP, 'Q')
+    assert isinstance(crear_sesion(YEAR, GP, 'Q'), fastf1.core.Session)
@@ -0,0 +1,104 @@
+import os
+import time
+import threading
+import numpy as np
+import pytest
+from benchmarks.bench_offline import YEAR, GP, _telemetria_sintetica
+from modules import shared_telemetry
+from modules.session_manager import crear_sesion, asegurar_datos
+from modules.shared_telemetry import (abrir_telemetria, cargar_telemetria, escribir_telemetria,
+                                      ruta_telemetria, telemetria_guardada)
+
+
+def _proyectado(array):
+    # True si el array es una vista de un archivo proyectado en memoria
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+def _base(array):
+    while not isinstance(array, np.memmap):
+        array = array.base
+    return array
+
+
+def _sesion_sin_telemetria():
+    return asegurar_datos(crear_sesion(YEAR, GP, 'Q'), 'laps')
+
+
+def test_publicacion_atomica(offline, monkeypatch):
+    session = offline.sesion('Q', telemetria=True)
+    directorio = os.path.abspath('compartida')
+
+    def falla(*args, **kwargs):
+        raise OSError('disco lleno')
+
+    # Si la escritura se corta, la sesion no aparece a medio escribir
+    monkeypatch.setattr(shared_telemetry.json, 'dump', falla)
+    with pytest.raises(OSError):
+        escribir_telemetria(session, YEAR, GP, 'Q', directorio)
+    assert not os.path.exists(ruta_telemetria(YEAR, GP, 'Q', directorio))
+    assert not telemetria_guardada(YEAR, GP, 'Q', directorio)
+
+    monkeypatch.undo()
+    ruta = escribir_telemetria(session, YEAR, GP, 'Q', directorio)
+    assert telemetria_guardada(YEAR, GP, 'Q', directorio)
+    assert sorted(os.listdir(ruta)) == ['car', 'meta.json', 'pos']
+    # Un reintento reemplaza el directorio temporal que dejo el intento fallido
+    assert not [nombre for nombre in os.listdir(os.path.dirname(ruta)) if nombre.endswith('.tmp')]
+
+
+def test_segundo_lector_proyecta_los_mismos_archivos(offline):
+    escritora = offline.sesion('Q', telemetria=True)
+    directorio = os.path.abspath('compartida')
+    escribir_telemetria(escritora, YEAR, GP, 'Q', directorio)
+
+    lectores = [abrir_telemetria(_sesion_sin_telemetria(), YEAR, GP, 'Q', directorio) for _ in range(2)]
+    numero = escritora.drivers[0]
+    original = escritora.car_data.tabla(numero)
+    for lector in lectores:
+        tabla = lector.car_data.tabla(numero)
+        assert np.array_equal(tabla['Speed'].to_numpy(), original['Speed'].to_numpy())
+        velocidad = tabla['Speed'].to_numpy()
+        assert _proyectado(velocidad) and not velocidad.flags.writeable
+        assert lector.car_data[numero]['Speed'].equals(escritora.car_data[numero]['Speed'])
+    archivos = {os.path.realpath(_base(lector.car_data.tabla(numero)['Speed'].to_numpy()).filename)
+                for lector in lectores}
+    assert archivos == {os.path.join(ruta_telemetria(YEAR, GP, 'Q', directorio), 'car', 'Speed.npy')}
+
+
+def test_escritores_simultaneos_cargan_una_sola_vez(offline):
+    directorio = os.path.abspath('compartida')
+    cargas = []
+
+    def preparar():
+        session = _sesion_sin_telemetria()
+
+        def cargar():
+            cargas.append(threading.get_ident())
+            # Carga lenta: el otro escritor llega mientras tanto y espera al cerrojo
+            time.sleep(0.3)
+            _telemetria_sintetica(session)
+
+        session._load_telemetry = cargar
+        return session
+
+    sesiones = [preparar() for _ in range(3)]
+    resultados = [None] * len(sesiones)
+
+    def lanzar(i):
+        resultados[i] = cargar_telemetria(sesiones[i], YEAR, GP, 'Q', directorio)
+
+    hilos = [threading.Thread(target=lanzar, args=(i,)) for i in range(len(sesiones))]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert len(cargas) == 1
+    assert sorted(resultados) == [False, False, True]
+    numero = sesiones[0].drivers[0]
+    for session in sesiones:
+        assert _proyectado(session.car_data.tabla(numero)['Speed'].to_numpy())
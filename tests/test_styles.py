@@ -0,0 +1,38 @@
+import gc
+from modules import styles
+from modules.styles import RegistroEstilos, registro_estilos
+
+
+def test_paleta_agotada_sigue_dando_colores_distintos():
+    registro = RegistroEstilos()
+    colores = [registro.color_piloto(f'P{i:02d}') for i in range(3 * len(styles._PALETA_FALLBACK))]
+    assert len(set(colores)) == len(colores)
+    assert colores[:len(styles._PALETA_FALLBACK)] == styles._PALETA_FALLBACK
+    # El mismo piloto conserva su color
+    assert registro.color_piloto('P45') == colores[45]
+
+
+def test_companeros_de_equipo(offline):
+    session = offline.sesion('R')
+    registro = registro_estilos(session)
+    assert registro_estilos(session) is registro
+    por_equipo = {}
+    for abv, equipo in registro.equipo_piloto.items():
+        por_equipo.setdefault(equipo, []).append(abv)
+    assert len(por_equipo) == 10
+    for equipo, pilotos in por_equipo.items():
+        # Primer piloto con linea continua y el segundo discontinua, con el color del equipo
+        assert [registro.estilo_piloto(abv)[1] for abv in pilotos] == ['solid', 'dash']
+        distintos = registro.colores_pilotos(pilotos, distintos=True)
+        assert len(set(distintos.values())) == 2
+        assert registro.colores_pilotos(pilotos, distintos=True) == distintos
+
+
+def test_registro_se_libera_con_la_sesion(offline):
+    session = offline.sesion('R')
+    registro_estilos(session)
+    assert session in styles._registros
+    antes = len(styles._registros)
+    del session
+    gc.collect()
+    assert len(styles._registros) == antes - 1
@@ -0,0 +1,15 @@
+import pytest
+from modules.telemetry_alignment import alinear_telemetria
+
+
+def test_piloto_sin_telemetria_queda_omitido(offline):
+    session = offline.sesion('Q', telemetria=True)
+    numero = session.results.set_index('Abbreviation').loc['VER', 'DriverNumber']
+    del session.car_data._tablas[numero]
+
+    alineacion = alinear_telemetria(session)
+    assert 'VER' not in alineacion.indice
+    assert alineacion.omitidos == {'VER': 'sin telemetria'}
+    assert len(alineacion.pilotos) == len(session.results) - 1
+    with pytest.raises(ValueError, match='VER \\(sin telemetria\\)'):
+        alineacion.serie('VER', 'Speed')
@@ -0,0 +1,44 @@
+import numpy as np
+from modules.utils import lttb, reducir_serie, ticks_tiempo, formatear_tiempo
+
+
+def test_lttb_conserva_extremos_y_longitud():
+    x = np.arange(10000, dtype=float)
+    y = np.sin(x / 300)
+    y[4321] = 5.0
+    indices = lttb(x, y, 500)
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+    # El pico aislado no se pierde al reducir
+    assert 4321 in indices
+
+
+def test_lttb_serie_corta_sin_cambios():
+    assert np.array_equal(lttb([0, 1, 2], [3, 4, 5], 10), [0, 1, 2])
+    assert np.array_equal(lttb(np.arange(5), np.arange(5), 5), np.arange(5))
+
+
+def test_reducir_serie_descarta_nan():
+    x = np.arange(3000, dtype=float)
+    y = np.cos(x / 100)
+    y[10] = np.nan
+    rx, ry = reducir_serie(x, y, 1500)
+    assert len(rx) == len(ry) == 1500
+    assert rx[0] == 0 and rx[-1] == 2999
+    assert not np.isnan(ry).any()
+
+    cx, cy = reducir_serie([0, 1, np.nan, 3], [1, 2, 3, 4], 1500)
+    assert cx.tolist() == [0, 1, 3] and cy.tolist() == [1, 2, 4]
+
+
+def test_ticks_tiempo():
+    valores, etiquetas = ticks_tiempo(91.3, 95.8)
+    assert valores.tolist() == [91, 92, 93, 94, 95, 96]
+    assert etiquetas == ['1:31', '1:32', '1:33', '1:34', '1:35', '1:36']
+
+    # Con un paso de 15 s habria 5 ticks entre 1:30 y 2:30
+    valores, etiquetas = ticks_tiempo(90, 150, max_ticks=4)
+    assert valores.tolist() == [90, 120, 150] and etiquetas == ['1:30', '2:00', '2:30']
+    assert formatear_tiempo(83.5) == '1:23.5'
+    assert ticks_tiempo(np.nan, 95) == ([], [])